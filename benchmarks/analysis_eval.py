@@ -0,0 +1,238 @@
+"""
+Evaluación de calidad vs. latencia del análisis de mensajes
+Pasa un corpus etiquetado de SMS por cada camino de análisis (fallback sin
+IA, cada backend de inferencia por separado y el flujo completo con huellas
+de publicidad y caché semántica) y reporta precisión/recall por clase,
+exactitud de fecha y hora, latencia por mensaje y throughput
+
+Uso:
+    python benchmarks/analysis_eval.py [--corpus benchmarks/data/sms_corpus.jsonl]
+        [--backends "small=stub,large=hf:mistralai/Mistral-7B-Instruct-v0.2"]
+        [--output benchmarks/results/analysis_eval.json]
+        [--baseline resultados_anteriores.json --max-drop 0.02]
+
+Etiquetas de fecha del corpus (relativas al día de la evaluación):
+    "+N"               hoy + N días
+    "weekday:lunes"    próximo lunes (hoy no cuenta)
+    "MM-DD"            próxima ocurrencia de ese día
+    null               sin fecha
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jarvis.ai import AIAgent, MessageType  # noqa: E402
+from jarvis.inference import InferenceRouter  # noqa: E402
+from jarvis.utils import DIAS_SEMANA, get_current_time_mexico  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CORPUS = os.path.join(BENCH_DIR, "data", "sms_corpus.jsonl")
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results", "analysis_eval.json")
+
+CLASSES = [t.value for t in MessageType if t is not MessageType.UNKNOWN]
+
+# Métricas de calidad que se comparan contra --baseline
+QUALITY_METRICS = ("accuracy", "macro_f1", "date_accuracy", "time_accuracy")
+
+
+def resolve_date(label: Optional[str], today: date) -> Optional[str]:
+    """Fecha esperada (YYYY-MM-DD) de una etiqueta del corpus"""
+    if label is None:
+        return None
+    if label.startswith("+"):
+        return (today + timedelta(days=int(label[1:]))).isoformat()
+    if label.startswith("weekday:"):
+        weekday = DIAS_SEMANA[label.split(":", 1)[1]]
+        return (today + timedelta(days=(weekday - today.weekday()) % 7 or 7)).isoformat()
+    if len(label) == 5:
+        month, day = map(int, label.split("-"))
+        candidate = date(today.year, month, day)
+        if candidate < today:
+            candidate = date(today.year + 1, month, day)
+        return candidate.isoformat()
+    return label
+
+
+def load_corpus(path: str, today: date) -> List[Dict]:
+    corpus = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                item["date"] = resolve_date(item.get("date"), today)
+                corpus.append(item)
+    return corpus
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def evaluate(name: str, analyze: Callable[[str], Optional[Dict]], corpus: List[Dict]) -> Dict:
+    """Correr un camino sobre el corpus y calcular métricas"""
+    latencies = []
+    predictions = []
+    failures = 0
+    sources: Dict[str, int] = {}
+
+    start = time.perf_counter()
+    for item in corpus:
+        t0 = time.perf_counter()
+        analysis = analyze(item["text"])
+        latencies.append((time.perf_counter() - t0) * 1000)
+        if analysis is None:
+            failures += 1
+            analysis = {}
+        source = analysis.get("source")
+        if source:
+            sources[source] = sources.get(source, 0) + 1
+        predictions.append(analysis)
+    elapsed = time.perf_counter() - start
+
+    per_class = {}
+    for cls in CLASSES:
+        tp = sum(1 for item, pred in zip(corpus, predictions)
+                 if item["message_type"] == cls and pred.get("message_type") == cls)
+        predicted = sum(1 for pred in predictions if pred.get("message_type") == cls)
+        actual = sum(1 for item in corpus if item["message_type"] == cls)
+        precision = tp / predicted if predicted else 0.0
+        recall = tp / actual if actual else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        per_class[cls] = {
+            "precision": round(precision, 4),
+            "recall": round(recall, 4),
+            "f1": round(f1, 4),
+            "support": actual
+        }
+
+    n = len(corpus)
+    correct = sum(1 for item, pred in zip(corpus, predictions)
+                  if item["message_type"] == pred.get("message_type"))
+    dates_ok = sum(1 for item, pred in zip(corpus, predictions)
+                   if item.get("date") == pred.get("proposed_date"))
+    times_ok = sum(1 for item, pred in zip(corpus, predictions)
+                   if item.get("time") == pred.get("proposed_time"))
+
+    return {
+        "path": name,
+        "messages": n,
+        "failures": failures,
+        "accuracy": round(correct / n, 4),
+        "macro_f1": round(sum(c["f1"] for c in per_class.values()) / len(per_class), 4),
+        "per_class": per_class,
+        "date_accuracy": round(dates_ok / n, 4),
+        "time_accuracy": round(times_ok / n, 4),
+        "latency_ms": {
+            "mean": round(sum(latencies) / n, 3),
+            "p50": round(percentile(latencies, 0.5), 3),
+            "p90": round(percentile(latencies, 0.9), 3),
+            "p99": round(percentile(latencies, 0.99), 3)
+        },
+        "throughput_per_second": round(n / elapsed, 1) if elapsed else None,
+        "sources": sources
+    }
+
+
+def build_paths(backends: Optional[str]) -> Dict[str, Callable[[str], Optional[Dict]]]:
+    """Caminos de análisis a evaluar"""
+    if backends is not None:
+        os.environ["INFERENCE_BACKENDS"] = backends
+        os.environ.pop("INFERENCE_ROUTES", None)
+
+    paths = {}
+
+    # Sin IA: palabras clave y extractores de fecha/hora
+    fallback_agent = AIAgent(use_semantic_cache=False)
+    paths["fallback"] = fallback_agent._fallback_analysis
+
+    # Cada backend por separado, sólo el modelo (sin huellas, caché ni fallback)
+    for name, backend in fallback_agent.router.backends.items():
+        if not backend.available():
+            print(f"⚠️ Backend {name} no disponible (¿falta token o URL?), se omite")
+            continue
+        agent = AIAgent(use_semantic_cache=False)
+        agent.router = InferenceRouter({name: backend})
+        paths[f"llm:{name}"] = agent._llm_analysis
+
+    # Flujo de producción: huellas de publicidad, caché semántica, IA, fallback
+    paths["pipeline"] = AIAgent().analyze_message
+    return paths
+
+
+def compare(results: Dict, baseline: Dict, max_drop: float) -> List[str]:
+    """Regresiones de calidad respecto a una evaluación anterior"""
+    regressions = []
+    previous = {p["path"]: p for p in baseline.get("paths", [])}
+    for path in results["paths"]:
+        old = previous.get(path["path"])
+        if old is None:
+            continue
+        for metric in QUALITY_METRICS:
+            delta = path[metric] - old[metric]
+            if delta < -max_drop:
+                regressions.append(f"{path['path']}.{metric}: {old[metric]:.3f} → {path[metric]:.3f}")
+        old_p50, new_p50 = old["latency_ms"]["p50"], path["latency_ms"]["p50"]
+        print(f"   {path['path']:<16} macro F1 {old['macro_f1']:.3f} → {path['macro_f1']:.3f}, "
+              f"p50 {old_p50:.2f} → {new_p50:.2f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--backends", default=None,
+                        help="Sobrescribe INFERENCE_BACKENDS (nombre=tipo:modelo,...)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=None, help="JSON de una evaluación anterior")
+    parser.add_argument("--max-drop", type=float, default=0.02,
+                        help="Caída máxima tolerada en métricas de calidad")
+    args = parser.parse_args()
+
+    today = get_current_time_mexico().date()
+    corpus = load_corpus(args.corpus, today)
+    paths = build_paths(args.backends)
+
+    results = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "corpus": os.path.relpath(args.corpus),
+        "reference_date": today.isoformat(),
+        "paths": [evaluate(name, analyze, corpus) for name, analyze in paths.items()]
+    }
+
+    print(f"Corpus: {len(corpus)} mensajes ({args.corpus})")
+    print(f"{'camino':<16} {'exactitud':>9} {'macro F1':>9} {'fecha':>7} {'hora':>7} "
+          f"{'p50 ms':>9} {'p99 ms':>9} {'msg/s':>9} {'fallos':>7}")
+    for path in results["paths"]:
+        print(f"{path['path']:<16} {path['accuracy']:>9.3f} {path['macro_f1']:>9.3f} "
+              f"{path['date_accuracy']:>7.3f} {path['time_accuracy']:>7.3f} "
+              f"{path['latency_ms']['p50']:>9.3f} {path['latency_ms']['p99']:>9.3f} "
+              f"{path['throughput_per_second'] or 0:>9.1f} {path['failures']:>7}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"Resultados: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"Comparación con {args.baseline}:")
+        regressions = compare(results, baseline, args.max_drop)
+        if regressions:
+            print("❌ Regresiones de calidad:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print("✅ Sin regresiones de calidad")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark del estado de conversaciones
+Compara el formato anterior (dict de dicts con fecha ISO) con
+ConversationStore: memoria, marcas por segundo, listado de activas y
+consulta incremental con muchas conversaciones
+
+Uso:
+    python benchmarks/conversations_benchmark.py [--conversations 100000] [--active 0.02]
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import pytz
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jarvis.conversations import ConversationStore  # noqa: E402
+
+TZ_MEXICO = pytz.timezone('America/Mexico_City')
+
+
+class LegacyConversations:
+    """Formato anterior: un dict por conversación, escaneo completo al listar"""
+
+    def __init__(self):
+        self.conversations = {}
+        self.version = 0
+
+    def mark_active(self, phone_number: str):
+        now = datetime.now(TZ_MEXICO).isoformat()
+        if phone_number not in self.conversations:
+            self.conversations[phone_number] = {
+                "phone_number": phone_number,
+                "last_message_time": now,
+                "conversation_active": True,
+                "appointment_scheduled": False,
+                "context": {}
+            }
+        else:
+            self.conversations[phone_number]["conversation_active"] = True
+            self.conversations[phone_number]["last_message_time"] = now
+        self.version += 1
+        self.conversations[phone_number]["version"] = self.version
+
+    def mark_inactive(self, phone_number: str):
+        if phone_number in self.conversations:
+            self.conversations[phone_number]["conversation_active"] = False
+            self.version += 1
+            self.conversations[phone_number]["version"] = self.version
+
+    def list_active(self):
+        return [
+            {k: v for k, v in conv.items() if k != "version"}
+            for conv in self.conversations.values() if conv["conversation_active"]
+        ]
+
+    def changed_since(self, since: int):
+        return [conv for conv in self.conversations.values() if conv["version"] > since]
+
+
+class CompactConversations:
+    """Adaptador de ConversationStore con la misma interfaz"""
+
+    def __init__(self):
+        self.store = ConversationStore()
+
+    @property
+    def version(self):
+        return self.store.version
+
+    def mark_active(self, phone_number: str):
+        self.store.mark_active(phone_number)
+
+    def mark_inactive(self, phone_number: str):
+        self.store.mark_inactive(phone_number)
+
+    def list_active(self):
+        return self.store.list_active()
+
+    def changed_since(self, since: int):
+        return self.store.changes(since)
+
+
+def timed(func, repeat: int = 1) -> float:
+    """Milisegundos promedio de func()"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def run(cls, phones, active_ratio: float, rng: random.Random) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    state = cls()
+
+    start = time.perf_counter()
+    for phone in phones:
+        state.mark_active(phone)
+    marks_per_second = len(phones) / (time.perf_counter() - start)
+
+    # La mayoría de las conversaciones terminan; quedan activas active_ratio
+    for phone in phones:
+        if rng.random() >= active_ratio:
+            state.mark_inactive(phone)
+    memory_mb = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+    tracemalloc.stop()
+
+    # Unos pocos cambios desde la última sincronización del cliente
+    since = state.version
+    for phone in rng.sample(phones, 20):
+        state.mark_active(phone)
+
+    return {
+        "memory_mb": memory_mb,
+        "marks_per_second": marks_per_second,
+        "list_active_ms": timed(state.list_active, repeat=20),
+        "changed_since_ms": timed(lambda: state.changed_since(since), repeat=20),
+        "active": len(state.list_active())
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--conversations", type=int, default=100000)
+    parser.add_argument("--active", type=float, default=0.02, help="Fracción que queda activa")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    phones = [f"+52155{n:08d}" for n in range(args.conversations)]
+    results = {
+        "anterior": run(LegacyConversations, phones, args.active, random.Random(args.seed)),
+        "compacto": run(CompactConversations, phones, args.active, random.Random(args.seed)),
+    }
+
+    print(f"Conversaciones: {args.conversations} ({results['compacto']['active']} activas)")
+    print(f"{'formato':<10} {'memoria MB':>11} {'marcas/s':>11} {'listar ms':>10} {'cambios ms':>11}")
+    for name, r in results.items():
+        print(f"{name:<10} {r['memory_mb']:>11.1f} {r['marks_per_second']:>11.0f} "
+              f"{r['list_active_ms']:>10.2f} {r['changed_since_ms']:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
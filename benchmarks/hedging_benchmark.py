@@ -0,0 +1,78 @@
+"""
+Benchmark de hedging
+Simula la latencia de cola larga de HF Inference (la mayoría 1-2 s, algunas
+cerca del timeout) y compara percentiles con y sin solicitudes cubiertas
+
+Uso:
+    python benchmarks/hedging_benchmark.py [--calls 2000] [--scale 0.01]
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jarvis.hedging import HedgedExecutor  # noqa: E402
+
+
+def simulated_latency(rng: random.Random) -> float:
+    """Latencia en segundos reales de HF (antes de escalar)"""
+    roll = rng.random()
+    if roll < 0.90:
+        return rng.uniform(1.0, 2.0)
+    if roll < 0.98:
+        return rng.uniform(2.0, 5.0)
+    return rng.uniform(20.0, 29.0)
+
+
+def run(enabled: bool, calls: int, scale: float, budget: float, seed: int) -> dict:
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def inference(_prompt: str) -> str:
+        with lock:
+            latency = simulated_latency(rng)
+        time.sleep(latency * scale)
+        return "ok"
+
+    hedger = HedgedExecutor(enabled=enabled, budget_ratio=budget, min_delay=0.5 * scale,
+                            max_workers=64)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: hedger.call(inference, f"prompt {i}"), range(calls)))
+
+    stats = hedger.stats()
+    # Volver a segundos simulados
+    for key in ("primary_latency", "observed_latency"):
+        stats[key] = {q: round(v / scale, 2) for q, v in stats[key].items()}
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--scale", type=float, default=0.01, help="Factor de tiempo de la simulación")
+    parser.add_argument("--budget", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    baseline = run(False, args.calls, args.scale, args.budget, args.seed)
+    hedged = run(True, args.calls, args.scale, args.budget, args.seed)
+
+    print(f"Llamadas:              {args.calls}")
+    print(f"Sin hedging  p50/p90/p99: {baseline['observed_latency']}")
+    print(f"Con hedging  p50/p90/p99: {hedged['observed_latency']}")
+    print(f"Copias extra:          {hedged['hedges']} ({hedged['hedge_rate']:.1%}, "
+          f"presupuesto {args.budget:.0%})")
+    print(f"Copias ganadoras:      {hedged['hedge_wins']}")
+    p99_before = baseline["observed_latency"]["p99"]
+    p99_after = hedged["observed_latency"]["p99"]
+    print(f"Mejora p99:            {p99_before:.2f} s → {p99_after:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
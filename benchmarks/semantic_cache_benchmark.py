@@ -0,0 +1,83 @@
+"""
+Benchmark de la caché semántica
+Simula un flujo de mensajes con variaciones típicas de clientes y mide
+la tasa de aciertos (llamadas al LLM ahorradas) y la latencia de búsqueda
+
+Uso:
+    python benchmarks/semantic_cache_benchmark.py [--messages 5000] [--threshold 0.85]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jarvis.semantic_cache import SemanticCache  # noqa: E402
+
+OPENERS = ["", "hola ", "buenas tardes ", "buen dia ", "disculpe ", "hola doctor "]
+INTENTS = [
+    ["quiero una cita", "quisiera una cita", "necesito una cita", "me gustaria agendar una cita",
+     "quiero agendar", "necesito consulta"],
+    ["quiero cancelar mi cita", "necesito cancelar la cita", "cancela mi cita por favor"],
+    ["quiero cambiar mi cita", "puedo mover mi cita", "necesito reagendar"],
+    ["cuanto cuesta la consulta", "cuanto cuesta", "que precio tiene la consulta"],
+    ["donde estan ubicados", "cual es la direccion", "donde queda el consultorio"],
+    ["gracias", "muchas gracias", "ok gracias"],
+    ["es urgente", "tengo una emergencia", "es una urgencia"],
+]
+WHEN = ["", " mañana", " hoy", " el lunes", " el viernes", " mañana a las 5",
+        " el 15 de marzo", " a las 10:30", " pasado mañana por la tarde"]
+SUFFIX = ["", "?", "!", " por favor", " porfa", "."]
+
+
+def message(rng: random.Random) -> str:
+    intent = rng.choice(INTENTS)
+    text = rng.choice(OPENERS) + rng.choice(intent)
+    if intent is INTENTS[0] or intent is INTENTS[2]:
+        text += rng.choice(WHEN)
+    return text + rng.choice(SUFFIX)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--threshold", type=float, default=0.85)
+    parser.add_argument("--capacity", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    messages = [message(rng) for _ in range(args.messages)]
+    cache = SemanticCache(args.capacity, args.threshold)
+
+    # Uno por uno (como analyze_message): cada fallo equivale a una llamada al LLM
+    llm_calls = 0
+    start = time.perf_counter()
+    for text in messages:
+        if cache.lookup(text) is None:
+            llm_calls += 1
+            cache.put(text, {"message_type": "simulated"})
+    single_ms = (time.perf_counter() - start) * 1000 / len(messages)
+
+    # Búsqueda por lotes sobre la caché ya caliente
+    start = time.perf_counter()
+    for i in range(0, len(messages), args.batch):
+        cache.lookup_batch(messages[i:i + args.batch])
+    batch_ms = (time.perf_counter() - start) * 1000 / len(messages)
+
+    saved = len(messages) - llm_calls
+    print(f"Mensajes:               {len(messages)}")
+    print(f"Umbral:                 {args.threshold}")
+    print(f"Entradas en caché:      {len(cache)}")
+    print(f"Llamadas al LLM:        {llm_calls}")
+    print(f"Llamadas ahorradas:     {saved} ({saved / len(messages):.1%})")
+    print(f"Búsqueda + put (1x1):   {single_ms:.3f} ms/mensaje")
+    print(f"Búsqueda por lotes:     {batch_ms:.3f} ms/mensaje (lotes de {args.batch})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark de serialización de /active-conversations
+CPU por solicitud del camino anterior (un modelo Pydantic por conversación
++ jsonable_encoder + json.dumps, como hace FastAPI), de la codificación
+directa desde el estado y de la respuesta ya codificada por versión
+
+Uso:
+    python benchmarks/serialization_benchmark.py [--active 2000] [--requests 500]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jarvis.conversations import ConversationStore  # noqa: E402
+from jarvis.serialization import ResponseCache, dumps, orjson  # noqa: E402
+
+
+class ConversationState(BaseModel):
+    """Modelo que el endpoint construía por cada conversación activa"""
+    phone_number: str
+    last_message_time: str
+    conversation_active: bool
+    appointment_scheduled: bool
+    context: dict
+
+
+def cpu_per_request(func, requests: int) -> float:
+    """Microsegundos de CPU por solicitud"""
+    start = time.process_time()
+    for _ in range(requests):
+        func()
+    return (time.process_time() - start) * 1e6 / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--active", type=int, default=2000, help="Conversaciones activas")
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    store = ConversationStore()
+    now = time.time()
+    for n in range(args.active):
+        store.mark_active(f"+52155{n:08d}", now - n)
+
+    def legacy():
+        content = [ConversationState(**conv) for conv in store.list_active()]
+        return JSONResponse(jsonable_encoder(content)).body
+
+    def direct():
+        return dumps(store.list_active())
+
+    cache = ResponseCache()
+
+    def cached():
+        return cache.get("conversations", store.version, store.list_active)
+
+    assert legacy().replace(b" ", b"") == direct().replace(b" ", b"")
+
+    results = [
+        ("Pydantic + json (anterior)", cpu_per_request(legacy, args.requests)),
+        (f"directo ({'orjson' if orjson else 'json'})", cpu_per_request(direct, args.requests)),
+        ("caché por versión", cpu_per_request(cached, args.requests)),
+    ]
+
+    print(f"Conversaciones activas: {args.active}, respuesta de {len(direct()) / 1024:.0f} KB")
+    baseline = results[0][1]
+    for name, micros in results:
+        print(f"{name:<28} {micros:>12.1f} µs CPU/solicitud  ({baseline / micros:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
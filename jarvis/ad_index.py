@@ -0,0 +1,250 @@
+"""
+Módulo de huellas de publicidad
+Índice MinHash/LSH de mensajes ya clasificados como publicidad: las
+variaciones de la misma promoción (nombre, código, link) se reconocen
+sin llamar al modelo
+"""
+
+import logging
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from jarvis.responses import normalize
+
+logger = logging.getLogger(__name__)
+
+# Partes variables de una promoción
+URL_PATTERN = re.compile(r'(https?://|www\.)\S+|\S+\.(com|mx|net|ly|co)(/\S*)?', re.IGNORECASE)
+CODE_PATTERN = re.compile(r'\b\w*\d\w*\b')
+
+# Primo de Mersenne 2^31 - 1: a * x cabe en uint64
+PRIME = (1 << 31) - 1
+
+
+def shingles(text: str, size: int = 5) -> Set[str]:
+    """
+    Shingles de caracteres del mensaje con links y códigos enmascarados
+
+    Args:
+        text: Texto del mensaje
+        size: Longitud de cada shingle
+
+    Returns:
+        Conjunto de shingles (vacío si el texto es muy corto)
+    """
+    text = URL_PATTERN.sub(" url ", text)
+    text = CODE_PATTERN.sub("#", normalize(text))
+    text = " ".join(text.split())
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class _LSHTable:
+    """Tabla LSH por bandas con tamaño máximo y envejecimiento"""
+
+    def __init__(self, bands: int, rows: int, max_entries: int, max_age_seconds: float):
+        self.bands = bands
+        self.rows = rows
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self._buckets: List[Dict[bytes, Set[int]]] = [{} for _ in range(bands)]
+        # id -> (firma, último uso), ordenado del menos al más reciente
+        self._entries: "OrderedDict[int, Tuple[np.ndarray, float]]" = OrderedDict()
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, signature: np.ndarray):
+        entry_id = self._next_id
+        self._next_id += 1
+        for band, key in self._keys(signature):
+            self._buckets[band].setdefault(key, set()).add(entry_id)
+        self._entries[entry_id] = (signature, time.monotonic())
+        self.expire()
+
+    def remove(self, entry_id: int):
+        signature, _ = self._entries.pop(entry_id)
+        for band, key in self._keys(signature):
+            bucket = self._buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[band][key]
+
+    def query(self, signature: np.ndarray, threshold: float) -> List[Tuple[int, float]]:
+        """Entradas con similitud estimada >= threshold, de mayor a menor"""
+        candidates: Set[int] = set()
+        for band, key in self._keys(signature):
+            candidates.update(self._buckets[band].get(key, ()))
+
+        matches = []
+        for entry_id in candidates:
+            similarity = float(np.mean(self._entries[entry_id][0] == signature))
+            if similarity >= threshold:
+                matches.append((entry_id, similarity))
+        return sorted(matches, key=lambda m: m[1], reverse=True)
+
+    def touch(self, entry_id: int):
+        signature, _ = self._entries[entry_id]
+        self._entries[entry_id] = (signature, time.monotonic())
+        self._entries.move_to_end(entry_id)
+
+    def expire(self):
+        """Descartar entradas viejas y las que excedan el tamaño máximo"""
+        cutoff = time.monotonic() - self.max_age_seconds
+        while self._entries:
+            entry_id, (_, last_used) = next(iter(self._entries.items()))
+            if last_used >= cutoff and len(self._entries) <= self.max_entries:
+                break
+            self.remove(entry_id)
+
+
+class AdBlastIndex:
+    """
+    Índice de promociones masivas
+
+    - add(): registrar un mensaje que el modelo clasificó como publicidad
+    - match(): similitud con una promoción conocida, o None
+    - mark_not_spam(): corrección manual; el mensaje y sus variaciones
+      dejan de clasificarse automáticamente
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.6,
+        num_perm: int = 128,
+        bands: int = 32,
+        max_entries: int = 5000,
+        max_age_seconds: float = 30 * 86400,
+        min_shingles: int = 20,
+        seed: int = 1
+    ):
+        """
+        Inicializar índice
+
+        Args:
+            threshold: Similitud de Jaccard estimada mínima para reconocer una promoción
+            num_perm: Permutaciones MinHash (longitud de la firma)
+            bands: Bandas LSH (num_perm debe ser múltiplo)
+            max_entries: Firmas máximas por tabla
+            max_age_seconds: Tiempo sin verse tras el que se olvida una promoción
+            min_shingles: Mensajes más cortos no se indexan (evita falsos positivos)
+            seed: Semilla de las permutaciones
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm debe ser múltiplo de bands")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.min_shingles = min_shingles
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, PRIME, size=(num_perm, 1), dtype=np.uint64)
+
+        rows = num_perm // bands
+        self._ads = _LSHTable(bands, rows, max_entries, max_age_seconds)
+        self._allowed = _LSHTable(bands, rows, max_entries, max_age_seconds)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """Firma MinHash del mensaje, o None si es demasiado corto"""
+        items = shingles(text)
+        if len(items) < self.min_shingles:
+            return None
+
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) & PRIME for s in items),
+            dtype=np.uint64,
+            count=len(items)
+        )
+        return ((self._a * hashes + self._b) % PRIME).min(axis=1).astype(np.uint32)
+
+    def match(self, text: str) -> Optional[float]:
+        """
+        Buscar una promoción conocida
+
+        Returns:
+            Similitud estimada con la promoción más parecida, o None
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return None
+
+        with self._lock:
+            self._ads.expire()
+            self._allowed.expire()
+            if self._allowed.query(signature, self.threshold):
+                return None
+
+            matches = self._ads.query(signature, self.threshold)
+            if not matches:
+                return None
+
+            entry_id, similarity = matches[0]
+            self._ads.touch(entry_id)
+            self.hits += 1
+            return similarity
+
+    def add(self, text: str) -> bool:
+        """
+        Registrar un mensaje clasificado como publicidad
+
+        Returns:
+            True si se indexó
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return False
+
+        with self._lock:
+            if self._allowed.query(signature, self.threshold):
+                return False
+            # Variación de una promoción ya indexada: basta con refrescarla
+            matches = self._ads.query(signature, 0.9)
+            if matches:
+                self._ads.touch(matches[0][0])
+            else:
+                self._ads.add(signature)
+            return True
+
+    def mark_not_spam(self, text: str) -> int:
+        """
+        Corrección manual "no es publicidad"
+
+        Returns:
+            Número de promociones indexadas que se eliminaron
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return 0
+
+        with self._lock:
+            matches = self._ads.query(signature, self.threshold)
+            for entry_id, _ in matches:
+                self._ads.remove(entry_id)
+            self._allowed.add(signature)
+
+        logger.info(f"✅ Marcado como no publicidad ({len(matches)} huellas eliminadas)")
+        return len(matches)
+
+    def stats(self) -> Dict:
+        """Estadísticas del índice"""
+        return {
+            "ads": len(self._ads),
+            "not_spam": len(self._allowed),
+            "threshold": self.threshold,
+            "hits": self.hits
+        }
@@ -1,15 +1,22 @@
 """
 Módulo de Inteligencia Artificial
-Utiliza Hugging Face Inference API con Mistral 7B Instruct
+Utiliza Hugging Face Inference API con Mistral 7B Instruct (o los backends
+configurados en INFERENCE_BACKENDS)
 """
 
 import os
 import logging
-import requests
 import json
 from typing import Dict, Optional
 from enum import Enum
 
+from jarvis.tracing import span
+from jarvis.semantic_cache import SemanticCache
+from jarvis.ad_index import AdBlastIndex
+from jarvis.inference import InferenceRouter, TASK_CLASSIFY, TASK_EXTRACT, TASK_RESPOND
+from jarvis.warmup import ModelWarmer
+from jarvis.utils import extract_date_from_message, extract_time_from_message
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,72 +29,77 @@ class MessageType(str, Enum):
     UNKNOWN = "unknown"
 
 
+class AnalysisSource(str, Enum):
+    """Origen de un análisis"""
+    LLM = "llm"
+    FALLBACK = "fallback"
+    SEMANTIC_CACHE = "semantic_cache"
+    AD_INDEX = "ad_index"
+
+
 class AIAgent:
-    """Agente de IA para Jarvis usando Hugging Face"""
+    """Agente de IA para Jarvis (Hugging Face u otros backends de inferencia)"""
 
-    def __init__(self, hf_token: str = ""):
+    def __init__(self, hf_token: str = "", use_semantic_cache: bool = True):
         """
         Inicializar agente de IA
         
         Args:
             hf_token: Token de Hugging Face para acceso a API
+            use_semantic_cache: Reutilizar análisis de mensajes casi idénticos
         """
         self.hf_token = hf_token or os.getenv("HF_TOKEN", "")
-        self.hf_model = "mistralai/Mistral-7B-Instruct-v0.2"
-        self.hf_api_url = f"https://api-inference.huggingface.co/models/{self.hf_model}"
+
+        # Backends de inferencia y ruta por tarea (ver jarvis/inference.py)
+        self.router = InferenceRouter.from_env(self.hf_token)
+
+        # Calentamiento al arrancar y pings en horario laboral
+        self.warmer = ModelWarmer(
+            self.router.backends.values(),
+            interval_seconds=float(os.getenv("KEEPWARM_INTERVAL_SECONDS", "300")),
+            max_interval_seconds=float(os.getenv("KEEPWARM_MAX_INTERVAL_SECONDS", "1800")),
+            lead_minutes=float(os.getenv("KEEPWARM_LEAD_MINUTES", "15")),
+            keep_warm=os.getenv("MODEL_KEEPWARM", "true").lower() in ("1", "true", "yes")
+        )
+
+        # Cachés semánticas (análisis y respuestas generadas)
+        self.semantic_cache: Optional[SemanticCache] = None
+        self.response_cache: Optional[SemanticCache] = None
+        if use_semantic_cache:
+            threshold = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.85"))
+            capacity = int(os.getenv("SEMANTIC_CACHE_SIZE", "2000"))
+            self.semantic_cache = SemanticCache(capacity, threshold)
+            self.response_cache = SemanticCache(capacity, threshold)
+
+        # Huellas de promociones masivas ya clasificadas como publicidad
+        self.ad_index = AdBlastIndex(
+            threshold=float(os.getenv("AD_INDEX_THRESHOLD", "0.6")),
+            max_entries=int(os.getenv("AD_INDEX_MAX_ENTRIES", "5000")),
+            max_age_seconds=float(os.getenv("AD_INDEX_MAX_AGE_DAYS", "30")) * 86400
+        )
         
-        if self.hf_token:
-            logger.info(f"✅ IA inicializada con Mistral 7B Instruct")
+        if self.router.available():
+            logger.info(f"✅ IA inicializada ({self.router.describe()})")
         else:
-            logger.warning("⚠️ HF_TOKEN no configurado - respuestas limitadas")
+            logger.warning("⚠️ Sin backend de inferencia disponible - respuestas limitadas")
 
-    def _call_huggingface(self, prompt: str, max_tokens: int = 256) -> Optional[str]:
+    def warmup(self):
+        """Ping de inferencia a los backends que se enfrían (al arrancar)"""
+        self.warmer.warm_all()
+
+    def _generate(self, task: str, prompt: str, max_tokens: int = 256) -> Optional[str]:
         """
-        Llamar a Hugging Face Inference API
+        Generar texto con el backend que el enrutador asigna a la tarea
         
         Args:
+            task: classify, extract o respond
             prompt: Prompt para el modelo
             max_tokens: Máximo número de tokens en respuesta
             
         Returns:
             Respuesta del modelo o None si falla
         """
-        if not self.hf_token:
-            return None
-
-        try:
-            headers = {
-                "Authorization": f"Bearer {self.hf_token}",
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "inputs": prompt,
-                "parameters": {
-                    "max_new_tokens": max_tokens,
-                    "temperature": 0.7,
-                    "top_p": 0.95
-                }
-            }
-            
-            response = requests.post(
-                self.hf_api_url,
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                if isinstance(result, list) and len(result) > 0:
-                    return result[0].get("generated_text", "").strip()
-            else:
-                logger.error(f"HF API error: {response.status_code} - {response.text}")
-                
-        except Exception as e:
-            logger.error(f"Error calling HuggingFace: {e}")
-        
-        return None
+        return self.router.generate(task, prompt, max_tokens)
 
     def analyze_message(self, message: str, client_name: Optional[str] = None) -> Dict:
         """
@@ -100,7 +112,40 @@ class AIAgent:
         Returns:
             Dict con análisis del mensaje
         """
+        with span("ai.analyze_message", chars=len(message)) as attrs:
+            analysis = self._analyze_message(message, client_name)
+            attrs["message_type"] = str(analysis.get("message_type"))
+            return analysis
+
+    def _analyze_message(self, message: str, client_name: Optional[str] = None) -> Dict:
+        """Análisis con huellas de publicidad, caché semántica, IA y fallback (ver analyze_message)"""
         
+        similarity = self.ad_index.match(message)
+        if similarity is not None:
+            logger.info(f"🚫 Publicidad reconocida por huella (similitud {similarity:.2f})")
+            return self._advertisement_analysis(client_name, similarity)
+
+        if self.semantic_cache is not None:
+            cached = self.semantic_cache.lookup(message)
+            if cached:
+                logger.info(f"♻️ Análisis reutilizado (caché semántica): {cached.get('message_type')}")
+                return self._refresh_cached_analysis(cached, message, client_name)
+
+        analysis = self._llm_analysis(message)
+        if analysis is not None:
+            if analysis.get("message_type") == MessageType.ADVERTISEMENT.value:
+                self.ad_index.add(message)
+            if self.semantic_cache is not None:
+                self.semantic_cache.put(message, analysis)
+            return analysis
+
+        # Fallback: análisis simple sin IA
+        with span("ai.fallback_analysis"):
+            return self._fallback_analysis(message, client_name)
+
+    def _llm_analysis(self, message: str) -> Optional[Dict]:
+        """Análisis sólo con el modelo (None si no responde o no da JSON válido)"""
+
         # Prompt para análisis
         analysis_prompt = f"""Analiza el siguiente mensaje SMS y responde en JSON:
 
@@ -126,7 +171,7 @@ Reglas:
 - requires_response: false solo si es publicidad"""
 
         try:
-            response_text = self._call_huggingface(analysis_prompt, max_tokens=400)
+            response_text = self._generate(TASK_CLASSIFY, analysis_prompt, max_tokens=400)
             
             if response_text:
                 # Intentar parsear JSON
@@ -137,9 +182,11 @@ Reglas:
                     
                     if start_idx != -1 and end_idx > start_idx:
                         json_str = response_text[start_idx:end_idx]
-                        analysis = json.loads(json_str)
+                        with span("ai.parse_json", chars=len(json_str)):
+                            analysis = json.loads(json_str)
                         
                         logger.info(f"📊 Análisis: {analysis.get('message_type', 'unknown')}")
+                        analysis["source"] = AnalysisSource.LLM.value
                         return analysis
                 except json.JSONDecodeError:
                     logger.warning(f"No se pudo parsear JSON: {response_text}")
@@ -147,8 +194,46 @@ Reglas:
         except Exception as e:
             logger.error(f"Error analizando mensaje: {e}")
         
-        # Fallback: análisis simple sin IA
-        return self._fallback_analysis(message, client_name)
+        return None
+
+    def _refresh_cached_analysis(self, cached: Dict, message: str,
+                                 client_name: Optional[str] = None) -> Dict:
+        """
+        Adaptar un análisis reutilizado al mensaje actual
+        
+        Fecha y hora siempre se extraen de nuevo; la respuesta sugerida del
+        mensaje original puede mencionarlas, así que se descarta.
+        """
+        cached["proposed_date"] = extract_date_from_message(message)
+        cached["proposed_time"] = extract_time_from_message(message)
+        cached["client_name"] = client_name
+        cached["suggested_response"] = None
+        cached["source"] = AnalysisSource.SEMANTIC_CACHE.value
+        return cached
+
+    def _advertisement_analysis(self, client_name: Optional[str], similarity: float) -> Dict:
+        """Análisis de un mensaje reconocido como promoción conocida"""
+        return {
+            "message_type": MessageType.ADVERTISEMENT.value,
+            "client_name": client_name,
+            "proposed_date": None,
+            "proposed_time": None,
+            "confidence": round(similarity, 2),
+            "requires_response": False,
+            "suggested_response": None,
+            "source": AnalysisSource.AD_INDEX.value
+        }
+
+    def mark_not_spam(self, message: str) -> int:
+        """
+        Corrección manual: el mensaje no es publicidad
+        
+        Returns:
+            Huellas de publicidad eliminadas
+        """
+        if self.semantic_cache is not None:
+            self.semantic_cache.discard(message)
+        return self.ad_index.mark_not_spam(message)
 
     def _fallback_analysis(self, message: str, client_name: Optional[str] = None) -> Dict:
         """
@@ -173,11 +258,12 @@ Reglas:
         return {
             "message_type": message_type.value,
             "client_name": client_name,
-            "proposed_date": None,
-            "proposed_time": None,
+            "proposed_date": extract_date_from_message(message),
+            "proposed_time": extract_time_from_message(message),
             "confidence": 0.5,
             "requires_response": requires_response,
-            "suggested_response": f"Entendido. Voy a procesar tu solicitud."
+            "suggested_response": f"Entendido. Voy a procesar tu solicitud.",
+            "source": AnalysisSource.FALLBACK.value
         }
 
     def generate_response(self, message: str, owner_name: str = "Sergio") -> str:
@@ -202,9 +288,23 @@ ofrece disponibilidad. Si no puedes resolver, indica que pasarás el mensaje a {
 
 Respuesta:"""
 
+        # Sólo se reutilizan respuestas de mensajes sin fecha ni hora
+        cacheable = (
+            self.response_cache is not None
+            and not extract_date_from_message(message)
+            and not extract_time_from_message(message)
+        )
+        if cacheable:
+            cached = self.response_cache.lookup(message)
+            if cached:
+                return cached["response"]
+
         try:
-            response = self._call_huggingface(response_prompt, max_tokens=150)
+            with span("ai.generate_response"):
+                response = self._generate(TASK_RESPOND, response_prompt, max_tokens=150)
             if response:
+                if cacheable:
+                    self.response_cache.put(message, {"response": response.strip()})
                 return response.strip()
         except Exception as e:
             logger.error(f"Error generando respuesta: {e}")
@@ -238,7 +338,7 @@ Responde EXACTAMENTE en este formato JSON:
 }}"""
 
         try:
-            response_text = self._call_huggingface(extraction_prompt, max_tokens=200)
+            response_text = self._generate(TASK_EXTRACT, extraction_prompt, max_tokens=200)
             
             if response_text:
                 try:
@@ -284,3 +384,28 @@ Responde EXACTAMENTE en este formato JSON:
         ]
         
         return any(word in message_lower for word in completion_words)
+
+
+# ==================== PROCESOS DE PARTICIÓN ====================
+# Con PARTITION_PROCESSES cada partición (jarvis/partitions.py) analiza en
+# su propio proceso, con su propio agente: cachés semánticas y huellas de
+# publicidad propias de los números que le tocan.
+
+_worker_agent: Optional[AIAgent] = None
+
+
+def init_worker_agent(hf_token: str = ""):
+    """Inicializador de un proceso de partición"""
+    global _worker_agent
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    _worker_agent = AIAgent(hf_token)
+
+
+def analyze_in_worker(message: str) -> Dict:
+    """Analizar un mensaje con el agente del proceso"""
+    return _worker_agent.analyze_message(message)
+
+
+def mark_not_spam_in_worker(message: str) -> int:
+    """Corrección manual en el agente del proceso"""
+    return _worker_agent.mark_not_spam(message)
@@ -0,0 +1,199 @@
+"""
+Módulo de disponibilidad por minuto
+Rejilla NumPy de minutos libres construida a partir de intervalos ocupados
+y de las reglas de horario laboral / fin de semana
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from jarvis.utils import is_business_hours, is_weekend
+
+logger = logging.getLogger(__name__)
+
+
+class AvailabilityGrid:
+    """Rejilla de disponibilidad con un booleano por minuto"""
+
+    def __init__(
+        self,
+        window_start: datetime,
+        window_end: datetime,
+        busy_intervals: Iterable[Tuple[datetime, datetime]] = (),
+        business_hours_only: bool = True
+    ):
+        """
+        Construir rejilla de disponibilidad
+
+        Args:
+            window_start: Inicio de la ventana de búsqueda (con zona horaria)
+            window_end: Fin de la ventana de búsqueda
+            busy_intervals: Intervalos (inicio, fin) ocupados en el calendario
+            business_hours_only: Aplicar reglas de horario laboral y fin de semana
+        """
+        # Alinear inicio al siguiente minuto completo
+        start = window_start.replace(second=0, microsecond=0)
+        if start < window_start:
+            start += timedelta(minutes=1)
+
+        self.start = start
+        self.size = max(0, int((window_end - start).total_seconds() // 60))
+        self.free = np.ones(self.size, dtype=bool)
+
+        # Minutos que las reglas de horario dejan abiertos (el calendario no se consultó fuera de ellos)
+        self.open = self._business_mask() if business_hours_only else np.ones(self.size, dtype=bool)
+        self.free &= self.open
+
+        for busy_start, busy_end in busy_intervals:
+            self.mark_busy(busy_start, busy_end)
+
+    def copy(self) -> "AvailabilityGrid":
+        """Copia independiente (para modificarla sin afectar a quien lee la original)"""
+        grid = object.__new__(AvailabilityGrid)
+        grid.start = self.start
+        grid.size = self.size
+        grid.free = self.free.copy()
+        grid.open = self.open
+        return grid
+
+    def _business_mask(self) -> np.ndarray:
+        """
+        Máscara de minutos dentro de horario laboral
+
+        Las reglas de utils dependen sólo de la hora, así que se evalúan
+        una vez por hora y se expanden a minutos.
+        """
+        if self.size == 0:
+            return np.zeros(0, dtype=bool)
+
+        hour_offsets = (np.arange(self.size) + self.start.minute) // 60
+        hour_start = self.start.replace(minute=0)
+        hours = [
+            hour_start + timedelta(hours=int(h))
+            for h in range(int(hour_offsets[-1]) + 1)
+        ]
+        hourly = np.array(
+            [is_business_hours(h) and not is_weekend(h) for h in hours],
+            dtype=bool
+        )
+        return hourly[hour_offsets]
+
+    def _index(self, dt: datetime) -> int:
+        """Índice de minuto (sin recortar) para una fecha"""
+        return int((dt - self.start).total_seconds() // 60)
+
+    def _datetime(self, index: int) -> datetime:
+        """Fecha correspondiente a un índice de minuto"""
+        return self.start + timedelta(minutes=int(index))
+
+    def mark_busy(self, busy_start: datetime, busy_end: datetime):
+        """Marcar un intervalo como ocupado"""
+        lo = max(0, self._index(busy_start))
+        # Redondear hacia arriba para no dejar minutos parciales libres
+        hi = min(self.size, -(-int((busy_end - self.start).total_seconds()) // 60))
+        if lo < hi:
+            self.free[lo:hi] = False
+
+    def fits(self, duration_minutes: int, step_minutes: int = 1) -> np.ndarray:
+        """
+        Índices de inicio donde cabe un bloque libre
+
+        Args:
+            duration_minutes: Duración del bloque en minutos
+            step_minutes: Alineación de los inicios respecto al reloj
+
+        Returns:
+            Array ordenado de índices de minuto válidos como inicio
+        """
+        if duration_minutes <= 0 or duration_minutes > self.size:
+            return np.zeros(0, dtype=np.int64)
+
+        # Suma acumulada: un bloque está libre si contiene N minutos libres
+        cumulative = np.concatenate(([0], np.cumsum(self.free, dtype=np.int64)))
+        window_free = cumulative[duration_minutes:] - cumulative[:-duration_minutes]
+        valid = window_free == duration_minutes
+
+        if step_minutes > 1:
+            minute_of_day = (
+                np.arange(valid.size) + self.start.hour * 60 + self.start.minute
+            )
+            valid &= (minute_of_day % step_minutes) == 0
+
+        return np.flatnonzero(valid)
+
+    def first_slots(self, duration_minutes: int, k: int, step_minutes: int = 1) -> List[datetime]:
+        """Primeros K inicios disponibles"""
+        starts = self.fits(duration_minutes, step_minutes)[:k]
+        return [self._datetime(i) for i in starts]
+
+    def all_slots(self, duration_minutes: int, step_minutes: int = 1) -> List[datetime]:
+        """Todos los inicios disponibles"""
+        return [self._datetime(i) for i in self.fits(duration_minutes, step_minutes)]
+
+    def nearest_slots(
+        self,
+        proposed: datetime,
+        duration_minutes: int,
+        step_minutes: int = 1,
+        k: int = 1
+    ) -> List[datetime]:
+        """
+        Slots libres más cercanos a una hora propuesta
+
+        Args:
+            proposed: Hora propuesta por el cliente
+            duration_minutes: Duración de la cita
+            step_minutes: Alineación de los inicios
+            k: Número de candidatos a devolver
+
+        Returns:
+            Inicios ordenados por cercanía (vacío si no hay disponibilidad)
+        """
+        starts = self.fits(duration_minutes, step_minutes)
+        if starts.size == 0:
+            return []
+
+        distance = np.abs(starts - self._index(proposed))
+        if k == 1:
+            order = [int(np.argmin(distance))]
+        else:
+            order = np.argsort(distance, kind='stable')[:k]
+        return [self._datetime(starts[i]) for i in order]
+
+    def nearest_slot(
+        self,
+        proposed: datetime,
+        duration_minutes: int,
+        step_minutes: int = 1
+    ) -> Optional[datetime]:
+        """Slot libre más cercano a una hora propuesta (None si no hay)"""
+        nearest = self.nearest_slots(proposed, duration_minutes, step_minutes)
+        return nearest[0] if nearest else None
+
+    def is_free(self, start: datetime, duration_minutes: int) -> Optional[bool]:
+        """
+        Verificar si un bloque concreto está libre
+
+        Returns:
+            True/False, o None si el bloque sale de la ventana o del horario
+            laboral (la rejilla no sabe nada de esos minutos)
+        """
+        lo = self._index(start)
+        hi = lo + duration_minutes
+        if lo < 0 or hi > self.size or duration_minutes <= 0:
+            return None
+        if not self.open[lo:hi].all():
+            return None
+        return bool(self.free[lo:hi].all())
+
+    @staticmethod
+    def to_slot(dt: datetime) -> Dict:
+        """Formato de slot usado por la API"""
+        return {
+            'date': dt.strftime('%Y-%m-%d'),
+            'time': dt.strftime('%H:%M'),
+            'datetime': dt.isoformat()
+        }
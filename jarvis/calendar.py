@@ -6,41 +6,66 @@ Maneja creación, consulta y gestión de eventos/citas
 import os
 import logging
 import json
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+from typing import Callable, Dict, List, Optional
 import pytz
 
+from jarvis.availability import AvailabilityGrid
+from jarvis.tracing import span
+
 logger = logging.getLogger(__name__)
 
 
 class GoogleCalendarManager:
     """Gestor de Google Calendar"""
 
-    def __init__(self, credentials: Optional[Dict] = None):
+    def __init__(self, credentials: Optional[Dict] = None, calendar_id: str = 'primary'):
         """
         Inicializar gestor de Google Calendar
         
         Args:
             credentials: Dict con credenciales de service account
                         o None para cargar de GOOGLE_CALENDAR_CREDENTIALS env var
+            calendar_id: Calendario del propietario
         """
         self.tz = pytz.timezone('America/Mexico_City')
-        self.service = self._build_service(credentials)
-        self.calendar_id = 'primary'
+        self.calendar_id = calendar_id
+        self._change_listeners: List[Callable] = []
+
+        # El cliente de Google se construye en el primer uso (ver service)
+        self._credentials = credentials
+        self._service = None
+        self._service_attempted = False
+        self._service_lock = threading.Lock()
+
+    @property
+    def service(self):
+        """Cliente de Google Calendar API, construido en el primer acceso"""
+        if not self._service_attempted:
+            with self._service_lock:
+                if not self._service_attempted:
+                    with span("calendar.build_service"):
+                        self._service = self._build_service(self._credentials)
+                    self._service_attempted = True
+        return self._service
 
     def _build_service(self, credentials: Optional[Dict] = None):
         """
         Construir cliente de Google Calendar API
         
+        Usa el documento de discovery incluido en googleapiclient en lugar
+        de resolverlo por la ruta genérica de build().
+        
         Args:
             credentials: Dict con credenciales o None
             
         Returns:
             Servicio de Google Calendar o None si falla
         """
+        start = time.perf_counter()
+
         try:
             # Obtener credenciales
             if credentials is None:
@@ -51,6 +76,11 @@ class GoogleCalendarManager:
                     logger.error("No credentials provided or found in environment")
                     return None
             
+            # Importación diferida: googleapiclient es lento de cargar
+            from google.oauth2 import service_account
+            from googleapiclient.discovery import build, build_from_document
+            from googleapiclient.discovery_cache import get_static_doc
+
             # Crear credenciales de service account
             creds = service_account.Credentials.from_service_account_info(
                 credentials,
@@ -58,14 +88,37 @@ class GoogleCalendarManager:
             )
             
             # Construir servicio
-            service = build('calendar', 'v3', credentials=creds)
-            logger.info("✅ Google Calendar API conectado")
+            discovery_doc = get_static_doc('calendar', 'v3')
+            if discovery_doc:
+                service = build_from_document(discovery_doc, credentials=creds)
+            else:
+                service = build('calendar', 'v3', credentials=creds)
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            logger.info(f"✅ Google Calendar API conectado ({elapsed_ms:.0f} ms)")
             return service
         
         except Exception as e:
             logger.error(f"❌ Error construyendo servicio Calendar: {e}")
             return None
 
+    def add_change_listener(self, listener: Callable):
+        """
+        Registrar callback para cambios locales en el calendario
+        
+        Args:
+            listener: Función llamada como listener(action, event_id)
+        """
+        self._change_listeners.append(listener)
+
+    def _notify_change(self, action: str, event_id: str):
+        """Avisar a los listeners de un cambio en el calendario"""
+        for listener in self._change_listeners:
+            try:
+                listener(action, event_id)
+            except Exception as e:
+                logger.error(f"❌ Error en listener de calendario: {e}")
+
     def create_event(self, event_data: Dict) -> Optional[str]:
         """
         Crear un evento en Google Calendar
@@ -80,6 +133,9 @@ class GoogleCalendarManager:
             logger.error("Calendar service not initialized")
             return None
 
+        # Ya cargado al construir el servicio
+        from googleapiclient.errors import HttpError
+
         try:
             event = {
                 'summary': event_data.get('summary', 'Cita'),
@@ -97,15 +153,25 @@ class GoogleCalendarManager:
             if 'attendees' in event_data:
                 event['attendees'] = event_data['attendees']
             
-            result = self.service.events().insert(
-                calendarId=self.calendar_id,
-                body=event
-            ).execute()
+            # ID propio del cliente: permite reintentos idempotentes
+            if 'id' in event_data:
+                event['id'] = event_data['id']
+            
+            with span("calendar.create_event"):
+                result = self.service.events().insert(
+                    calendarId=self.calendar_id,
+                    body=event
+                ).execute()
             
             logger.info(f"✅ Evento creado: {result['id']}")
+            self._notify_change('create', result['id'])
             return result['id']
         
         except HttpError as e:
+            if e.resp.status == 409 and 'id' in event_data:
+                # El evento ya existe: un intento anterior sí llegó a Google
+                logger.info(f"✅ Evento ya existente: {event_data['id']}")
+                return event_data['id']
             logger.error(f"❌ Error creando evento: {e}")
             return None
         except Exception as e:
@@ -161,12 +227,13 @@ class GoogleCalendarManager:
             return False
 
         try:
-            events_result = self.service.events().list(
-                calendarId=self.calendar_id,
-                timeMin=start_time,
-                timeMax=end_time,
-                singleEvents=True
-            ).execute()
+            with span("calendar.check_availability"):
+                events_result = self.service.events().list(
+                    calendarId=self.calendar_id,
+                    timeMin=start_time,
+                    timeMax=end_time,
+                    singleEvents=True
+                ).execute()
             
             events = events_result.get('items', [])
             available = len(events) == 0
@@ -178,39 +245,94 @@ class GoogleCalendarManager:
             logger.error(f"❌ Error verificando disponibilidad: {e}")
             return False
 
-    def get_available_slots(self, days_ahead: int = 7, slot_duration_minutes: int = 60) -> List[Dict]:
+    def get_busy_intervals(self, time_min: datetime, time_max: datetime) -> Optional[List[tuple]]:
+        """
+        Obtener intervalos ocupados con una sola consulta freebusy
+
+        Args:
+            time_min: Inicio del rango
+            time_max: Fin del rango
+
+        Returns:
+            Lista de tuplas (inicio, fin) ocupadas o None si falla
+        """
+        if not self.service:
+            logger.error("Calendar service not initialized")
+            return None
+
+        try:
+            with span("calendar.freebusy"):
+                result = self.service.freebusy().query(body={
+                    'timeMin': time_min.isoformat(),
+                    'timeMax': time_max.isoformat(),
+                    'timeZone': 'America/Mexico_City',
+                    'items': [{'id': self.calendar_id}]
+                }).execute()
+
+            busy = result.get('calendars', {}).get(self.calendar_id, {}).get('busy', [])
+            return [
+                (
+                    datetime.fromisoformat(b['start'].replace('Z', '+00:00')).astimezone(self.tz),
+                    datetime.fromisoformat(b['end'].replace('Z', '+00:00')).astimezone(self.tz)
+                )
+                for b in busy
+            ]
+
+        except Exception as e:
+            logger.error(f"❌ Error obteniendo intervalos ocupados: {e}")
+            return None
+
+    def build_availability_grid(self, days_ahead: int = 7) -> Optional[AvailabilityGrid]:
+        """
+        Construir rejilla de disponibilidad por minuto
+
+        Args:
+            days_ahead: Número de días a cubrir desde ahora
+
+        Returns:
+            AvailabilityGrid o None si el servicio no está disponible
+        """
+        if not self.service:
+            logger.error("Calendar service not initialized")
+            return None
+
+        now = datetime.now(self.tz)
+        window_end = (now + timedelta(days=days_ahead)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        busy = self.get_busy_intervals(now, window_end)
+        if busy is None:
+            # Sin datos de ocupación no se puede asumir que todo está libre
+            return None
+        return AvailabilityGrid(now, window_end, busy)
+
+    def get_available_slots(
+        self,
+        days_ahead: int = 7,
+        slot_duration_minutes: int = 60,
+        step_minutes: int = 60
+    ) -> List[Dict]:
         """
         Obtener slots disponibles para los próximos días
-        
+
         Args:
             days_ahead: Número de días a buscar
             slot_duration_minutes: Duración de cada slot
-            
+            step_minutes: Separación entre inicios de slot
+
         Returns:
             Lista de slots disponibles
         """
-        available_slots = []
-        now = datetime.now(self.tz)
-
         try:
-            for day in range(days_ahead):
-                current_date = now + timedelta(days=day)
-                
-                # Horario de trabajo: 9 AM a 5 PM
-                for hour in range(9, 17):
-                    slot_start = current_date.replace(hour=hour, minute=0, second=0, microsecond=0)
-                    slot_end = slot_start + timedelta(minutes=slot_duration_minutes)
-                    
-                    if self.check_availability(
-                        slot_start.isoformat(),
-                        slot_end.isoformat()
-                    ):
-                        available_slots.append({
-                            'date': slot_start.strftime('%Y-%m-%d'),
-                            'time': slot_start.strftime('%H:%M'),
-                            'datetime': slot_start.isoformat()
-                        })
-            
+            grid = self.build_availability_grid(days_ahead)
+            if grid is None:
+                return []
+
+            available_slots = [
+                AvailabilityGrid.to_slot(start)
+                for start in grid.all_slots(slot_duration_minutes, step_minutes)
+            ]
+
             logger.info(f"📅 {len(available_slots)} slots disponibles")
             return available_slots
         
@@ -241,6 +363,7 @@ class GoogleCalendarManager:
             ).execute()
             
             logger.info(f"✅ Evento actualizado: {event_id}")
+            self._notify_change('update', event_id)
             return True
         
         except Exception as e:
@@ -268,6 +391,7 @@ class GoogleCalendarManager:
             ).execute()
             
             logger.info(f"✅ Evento eliminado: {event_id}")
+            self._notify_change('delete', event_id)
             return True
         
         except Exception as e:
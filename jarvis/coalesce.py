@@ -0,0 +1,134 @@
+"""
+Módulo de agrupación de mensajes por remitente
+Los SMS que un mismo número manda seguidos ("Hola", "soy Juan", "¿tiene
+cita mañana?") se juntan en una ventana que se reinicia con cada mensaje
+nuevo; el grupo se analiza una sola vez. Una espera máxima acota la latencia.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _Burst:
+    """Mensajes abiertos de un remitente"""
+
+    __slots__ = ("items", "futures", "first_at", "timer", "handler")
+
+    def __init__(self, handler: Callable[[List[Any]], Awaitable[Any]], now: float):
+        self.items: List[Any] = []
+        self.futures: List[asyncio.Future] = []
+        self.first_at = now
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.handler = handler
+
+
+class MessageCoalescer:
+    """
+    Ventana de agrupación por clave (número de teléfono)
+
+    submit() espera a que el grupo se cierre y devuelve el resultado del
+    handler (llamado una vez con todos los mensajes), la posición del
+    mensaje y el tamaño del grupo. El grupo se cierra cuando pasan
+    `window_seconds` sin mensajes nuevos, `max_wait_seconds` desde el
+    primero o al juntar `max_messages`.
+    """
+
+    def __init__(self, window_seconds: float = 3.0, max_wait_seconds: float = 10.0,
+                 max_messages: int = 10):
+        """
+        Args:
+            window_seconds: Silencio que cierra el grupo (0 = sin agrupar)
+            max_wait_seconds: Espera máxima desde el primer mensaje
+            max_messages: Mensajes máximos por grupo
+        """
+        self.window_seconds = window_seconds
+        self.max_wait_seconds = max(max_wait_seconds, window_seconds)
+        self.max_messages = max_messages
+
+        self._open: Dict[str, _Burst] = {}
+        self._tasks: set = set()
+
+        self.bursts = 0
+        self.messages = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_seconds > 0
+
+    async def submit(self, key: str, item: Any,
+                     handler: Callable[[List[Any]], Awaitable[Any]]) -> Tuple[Any, int, int]:
+        """
+        Agregar un mensaje al grupo abierto de `key`
+
+        Returns:
+            (resultado del handler, posición del mensaje, mensajes del grupo)
+        """
+        self.messages += 1
+        if not self.enabled:
+            self.bursts += 1
+            return await handler([item]), 0, 1
+
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+
+        burst = self._open.get(key)
+        if burst is None:
+            burst = _Burst(handler, now)
+            self._open[key] = burst
+
+        future = loop.create_future()
+        burst.items.append(item)
+        burst.futures.append(future)
+        index = len(burst.items) - 1
+
+        if burst.timer is not None:
+            burst.timer.cancel()
+        if len(burst.items) >= self.max_messages:
+            self._close(key, burst)
+        else:
+            # La ventana se reinicia con cada mensaje, sin pasar de la espera máxima
+            delay = min(self.window_seconds, burst.first_at + self.max_wait_seconds - now)
+            burst.timer = loop.call_later(max(0.0, delay), self._close, key, burst)
+
+        result = await future
+        return result, index, len(burst.items)
+
+    def _close(self, key: str, burst: _Burst):
+        """Cerrar el grupo y lanzar su análisis"""
+        if self._open.get(key) is not burst:
+            return
+        del self._open[key]
+        self.bursts += 1
+
+        if len(burst.items) > 1:
+            logger.info(f"🧩 {len(burst.items)} mensajes agrupados: {key}")
+
+        task = asyncio.get_running_loop().create_task(self._run(burst))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, burst: _Burst):
+        try:
+            result = await burst.handler(burst.items)
+        except Exception as e:
+            for future in burst.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future in burst.futures:
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "window_seconds": self.window_seconds,
+            "max_wait_seconds": self.max_wait_seconds,
+            "messages": self.messages,
+            "bursts": self.bursts,
+            "merged": self.messages - self.bursts - sum(len(b.items) for b in self._open.values()),
+            "open": len(self._open)
+        }
@@ -0,0 +1,178 @@
+"""
+Módulo de estado de conversaciones
+Estructura de arreglos (timestamps epoch y versiones en array('q'),
+banderas en un bytearray, teléfonos internados) con índices de activas y
+de cambios: listar cuesta O(activas) y las consultas incrementales
+O(cambios), no O(todas)
+"""
+
+import sys
+import time
+import uuid
+from array import array
+from bisect import bisect_right
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import pytz
+
+TZ_MEXICO = pytz.timezone('America/Mexico_City')
+
+FLAG_ACTIVE = 1
+FLAG_APPOINTMENT = 2
+
+
+class ConversationStore:
+    """
+    Conversaciones de un propietario
+
+    Cada conversación es una fila: _phones[fila], _last_ts[fila],
+    _versions[fila], _flags[fila]. Índices:
+    - _rows: teléfono → fila
+    - _active: filas activas
+    - _log_versions/_log_rows: bitácora de cambios ordenada por versión;
+      "cambios desde v" es una búsqueda binaria más el tramo final. Las
+      entradas viejas de una fila se descartan al compactar.
+
+    Los dict de Python no se encogen al borrar: _active y la bitácora se
+    compactan cuando lo borrado supera a lo vigente.
+    """
+
+    def __init__(self, iso_cache_size: int = 4096):
+        self._rows: Dict[str, int] = {}
+        self._phones: List[str] = []
+        self._last_ts = array('q')
+        self._versions = array('q')
+        self._flags = bytearray()
+
+        self._active: Dict[int, None] = {}
+        self._active_removed = 0
+        self._log_versions = array('q')
+        self._log_rows = array('q')
+        self.version = 0
+        # La versión vuelve a 0 al reiniciar: los tokens de versión llevan
+        # la época del proceso para que un cliente note el reinicio
+        self.epoch = uuid.uuid4().hex[:12]
+
+        # Fechas ISO ya formateadas (epoch → texto)
+        self._iso: Dict[int, str] = {}
+        self._iso_cache_size = iso_cache_size
+
+    def __len__(self) -> int:
+        return len(self._phones)
+
+    def _touch(self, row: int):
+        self.version += 1
+        self._versions[row] = self.version
+        self._log_versions.append(self.version)
+        self._log_rows.append(row)
+        if len(self._log_rows) > 2 * len(self._phones) + 1024:
+            self._compact_log()
+
+    def _compact_log(self):
+        """Dejar en la bitácora sólo el último cambio de cada fila"""
+        versions, rows = array('q'), array('q')
+        for version, row in zip(self._log_versions, self._log_rows):
+            if self._versions[row] == version:
+                versions.append(version)
+                rows.append(row)
+        self._log_versions, self._log_rows = versions, rows
+
+    def mark_active(self, phone_number: str, now: Optional[float] = None):
+        """Marcar conversación como activa (crea la fila si no existe)"""
+        ts = int(now if now is not None else time.time())
+        row = self._rows.get(phone_number)
+        if row is None:
+            row = len(self._phones)
+            phone = sys.intern(phone_number)
+            self._rows[phone] = row
+            self._phones.append(phone)
+            self._last_ts.append(ts)
+            self._versions.append(0)
+            self._flags.append(FLAG_ACTIVE)
+        else:
+            self._last_ts[row] = ts
+            self._flags[row] |= FLAG_ACTIVE
+        self._active[row] = None
+        self._touch(row)
+
+    def mark_inactive(self, phone_number: str) -> bool:
+        """Marcar conversación como inactiva (False si no existe)"""
+        row = self._rows.get(phone_number)
+        if row is None:
+            return False
+        self._flags[row] &= ~FLAG_ACTIVE
+        if self._active.pop(row, 0) is None:
+            self._active_removed += 1
+            if self._active_removed > 4 * len(self._active) + 1024:
+                self._active = dict(self._active)
+                self._active_removed = 0
+        self._touch(row)
+        return True
+
+    def is_active(self, phone_number: str) -> bool:
+        row = self._rows.get(phone_number)
+        return row is not None and row in self._active
+
+    @property
+    def active_count(self) -> int:
+        return len(self._active)
+
+    def _iso_time(self, ts: int) -> str:
+        iso = self._iso.get(ts)
+        if iso is None:
+            if len(self._iso) >= self._iso_cache_size:
+                self._iso.clear()
+            iso = datetime.fromtimestamp(ts, TZ_MEXICO).isoformat()
+            self._iso[ts] = iso
+        return iso
+
+    def to_dict(self, row: int) -> Dict:
+        """Formato de la API (la fecha ISO se arma sólo al responder)"""
+        flags = self._flags[row]
+        return {
+            "phone_number": self._phones[row],
+            "last_message_time": self._iso_time(self._last_ts[row]),
+            "conversation_active": bool(flags & FLAG_ACTIVE),
+            "appointment_scheduled": bool(flags & FLAG_APPOINTMENT),
+            "context": {}
+        }
+
+    def token(self, version: Optional[int] = None) -> str:
+        """Token de versión para clientes: <época>.<versión>"""
+        return f"{self.epoch}.{self.version if version is None else version}"
+
+    def parse_token(self, token: Optional[str]) -> Optional[int]:
+        """
+        Versión de un token de cliente
+
+        Returns:
+            La versión, o None si el token es de otra época (otro proceso,
+            p.ej. antes de un reinicio) o no es válido
+        """
+        epoch, _, version = (token or "").partition(".")
+        if epoch != self.epoch or not version.isdigit():
+            return None
+        return int(version)
+
+    def list_active(self) -> List[Dict]:
+        """Conversaciones activas, O(activas)"""
+        return [self.to_dict(row) for row in self._active]
+
+    def changes(self, since: Optional[int] = None) -> Tuple[List[Dict], List[str]]:
+        """
+        Conversaciones que cambiaron después de la versión `since`
+        (todas si es None), del cambio más viejo al más nuevo
+
+        Returns:
+            (activas, teléfonos que dejaron de estar activos)
+        """
+        start = 0 if since is None else bisect_right(self._log_versions, since)
+        rows = [
+            row for version, row in zip(self._log_versions[start:], self._log_rows[start:])
+            if self._versions[row] == version
+        ]
+
+        active = [self.to_dict(row) for row in rows if self._flags[row] & FLAG_ACTIVE]
+        removed = [self._phones[row] for row in rows if not self._flags[row] & FLAG_ACTIVE]
+        return active, removed
@@ -16,7 +16,7 @@ class ClientDatabase:
     def __init__(self, db_path='clients.json'):
         # En Railway, usar directorio temporal
         if 'RAILWAY' in os.environ:
-            db_path = '/tmp/clients.json'
+            db_path = os.path.join('/tmp', os.path.basename(db_path))
 
         self.db_path = os.path.expanduser(db_path)
         self._ensure_db()
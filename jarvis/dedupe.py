@@ -0,0 +1,183 @@
+"""
+Módulo de deduplicación de mensajes
+Recuerda los message_id (o hashes de contenido) vistos recientemente
+para que los reintentos no vuelvan a pasar por la IA
+"""
+
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Filtro de Bloom simple sobre un bytearray"""
+
+    def __init__(self, capacity: int, error_rate: float = 1e-4):
+        """
+        Args:
+            capacity: Elementos esperados
+            error_rate: Tasa de falsos positivos objetivo
+        """
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        """Posiciones de bit por doble hashing"""
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class RotatingBloomFilter:
+    """
+    Filtro de Bloom con ventana de tiempo
+
+    Mantiene dos generaciones; al rotar se descarta la más antigua, así
+    un elemento se recuerda entre una y dos ventanas.
+    """
+
+    def __init__(self, capacity: int, window_seconds: float, error_rate: float = 1e-4):
+        self.capacity = capacity
+        self.window_seconds = window_seconds
+        self.error_rate = error_rate
+        self.current = BloomFilter(capacity, error_rate)
+        self.previous = BloomFilter(capacity, error_rate)
+        self.rotated_at = time.monotonic()
+
+    def _maybe_rotate(self):
+        if time.monotonic() - self.rotated_at >= self.window_seconds:
+            self.previous = self.current
+            self.current = BloomFilter(self.capacity, self.error_rate)
+            self.rotated_at = time.monotonic()
+
+    def add(self, key: str):
+        self._maybe_rotate()
+        self.current.add(key)
+
+    def __contains__(self, key: str) -> bool:
+        self._maybe_rotate()
+        return key in self.current or key in self.previous
+
+
+class IdempotencyStore:
+    """
+    Almacén de idempotencia de mensajes
+
+    - LRU exacto con el resultado original de los mensajes más recientes
+    - Índice exacto (digest → hora) de los que ya salieron del LRU dentro
+      de la ventana, con el filtro de Bloom rotativo delante: la mayoría
+      de los mensajes nuevos se descartan sin tocar el índice, y un acierto
+      del filtro nunca basta por sí solo para declarar un duplicado
+
+    Sin message_id ni timestamp, la única clave es el contenido: un cliente
+    puede repetir "Sí" a propósito, así que esas claves sólo viven
+    content_window_seconds (reintentos de red) y no pasan por el filtro.
+    """
+
+    def __init__(
+        self,
+        max_results: int = 5000,
+        window_seconds: float = 24 * 3600,
+        bloom_capacity: int = 100000,
+        content_window_seconds: float = 10
+    ):
+        """
+        Inicializar almacén
+
+        Args:
+            max_results: Resultados guardados en el LRU
+            window_seconds: Ventana durante la que se recuerda un mensaje
+            bloom_capacity: Mensajes esperados por ventana (y tope del índice)
+            content_window_seconds: Ventana de las claves sólo de contenido
+        """
+        self.max_results = max_results
+        self.window_seconds = window_seconds
+        self.bloom_capacity = bloom_capacity
+        self.content_window_seconds = content_window_seconds
+        self._results: "OrderedDict[str, tuple]" = OrderedDict()
+        self._seen: "OrderedDict[int, float]" = OrderedDict()
+        self._bloom = RotatingBloomFilter(bloom_capacity, window_seconds)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(phone_number: str, message_text: str,
+                message_id: Optional[str] = None, timestamp: Optional[str] = None) -> str:
+        """
+        Clave de idempotencia: message_id, hash de teléfono + hora + texto,
+        o (sin hora) hash de teléfono + texto de vida corta
+        """
+        if message_id:
+            return f"id:{message_id}"
+        if timestamp:
+            raw = f"{phone_number}|{timestamp}|{message_text}"
+            return "sha256:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+        raw = f"{phone_number}|{message_text}"
+        return "text:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _window(self, key: str) -> float:
+        return self.content_window_seconds if key.startswith("text:") else self.window_seconds
+
+    @staticmethod
+    def _digest(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+    def get(self, key: str) -> Optional[Any]:
+        """Resultado original si el mensaje está en el LRU y dentro de la ventana"""
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is None:
+                return None
+
+            result, stored_at = entry
+            if time.monotonic() - stored_at > self._window(key):
+                del self._results[key]
+                return None
+
+            self._results.move_to_end(key)
+            return result
+
+    def seen(self, key: str) -> bool:
+        """True si el mensaje ya se procesó dentro de su ventana"""
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is not None:
+                return time.monotonic() - entry[1] <= self._window(key)
+            if key.startswith("text:") or key not in self._bloom:
+                return False
+
+            # Posible duplicado: confirmarlo en el índice exacto
+            stored_at = self._seen.get(self._digest(key))
+            return stored_at is not None and time.monotonic() - stored_at <= self.window_seconds
+
+    def put(self, key: str, result: Any):
+        """Registrar el resultado de un mensaje procesado"""
+        now = time.monotonic()
+        with self._lock:
+            self._results[key] = (result, now)
+            self._results.move_to_end(key)
+
+            if not key.startswith("text:"):
+                self._bloom.add(key)
+                digest = self._digest(key)
+                self._seen[digest] = now
+                self._seen.move_to_end(digest)
+                while len(self._seen) > self.bloom_capacity:
+                    self._seen.popitem(last=False)
+
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
@@ -0,0 +1,214 @@
+"""
+Módulo de solicitudes cubiertas (hedging)
+Si una llamada lenta supera el percentil p90 reciente se lanza una copia;
+gana la primera respuesta válida. Un presupuesto limita las copias extra.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Ventana deslizante de latencias con percentiles"""
+
+    def __init__(self, window: int = 500):
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Percentil q (0-1) de la ventana, o None si no hay muestras"""
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class HedgeBudget:
+    """
+    Presupuesto de copias (token bucket)
+
+    Cada solicitud aporta `ratio` tokens y cada copia cuesta uno: a la
+    larga las copias no superan ratio × solicitudes.
+    """
+
+    def __init__(self, ratio: float = 0.05, max_tokens: float = 5.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = 1.0
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+
+class HedgedExecutor:
+    """
+    Ejecuta llamadas bloqueantes con hedging
+
+    - Espera hasta el percentil `quantile` de latencias recientes
+    - Si no hay respuesta y hay presupuesto, lanza una copia idéntica
+    - Devuelve el primer resultado válido; el perdedor se descarta
+      (una petición HTTP en curso no se puede interrumpir desde otro hilo:
+      su hilo queda libre al terminar y su resultado se ignora)
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        quantile: float = 0.9,
+        budget_ratio: float = 0.05,
+        min_samples: int = 20,
+        min_delay: float = 0.5,
+        max_workers: int = 16,
+        is_success: Callable[[Any], bool] = lambda result: result is not None
+    ):
+        """
+        Args:
+            enabled: Sin hedging sólo se miden latencias
+            quantile: Percentil de latencia tras el que se lanza la copia
+            budget_ratio: Fracción máxima de copias extra
+            min_samples: Muestras mínimas antes de empezar a cubrir
+            min_delay: Espera mínima antes de una copia (segundos)
+            max_workers: Hilos para llamadas en curso (incluye perdedores)
+            is_success: Si un resultado cuenta como respuesta válida
+        """
+        self.enabled = enabled
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.is_success = is_success
+
+        self.budget = HedgeBudget(budget_ratio)
+        self.primary_latency = LatencyTracker()
+        self.observed_latency = LatencyTracker()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self._slots = threading.BoundedSemaphore(max_workers)
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def threshold(self) -> Optional[float]:
+        """Espera antes de lanzar una copia, o None si aún no hay datos"""
+        if len(self.primary_latency) < self.min_samples:
+            return None
+        return max(self.min_delay, self.primary_latency.quantile(self.quantile))
+
+    def _submit(self, func: Callable, args: tuple) -> Optional[Future]:
+        """Lanzar un intento en el pool (None si no hay hilos libres)"""
+        if not self._slots.acquire(blocking=False):
+            return None
+
+        # Copiar el contexto: los spans del intento cuelgan de la traza actual
+        context = contextvars.copy_context()
+        start = time.perf_counter()
+
+        def attempt():
+            try:
+                return context.run(func, *args)
+            finally:
+                self._slots.release()
+
+        future = self._executor.submit(attempt)
+        future.started_at = start
+        return future
+
+    def call(self, func: Callable, *args) -> Any:
+        """Ejecutar func(*args) con hedging"""
+        with self._lock:
+            self.requests += 1
+        self.budget.deposit()
+        start = time.perf_counter()
+
+        delay = self.threshold() if self.enabled else None
+        primary = self._submit(func, args) if delay is not None else None
+
+        if primary is None:
+            # Sin hedging (deshabilitado, sin datos o pool lleno): llamada directa
+            result = func(*args)
+            elapsed = time.perf_counter() - start
+            self.primary_latency.record(elapsed)
+            self.observed_latency.record(elapsed)
+            return result
+
+        # La latencia real del primario se mide aunque pierda
+        primary.add_done_callback(
+            lambda f: self.primary_latency.record(time.perf_counter() - f.started_at)
+        )
+
+        done, _ = wait([primary], timeout=delay)
+        pending = {primary}
+        hedge = None
+
+        if not done and self.budget.withdraw():
+            hedge = self._submit(func, args)
+            if hedge is not None:
+                with self._lock:
+                    self.hedges += 1
+                pending.add(hedge)
+                logger.info(f"🔀 Solicitud cubierta tras {delay:.2f} s")
+
+        # Primer resultado válido; si uno falla se espera al otro
+        result = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.warning(f"⚠️ Intento fallido: {e}")
+                    result = None
+                if self.is_success(result):
+                    if future is hedge:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    pending = set()
+                    break
+
+        self.observed_latency.record(time.perf_counter() - start)
+        return result
+
+    def stats(self) -> Dict:
+        """Tasa de copias y percentiles con y sin hedging"""
+        def quantiles(tracker: LatencyTracker) -> Dict:
+            return {
+                f"p{int(q * 100)}": round(value, 3) if value is not None else None
+                for q in (0.5, 0.9, 0.99)
+                for value in [tracker.quantile(q)]
+            }
+
+        threshold = self.threshold()
+        return {
+            "enabled": self.enabled,
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_rate": round(self.hedges / self.requests, 4) if self.requests else 0.0,
+            "hedge_wins": self.hedge_wins,
+            "threshold_seconds": round(threshold, 3) if threshold is not None else None,
+            "primary_latency": quantiles(self.primary_latency),
+            "observed_latency": quantiles(self.observed_latency)
+        }
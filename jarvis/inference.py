@@ -0,0 +1,445 @@
+"""
+Módulo de backends de inferencia
+Hugging Face Inference API, servidores locales compatibles con OpenAI
+(llama.cpp, vLLM) y un stub determinista para pruebas; un enrutador elige
+el backend según la tarea (clasificar, extraer, responder)
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from jarvis.hedging import HedgedExecutor
+from jarvis.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Tareas que usa AIAgent
+TASK_CLASSIFY = "classify"
+TASK_EXTRACT = "extract"
+TASK_RESPOND = "respond"
+TASKS = (TASK_CLASSIFY, TASK_EXTRACT, TASK_RESPOND)
+
+DEFAULT_HF_MODEL = "mistralai/Mistral-7B-Instruct-v0.2"
+
+
+def _hedger_from_env() -> HedgedExecutor:
+    """Hedging de un backend (las latencias se miden siempre)"""
+    return HedgedExecutor(
+        enabled=os.getenv("HF_HEDGING", "false").lower() in ("1", "true", "yes"),
+        quantile=float(os.getenv("HF_HEDGE_QUANTILE", "0.9")),
+        budget_ratio=float(os.getenv("HF_HEDGE_BUDGET", "0.05"))
+    )
+
+
+class InferenceBackend:
+    """
+    Backend de generación de texto
+
+    Las subclases implementan _generate(); generate() pasa por el hedger
+    del backend, que además lleva sus percentiles de latencia.
+    """
+
+    kind = "base"
+
+    # Si el modelo puede descargarse por inactividad y conviene mantenerlo caliente
+    supports_warmup = False
+
+    def __init__(self, name: str, model: str, hedger: Optional[HedgedExecutor] = None):
+        self.name = name
+        self.model = model
+        self.hedger = hedger or HedgedExecutor(enabled=False)
+        self.calls = 0
+        self.failures = 0
+
+        # Estado caliente/frío (None = desconocido)
+        self.cold: Optional[bool] = None
+        self.last_used = 0.0
+        self.cold_hits = 0
+        self.cold_starts = 0
+        self.warmups = 0
+        self.last_warmup_seconds: Optional[float] = None
+
+    def available(self) -> bool:
+        """Si el backend tiene lo necesario para responder (token, URL...)"""
+        return True
+
+    def generate(self, prompt: str, max_tokens: int = 256) -> Optional[str]:
+        """Texto generado, o None si falla"""
+        self.calls += 1
+        result = self.hedger.call(self._generate, prompt, max_tokens)
+        if result is None:
+            self.failures += 1
+        else:
+            self.last_used = time.monotonic()
+            self.cold = False
+        return result
+
+    def _generate(self, prompt: str, max_tokens: int) -> Optional[str]:
+        raise NotImplementedError
+
+    def mark_cold(self):
+        """Una solicitud de usuario encontró el modelo cargándose"""
+        self.cold = True
+        self.cold_hits += 1
+
+    def warm(self) -> Optional[bool]:
+        """
+        Ping de calentamiento, fuera del tráfico de usuarios (sin hedging
+        ni métricas de latencia)
+
+        Returns:
+            True si el modelo estaba frío, False si ya estaba caliente,
+            None si falló
+        """
+        start = time.perf_counter()
+        was_cold = self._warm()
+        self.warmups += 1
+        self.last_warmup_seconds = round(time.perf_counter() - start, 3)
+        if was_cold is not None:
+            self.last_used = time.monotonic()
+            self.cold = False
+            if was_cold:
+                self.cold_starts += 1
+        return was_cold
+
+    def _warm(self) -> Optional[bool]:
+        return False if self._generate("Hola", 1) is not None else None
+
+    def idle_seconds(self) -> Optional[float]:
+        """Segundos desde la última respuesta (None si nunca respondió)"""
+        return time.monotonic() - self.last_used if self.last_used else None
+
+    def stats(self) -> Dict:
+        idle = self.idle_seconds()
+        return {
+            "kind": self.kind,
+            "model": self.model,
+            "available": self.available(),
+            "state": {None: "unknown", True: "cold", False: "warm"}[self.cold],
+            "idle_seconds": round(idle, 1) if idle is not None else None,
+            "calls": self.calls,
+            "failures": self.failures,
+            "cold_hits": self.cold_hits,
+            "warmups": self.warmups,
+            "cold_starts": self.cold_starts,
+            "last_warmup_seconds": self.last_warmup_seconds,
+            "latency": self.hedger.stats()
+        }
+
+
+class HuggingFaceBackend(InferenceBackend):
+    """Hugging Face Inference API (api-inference.huggingface.co)"""
+
+    kind = "hf"
+    supports_warmup = True
+
+    def __init__(self, name: str, model: str, token: str,
+                 hedger: Optional[HedgedExecutor] = None, timeout: float = 30):
+        super().__init__(name, model, hedger)
+        self.token = token
+        self.timeout = timeout
+        self.api_url = f"https://api-inference.huggingface.co/models/{model}"
+
+    def available(self) -> bool:
+        return bool(self.token)
+
+    def _post(self, payload: Dict, timeout: float) -> requests.Response:
+        headers = {
+            "Authorization": f"Bearer {self.token}",
+            "Content-Type": "application/json"
+        }
+        return requests.post(self.api_url, headers=headers, json=payload, timeout=timeout)
+
+    @staticmethod
+    def _is_loading(response: requests.Response) -> bool:
+        """503 "Model ... is currently loading": el modelo está frío"""
+        return response.status_code == 503 and "loading" in response.text.lower()
+
+    def _generate(self, prompt: str, max_tokens: int) -> Optional[str]:
+        try:
+            payload = {
+                "inputs": prompt,
+                "parameters": {
+                    "max_new_tokens": max_tokens,
+                    "temperature": 0.7,
+                    "top_p": 0.95
+                }
+            }
+
+            with span("ai.inference", backend=self.name, model=self.model,
+                      max_tokens=max_tokens) as attrs:
+                response = self._post(payload, self.timeout)
+                attrs["status_code"] = response.status_code
+
+            if response.status_code == 200:
+                result = response.json()
+                if isinstance(result, list) and len(result) > 0:
+                    return result[0].get("generated_text", "").strip()
+            elif self._is_loading(response):
+                self.mark_cold()
+                logger.warning(f"🥶 Modelo frío ({self.model}): la solicitud cae al respaldo")
+            else:
+                logger.error(f"HF API error: {response.status_code} - {response.text}")
+
+        except Exception as e:
+            logger.error(f"Error calling HuggingFace: {e}")
+
+        return None
+
+    def _warm(self) -> Optional[bool]:
+        """Ping de un token; si el modelo está cargando, esperar a que termine"""
+        payload = {
+            "inputs": "Hola",
+            "parameters": {"max_new_tokens": 1},
+            "options": {"use_cache": False}
+        }
+        try:
+            with span("ai.warmup", backend=self.name, model=self.model) as attrs:
+                response = self._post(payload, self.timeout)
+                attrs["status_code"] = response.status_code
+                if response.status_code == 200:
+                    return False
+                if not self._is_loading(response):
+                    logger.warning(f"⚠️ Calentamiento fallido ({self.model}): {response.status_code}")
+                    return None
+
+                estimated = float(response.json().get("estimated_time") or 60)
+                logger.info(f"🔥 Cargando modelo {self.model} (~{estimated:.0f} s)")
+                payload["options"]["wait_for_model"] = True
+                response = self._post(payload, max(120.0, 2 * estimated))
+                attrs["cold"] = True
+                return True if response.status_code == 200 else None
+
+        except Exception as e:
+            logger.error(f"Error calentando {self.model}: {e}")
+            return None
+
+
+class OpenAICompatibleBackend(InferenceBackend):
+    """Servidor compatible con OpenAI (/v1/chat/completions): llama.cpp, vLLM..."""
+
+    kind = "openai"
+    supports_warmup = True
+
+    def __init__(self, name: str, model: str, base_url: str, api_key: str = "",
+                 hedger: Optional[HedgedExecutor] = None, timeout: float = 30):
+        super().__init__(name, model, hedger)
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def available(self) -> bool:
+        return bool(self.base_url)
+
+    def _generate(self, prompt: str, max_tokens: int) -> Optional[str]:
+        try:
+            headers = {"Content-Type": "application/json"}
+            if self.api_key:
+                headers["Authorization"] = f"Bearer {self.api_key}"
+
+            payload = {
+                "model": self.model,
+                "messages": [{"role": "user", "content": prompt}],
+                "max_tokens": max_tokens,
+                "temperature": 0.7,
+                "top_p": 0.95
+            }
+
+            with span("ai.inference", backend=self.name, model=self.model,
+                      max_tokens=max_tokens) as attrs:
+                response = requests.post(
+                    f"{self.base_url}/chat/completions",
+                    headers=headers,
+                    json=payload,
+                    timeout=self.timeout
+                )
+                attrs["status_code"] = response.status_code
+
+            if response.status_code == 200:
+                choices = response.json().get("choices") or []
+                if choices:
+                    return (choices[0].get("message", {}).get("content") or "").strip()
+            else:
+                logger.error(f"Inference API error ({self.name}): {response.status_code} - {response.text}")
+
+        except Exception as e:
+            logger.error(f"Error calling {self.name}: {e}")
+
+        return None
+
+
+class StubBackend(InferenceBackend):
+    """
+    Backend determinista en proceso (pruebas y desarrollo sin red)
+
+    Por defecto reconoce los prompts de AIAgent: devuelve JSON de análisis
+    o de extracción según palabras clave del mensaje, y una respuesta fija
+    en otro caso. `responder` permite sustituir esa lógica.
+    """
+
+    kind = "stub"
+
+    MESSAGE_PATTERN = re.compile(r'Mensaje(?: recibido)?: "(.*?)"\n', re.DOTALL)
+
+    def __init__(self, name: str = "stub", model: str = "stub",
+                 responder: Optional[Callable[[str, int], str]] = None):
+        super().__init__(name, model)
+        self.responder = responder or self._default_response
+
+    def _generate(self, prompt: str, max_tokens: int) -> Optional[str]:
+        with span("ai.inference", backend=self.name, model=self.model, max_tokens=max_tokens):
+            return self.responder(prompt, max_tokens)
+
+    def _default_response(self, prompt: str, max_tokens: int) -> str:
+        match = self.MESSAGE_PATTERN.search(prompt)
+        message = match.group(1) if match else prompt
+        lower = message.lower()
+
+        if '"message_type"' in prompt:
+            if any(word in lower for word in ("promoción", "oferta", "descuento", "gratis")):
+                message_type = "advertisement"
+            elif any(word in lower for word in ("cambiar", "mover", "reprogramar")):
+                message_type = "appointment_change"
+            elif any(word in lower for word in ("cita", "agendar", "reservar")):
+                message_type = "appointment_request"
+            else:
+                message_type = "general_query"
+            return json.dumps({
+                "message_type": message_type,
+                "client_name": None,
+                "proposed_date": None,
+                "proposed_time": None,
+                "confidence": 0.9,
+                "requires_response": message_type != "advertisement",
+                "suggested_response": "Con gusto, ¿qué día te acomoda?"
+            }, ensure_ascii=False)
+
+        if '"duration_minutes"' in prompt:
+            return json.dumps({
+                "client_name": None,
+                "phone": None,
+                "date": None,
+                "time": None,
+                "duration_minutes": 60,
+                "notes": None
+            })
+
+        digest = hashlib.sha1(message.encode("utf-8")).hexdigest()[:8]
+        return f"Gracias por tu mensaje, te respondo en breve. [{digest}]"
+
+
+def parse_backend_specs(value: str) -> Dict[str, str]:
+    """'small=hf:modelo,local=openai:qwen' → {'small': 'hf:modelo', ...}"""
+    specs = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, spec = item.partition("=")
+        if not spec:
+            raise ValueError(f"Backend inválido (se espera nombre=tipo:modelo): {item!r}")
+        specs[name.strip()] = spec.strip()
+    return specs
+
+
+def parse_routes(value: str) -> Dict[str, List[str]]:
+    """'classify=small|large,respond=large' → {'classify': ['small', 'large'], ...}"""
+    routes = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        task, _, chain = item.partition("=")
+        if task.strip() not in TASKS:
+            raise ValueError(f"Tarea desconocida en INFERENCE_ROUTES: {task!r}")
+        routes[task.strip()] = [name.strip() for name in chain.split("|") if name.strip()]
+    return routes
+
+
+def build_backend(name: str, spec: str, hf_token: str = "") -> InferenceBackend:
+    """Crear un backend a partir de 'tipo:modelo' (hf, openai o stub)"""
+    kind, _, model = spec.partition(":")
+    if kind == "hf":
+        return HuggingFaceBackend(name, model or DEFAULT_HF_MODEL, hf_token, _hedger_from_env())
+    if kind == "openai":
+        return OpenAICompatibleBackend(
+            name, model or "default",
+            base_url=os.getenv("OPENAI_BASE_URL", "http://127.0.0.1:8080/v1"),
+            api_key=os.getenv("OPENAI_API_KEY", ""),
+            hedger=_hedger_from_env(),
+            timeout=float(os.getenv("OPENAI_TIMEOUT", "30"))
+        )
+    if kind == "stub":
+        return StubBackend(name, model or "stub")
+    raise ValueError(f"Tipo de backend desconocido: {kind!r}")
+
+
+class InferenceRouter:
+    """
+    Elige backend por tarea
+
+    Cada tarea tiene una cadena de backends: se usa el primero disponible
+    y, si falla, el siguiente. Sin ruta explícita se usa el backend por
+    defecto (el primero declarado).
+    """
+
+    def __init__(self, backends: Dict[str, InferenceBackend],
+                 routes: Optional[Dict[str, List[str]]] = None):
+        if not backends:
+            raise ValueError("Se necesita al menos un backend")
+        self.backends = backends
+        self.default = next(iter(backends))
+        self.routes = routes or {}
+
+        for task, chain in self.routes.items():
+            unknown = [name for name in chain if name not in backends]
+            if unknown:
+                raise ValueError(f"Ruta {task}: backend(s) no declarados {unknown}")
+
+    @classmethod
+    def from_env(cls, hf_token: str = "") -> "InferenceRouter":
+        """
+        Configuración desde el entorno
+
+        - INFERENCE_BACKENDS: nombre=tipo:modelo separados por comas
+          (por defecto hf=hf:mistralai/Mistral-7B-Instruct-v0.2)
+        - INFERENCE_ROUTES: tarea=backend|respaldo separados por comas
+          (tareas: classify, extract, respond)
+        """
+        specs = parse_backend_specs(
+            os.getenv("INFERENCE_BACKENDS", "") or f"hf=hf:{DEFAULT_HF_MODEL}"
+        )
+        backends = {name: build_backend(name, spec, hf_token) for name, spec in specs.items()}
+        return cls(backends, parse_routes(os.getenv("INFERENCE_ROUTES", "")))
+
+    def chain(self, task: str) -> List[InferenceBackend]:
+        """Backends disponibles para una tarea, en orden de preferencia"""
+        names = self.routes.get(task) or [self.default]
+        chain = [self.backends[name] for name in names if self.backends[name].available()]
+        # Un backend frío pasa al final: su respaldo responde mientras carga
+        return sorted(chain, key=lambda backend: backend.cold is True)
+
+    def available(self) -> bool:
+        return any(backend.available() for backend in self.backends.values())
+
+    def generate(self, task: str, prompt: str, max_tokens: int = 256) -> Optional[str]:
+        """Generar con el primer backend de la tarea que responda"""
+        for backend in self.chain(task):
+            result = backend.generate(prompt, max_tokens)
+            if result is not None:
+                return result
+            logger.warning(f"⚠️ Backend {backend.name} sin respuesta para {task}")
+        return None
+
+    def describe(self) -> str:
+        """Resumen para logs: 'classify→small, respond→large'"""
+        return ", ".join(
+            f"{task}→{'|'.join(self.routes.get(task) or [self.default])}" for task in TASKS
+        )
+
+    def stats(self) -> Dict:
+        return {
+            "routes": {task: self.routes.get(task) or [self.default] for task in TASKS},
+            "backends": {name: backend.stats() for name, backend in self.backends.items()}
+        }
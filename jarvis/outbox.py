@@ -0,0 +1,245 @@
+"""
+Módulo de bandeja de salida para Google Calendar
+Registra las citas localmente y las envía a Google en segundo plano
+"""
+
+import os
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Estados de una entrada de la bandeja
+STATUS_PENDING = "pending"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+
+
+class CalendarOutbox:
+    """Bandeja de salida durable (SQLite) de eventos de calendario"""
+
+    def __init__(
+        self,
+        db_path: str = 'jarvis_outbox.db',
+        max_attempts: int = 8,
+        base_backoff_seconds: float = 2.0,
+        max_backoff_seconds: float = 300.0
+    ):
+        """
+        Inicializar bandeja de salida
+
+        Args:
+            db_path: Ruta del archivo SQLite
+            max_attempts: Intentos antes de marcar la entrada como fallida
+            base_backoff_seconds: Espera inicial entre reintentos
+            max_backoff_seconds: Espera máxima entre reintentos
+        """
+        # En Railway, usar directorio temporal
+        if 'RAILWAY' in os.environ:
+            db_path = os.path.join('/tmp', os.path.basename(db_path))
+
+        self.db_path = os.path.expanduser(db_path)
+        self.max_attempts = max_attempts
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._lock = threading.Lock()
+        self._ensure_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abrir conexión a la base de datos"""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _ensure_db(self):
+        """Crear tabla si no existe"""
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS calendar_outbox (
+                    booking_id TEXT PRIMARY KEY,
+                    event TEXT NOT NULL,
+                    phone_number TEXT,
+                    reservation_id TEXT,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    event_id TEXT,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_outbox_due "
+                "ON calendar_outbox (status, next_attempt_at)"
+            )
+
+    def enqueue(
+        self,
+        event: Dict,
+        phone_number: str = "",
+        reservation_id: Optional[str] = None
+    ) -> str:
+        """
+        Registrar un evento para enviarlo a Google Calendar
+
+        El booking_id se usa también como ID del evento en Google,
+        de modo que los reintentos son idempotentes.
+
+        Args:
+            event: Datos del evento (formato de create_event)
+            phone_number: Teléfono del cliente
+            reservation_id: Reserva de horario asociada
+
+        Returns:
+            ID local de la reserva (booking_id)
+        """
+        # uuid4().hex sólo usa [0-9a-f], válido como ID de evento de Google
+        booking_id = uuid.uuid4().hex
+        event = dict(event, id=booking_id)
+        now = time.time()
+
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO calendar_outbox "
+                "(booking_id, event, phone_number, reservation_id, status, "
+                "next_attempt_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (booking_id, json.dumps(event), phone_number, reservation_id,
+                 STATUS_PENDING, now, now, now)
+            )
+
+        logger.info(f"📥 Cita en bandeja de salida: {booking_id}")
+        return booking_id
+
+    def get(self, booking_id: str) -> Optional[Dict]:
+        """Obtener estado de una entrada"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM calendar_outbox WHERE booking_id = ?",
+                (booking_id,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        entry = dict(row)
+        entry["event"] = json.loads(entry["event"])
+        return entry
+
+    def due(self, limit: int = 20) -> List[Dict]:
+        """Entradas pendientes cuyo próximo intento ya venció"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM calendar_outbox "
+                "WHERE status = ? AND next_attempt_at <= ? "
+                "ORDER BY created_at LIMIT ?",
+                (STATUS_PENDING, time.time(), limit)
+            ).fetchall()
+
+        entries = []
+        for row in rows:
+            entry = dict(row)
+            entry["event"] = json.loads(entry["event"])
+            entries.append(entry)
+        return entries
+
+    def pending(self) -> List[Dict]:
+        """Todas las entradas pendientes (aún no llegan a Google), vencidas o no"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM calendar_outbox WHERE status = ? ORDER BY created_at",
+                (STATUS_PENDING,)
+            ).fetchall()
+
+        entries = []
+        for row in rows:
+            entry = dict(row)
+            entry["event"] = json.loads(entry["event"])
+            entries.append(entry)
+        return entries
+
+    def pending_count(self) -> int:
+        """Número de entradas pendientes"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM calendar_outbox WHERE status = ?",
+                (STATUS_PENDING,)
+            ).fetchone()[0]
+
+    def mark_sent(self, booking_id: str, event_id: str, attempts: int):
+        """Marcar entrada como enviada"""
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE calendar_outbox SET status = ?, event_id = ?, attempts = ?, "
+                "last_error = NULL, updated_at = ? WHERE booking_id = ?",
+                (STATUS_SENT, event_id, attempts, time.time(), booking_id)
+            )
+
+    def mark_retry(self, booking_id: str, attempts: int, error: str) -> bool:
+        """
+        Registrar un intento fallido
+
+        Returns:
+            True si la entrada se marcó como fallida definitivamente
+        """
+        failed = attempts >= self.max_attempts
+        backoff = min(self.max_backoff_seconds, self.base_backoff_seconds * (2 ** (attempts - 1)))
+        now = time.time()
+
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "UPDATE calendar_outbox SET status = ?, attempts = ?, "
+                "next_attempt_at = ?, last_error = ?, updated_at = ? "
+                "WHERE booking_id = ?",
+                (STATUS_FAILED if failed else STATUS_PENDING, attempts,
+                 now + backoff, error, now, booking_id)
+            )
+        return failed
+
+    def push_due(
+        self,
+        create_event: Callable[[Dict], Optional[str]],
+        on_failed: Optional[Callable[[Dict], None]] = None
+    ) -> int:
+        """
+        Enviar a Google Calendar las entradas vencidas
+
+        Args:
+            create_event: Función que crea el evento y devuelve su ID
+            on_failed: Callback para entradas que agotaron sus intentos
+
+        Returns:
+            Número de entradas enviadas correctamente
+        """
+        sent = 0
+
+        for entry in self.due():
+            booking_id = entry["booking_id"]
+            attempts = entry["attempts"] + 1
+
+            try:
+                event_id = create_event(entry["event"])
+                error = None if event_id else "create_event returned no id"
+            except Exception as e:
+                event_id = None
+                error = str(e)
+
+            if event_id:
+                self.mark_sent(booking_id, event_id, attempts)
+                sent += 1
+                logger.info(f"📤 Cita enviada a Google Calendar: {booking_id}")
+            elif self.mark_retry(booking_id, attempts, error):
+                logger.error(f"❌ Cita descartada tras {attempts} intentos: {booking_id}")
+                if on_failed:
+                    on_failed(entry)
+            else:
+                logger.warning(f"⚠️ Reintento {attempts} para cita {booking_id}: {error}")
+
+        return sent
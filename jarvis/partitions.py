@@ -0,0 +1,281 @@
+"""
+Módulo de particiones por remitente
+Cada número de teléfono cae siempre en la misma de N particiones (hash
+consistente). Una partición procesa sus trabajos de uno en uno, en orden
+de llegada: los SMS de un remitente nunca se adelantan entre sí, y los de
+remitentes distintos corren en paralelo. Opcionalmente cada partición
+tiene su propio proceso para el análisis, así N remitentes usan N núcleos.
+"""
+
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def jump_hash(key: str, buckets: int) -> int:
+    """
+    Hash consistente de Lamping y Veach: estable entre procesos y
+    reinicios, y al pasar de n a n+1 particiones sólo se mueve 1/(n+1)
+    de las claves (las demás se quedan donde estaban)
+    """
+    k = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+    b, j = -1, 0
+    while j < buckets:
+        b = j
+        k = (k * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * ((1 << 31) / ((k >> 33) + 1)))
+    return b
+
+
+class Partition:
+    """Cola y (opcionalmente) proceso de una partición"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.consumer: Optional[asyncio.Task] = None
+        self.pid: Optional[Future] = None
+        self.retired = False
+
+        self.in_flight = 0
+        self.processed = 0
+        self.failed = 0
+        self.max_depth = 0
+        self.wait_seconds = 0.0
+        self.service_seconds = 0.0
+
+    async def call(self, func: Callable, *args) -> Any:
+        """Ejecutar una función de módulo en el proceso de la partición"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    def stats(self) -> Dict:
+        done = self.processed or 1
+        return {
+            "depth": self.queue.qsize(),
+            "in_flight": self.in_flight,
+            "max_depth": self.max_depth,
+            "processed": self.processed,
+            "failed": self.failed,
+            "avg_wait_ms": round(self.wait_seconds * 1000 / done, 1),
+            "avg_service_ms": round(self.service_seconds * 1000 / done, 1),
+            "pid": self.pid.result() if self.pid is not None and self.pid.done()
+                   and not self.pid.cancelled() and self.pid.exception() is None else None,
+            "retired": self.retired
+        }
+
+
+Job = Callable[[Partition], Awaitable[Any]]
+
+
+class PartitionedPool:
+    """
+    Pool de N particiones con orden por clave (número de teléfono)
+
+    submit(key, job) encola job en la partición de la clave y espera su
+    resultado; job recibe la partición (para usar su proceso con call()).
+
+    Cambiar N (resize) no rompe el orden: una clave con trabajos todavía
+    en cola sigue fija a su partición anterior hasta vaciarlos, y sólo
+    entonces pasa a la nueva. Las particiones que sobran terminan su cola
+    y cierran su proceso.
+
+    Los procesos arrancan con start() (al iniciar la app), no al construir
+    el pool: crear un propietario no lanza procesos.
+    """
+
+    def __init__(self, partitions: int = 4, processes: bool = False,
+                 initializer: Optional[Callable] = None, initargs: Tuple = ()):
+        """
+        Args:
+            partitions: Número de particiones
+            processes: Un proceso por partición (si no, el trabajo va en hilos)
+            initializer: Función que prepara cada proceso (p. ej. crear su agente)
+            initargs: Argumentos del inicializador
+        """
+        self.processes = processes
+        self.initializer = initializer
+        self.initargs = initargs
+
+        self.size = 0
+        self._partitions: List[Partition] = []
+        # Clave → [partición, trabajos pendientes]; fija la clave mientras tenga cola
+        self._pending: Dict[str, List[int]] = {}
+        self.rebalances = 0
+        self.started = False
+
+        self.resize(partitions)
+
+    @property
+    def mode(self) -> str:
+        return "process" if self.processes else "thread"
+
+    def partition_for(self, key: str) -> int:
+        return jump_hash(key, self.size)
+
+    def start(self):
+        """Arrancar los procesos de las particiones activas"""
+        self.started = True
+        for partition in self._partitions[:self.size]:
+            self._start_executor(partition)
+
+    def _start_executor(self, partition: Partition):
+        if not (self.processes and self.started) or partition.executor is not None:
+            return
+        try:
+            partition.executor = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=self.initializer,
+                initargs=self.initargs
+            )
+            # Arrancar el proceso ya, no con el primer mensaje
+            partition.pid = partition.executor.submit(os.getpid)
+        except (OSError, ImportError, NotImplementedError) as e:
+            # Termux/Android sin semáforos POSIX: seguir con hilos
+            logger.warning(f"⚠️ Sin procesos para particiones ({e}) - usando hilos")
+            self.processes = False
+            for p in self._partitions:
+                self._stop_executor(p)
+
+    def _stop_executor(self, partition: Partition):
+        if partition.executor is not None:
+            partition.executor.shutdown(wait=False, cancel_futures=True)
+            partition.executor = None
+            partition.pid = None
+
+    def resize(self, partitions: int):
+        """
+        Cambiar el número de particiones
+
+        Con hash consistente sólo cambian de partición ~|Δn|/max(n) de los
+        números; los que tengan mensajes en cola terminan en la anterior.
+        """
+        partitions = max(1, int(partitions))
+        if partitions == self.size:
+            return
+
+        if self.size:
+            self.rebalances += 1
+            logger.info(f"🔀 Particiones: {self.size} → {partitions}")
+
+        for index in range(partitions):
+            if index < len(self._partitions):
+                self._partitions[index].retired = False
+            else:
+                self._partitions.append(Partition(index))
+            self._start_executor(self._partitions[index])
+
+        for partition in self._partitions[partitions:]:
+            partition.retired = True
+            if partition.queue.empty() and not partition.in_flight:
+                # Sin trabajos ni claves fijas: cerrar ya
+                if partition.consumer is not None:
+                    partition.consumer.cancel()
+                    partition.consumer = None
+                self._stop_executor(partition)
+
+        self.size = partitions
+
+    async def submit(self, key: str, job: Job) -> Any:
+        """
+        Encolar job en la partición de la clave y esperar su resultado
+
+        Se encola antes del primer await: el orden entre trabajos de una
+        misma clave es el orden en que se llama a submit().
+        """
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = [self.partition_for(key), 0]
+        pending[1] += 1
+        partition = self._partitions[pending[0]]
+
+        future = asyncio.get_running_loop().create_future()
+        partition.queue.put_nowait((key, job, future, time.perf_counter()))
+        partition.max_depth = max(partition.max_depth, partition.queue.qsize())
+
+        if partition.consumer is None or partition.consumer.done():
+            self._start_executor(partition)
+            partition.consumer = asyncio.create_task(self._consume(partition))
+
+        # El trabajo corre aunque la solicitud se cancele: el orden ya depende de él
+        return await asyncio.shield(future)
+
+    async def _consume(self, partition: Partition):
+        """Procesar la cola de una partición en orden, uno a la vez"""
+        while True:
+            if partition.queue.empty() and partition.retired:
+                self._stop_executor(partition)
+                return
+            key, job, future, enqueued_at = await partition.queue.get()
+
+            started = time.perf_counter()
+            partition.wait_seconds += started - enqueued_at
+            partition.in_flight = 1
+            try:
+                result = await job(partition)
+                if not future.done():
+                    future.set_result(result)
+            except BrokenProcessPool as e:
+                # El proceso murió: reemplazarlo para los trabajos siguientes
+                logger.error(f"❌ Proceso de la partición {partition.index} caído - reiniciando")
+                partition.failed += 1
+                self._stop_executor(partition)
+                self._start_executor(partition)
+                if not future.done():
+                    future.set_exception(e)
+            except Exception as e:
+                partition.failed += 1
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                partition.in_flight = 0
+                partition.processed += 1
+                partition.service_seconds += time.perf_counter() - started
+                self._release(key)
+
+    def _release(self, key: str):
+        pending = self._pending.get(key)
+        if pending is not None:
+            pending[1] -= 1
+            if pending[1] <= 0:
+                del self._pending[key]
+
+    async def broadcast(self, func: Callable, *args) -> List[Any]:
+        """Ejecutar una función de módulo en el proceso de cada partición activa"""
+        partitions = [p for p in self._partitions[:self.size] if p.executor is not None]
+        return list(await asyncio.gather(*(p.call(func, *args) for p in partitions)))
+
+    def close(self):
+        """Detener procesos (al apagar)"""
+        self.started = False
+        for partition in self._partitions:
+            if partition.consumer is not None:
+                partition.consumer.cancel()
+            self._stop_executor(partition)
+
+    def stats(self) -> Dict:
+        pinned = sum(1 for key, (index, _) in self._pending.items()
+                     if index != self.partition_for(key))
+        return {
+            "partitions": self.size,
+            "mode": self.mode,
+            "cpus": os.cpu_count(),
+            "pending_keys": len(self._pending),
+            "pinned_keys": pinned,
+            "rebalances": self.rebalances,
+            "queues": {
+                str(p.index): p.stats()
+                for p in self._partitions
+                if not p.retired or p.queue.qsize() or p.in_flight
+            }
+        }
@@ -0,0 +1,81 @@
+"""
+Módulo de perfilado por muestreo
+Toma muestras periódicas de las pilas de todos los hilos y las agrega en
+formato "folded" (una línea por pila: frame;frame;frame N), compatible con
+flamegraph.pl y speedscope
+"""
+
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+
+class SamplingProfiler:
+    """Profiler de muestreo basado en sys._current_frames()"""
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        """
+        Args:
+            interval: Segundos entre muestras
+            max_depth: Profundidad máxima de pila registrada
+        """
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _stack(self, frame) -> str:
+        frames = []
+        while frame is not None and len(frames) < self.max_depth:
+            code = frame.f_code
+            frames.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+            frame = frame.f_back
+        return ";".join(reversed(frames))
+
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.is_set():
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                thread_name = names.get(thread_id, str(thread_id))
+                self.samples[f"{thread_name};{self._stack(frame)}"] += 1
+            self.sample_count += 1
+            time.sleep(self.interval)
+
+    def start(self):
+        """Iniciar muestreo en segundo plano"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="sampling-profiler")
+        self._thread.start()
+
+    def stop(self) -> str:
+        """
+        Detener muestreo
+
+        Returns:
+            Perfil en formato folded
+        """
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        return self.folded()
+
+    def folded(self) -> str:
+        """Perfil acumulado en formato folded"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+
+def profile_for(seconds: float, interval: float = 0.005) -> str:
+    """Perfilar el proceso completo durante una ventana de tiempo"""
+    profiler = SamplingProfiler(interval)
+    profiler.start()
+    time.sleep(seconds)
+    return profiler.stop()
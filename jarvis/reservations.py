@@ -0,0 +1,162 @@
+"""
+Módulo de reservas de horario
+Tabla de bloqueos por intervalo para evitar citas duplicadas
+"""
+
+import logging
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Reservation:
+    """Reserva temporal de un intervalo de tiempo"""
+    reservation_id: str
+    start: datetime
+    end: datetime
+    owner: str
+    expires_at: float
+    confirmed: bool = False
+    event_id: Optional[str] = None
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        """Verificar si se solapa con otro intervalo"""
+        return self.start < end and start < self.end
+
+
+class SlotReservationManager:
+    """
+    Gestor de reservas por intervalo
+
+    El candado sólo protege la consulta/alta en la tabla, nunca la llamada
+    a Google Calendar: reservas que no se solapan avanzan en paralelo y las
+    que se solapan se rechazan de inmediato.
+    """
+
+    def __init__(self, pending_ttl_seconds: int = 60):
+        """
+        Inicializar gestor de reservas
+
+        Args:
+            pending_ttl_seconds: Vida máxima de una reserva sin confirmar
+        """
+        self.pending_ttl_seconds = pending_ttl_seconds
+        self._lock = threading.Lock()
+        self._reservations: Dict[str, Reservation] = {}
+
+    def _purge(self, now_monotonic: float):
+        """Eliminar reservas caducadas (llamar con el candado tomado)"""
+        expired = [
+            rid for rid, r in self._reservations.items()
+            if r.expires_at <= now_monotonic
+        ]
+        for rid in expired:
+            r = self._reservations.pop(rid)
+            if not r.confirmed:
+                logger.warning(f"⌛ Reserva expirada sin confirmar: {rid}")
+
+    def reserve(self, start: datetime, end: datetime, owner: str = "") -> Optional[str]:
+        """
+        Reservar un intervalo si no se solapa con otro
+
+        Args:
+            start: Inicio del intervalo
+            end: Fin del intervalo
+            owner: Identificador de quien reserva (p.ej. teléfono)
+
+        Returns:
+            ID de la reserva o None si hay conflicto
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            self._purge(now)
+
+            for r in self._reservations.values():
+                if r.overlaps(start, end):
+                    logger.info(f"🔒 Conflicto de reserva {start.isoformat()} con {r.reservation_id}")
+                    return None
+
+            reservation = Reservation(
+                reservation_id=uuid.uuid4().hex,
+                start=start,
+                end=end,
+                owner=owner,
+                expires_at=now + self.pending_ttl_seconds
+            )
+            self._reservations[reservation.reservation_id] = reservation
+
+        return reservation.reservation_id
+
+    def confirm(self, reservation_id: str, event_id: Optional[str] = None) -> bool:
+        """
+        Confirmar una reserva tras escribir en el calendario
+
+        La reserva confirmada se mantiene hasta el fin de la cita para que
+        cubra el hueco mientras la caché de slots se refresca.
+
+        Args:
+            reservation_id: ID devuelto por reserve()
+            event_id: ID del evento creado
+
+        Returns:
+            True si la reserva seguía vigente
+        """
+        with self._lock:
+            r = self._reservations.get(reservation_id)
+            if r is None:
+                return False
+
+            r.confirmed = True
+            r.event_id = event_id
+            remaining = (r.end - datetime.now(r.end.tzinfo)).total_seconds()
+            r.expires_at = time.monotonic() + max(0.0, remaining)
+            return True
+
+    def restore(self, reservation_id: str, start: datetime, end: datetime,
+                owner: str = "", event_id: Optional[str] = None) -> bool:
+        """
+        Recrear una reserva confirmada (p.ej. citas pendientes de la bandeja
+        de salida al reiniciar, que todavía no están en Google)
+
+        Returns:
+            True si se restauró (False si la cita ya terminó)
+        """
+        remaining = (end - datetime.now(end.tzinfo)).total_seconds()
+        if remaining <= 0:
+            return False
+
+        with self._lock:
+            self._reservations[reservation_id] = Reservation(
+                reservation_id=reservation_id,
+                start=start,
+                end=end,
+                owner=owner,
+                expires_at=time.monotonic() + remaining,
+                confirmed=True,
+                event_id=event_id
+            )
+        return True
+
+    def release(self, reservation_id: str) -> bool:
+        """Liberar una reserva (p.ej. si falló la escritura en el calendario)"""
+        with self._lock:
+            return self._reservations.pop(reservation_id, None) is not None
+
+    def is_reserved(self, start: datetime, end: datetime) -> bool:
+        """Verificar si un intervalo está bloqueado por alguna reserva"""
+        with self._lock:
+            self._purge(time.monotonic())
+            return any(r.overlaps(start, end) for r in self._reservations.values())
+
+    def active_reservations(self) -> List[Reservation]:
+        """Obtener reservas vigentes"""
+        with self._lock:
+            self._purge(time.monotonic())
+            return list(self._reservations.values())
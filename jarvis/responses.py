@@ -3,9 +3,19 @@ Módulo de respuestas predefinidas
 Genera respuestas formales según el contexto
 """
 
+import os
+import re
+import json
+import logging
+import unicodedata
 from datetime import datetime
+from typing import Dict, List, Optional
 import pytz
 
+from jarvis.utils import extract_date_from_message, extract_time_from_message
+
+logger = logging.getLogger(__name__)
+
 class ResponseGenerator:
     """Generador de respuestas"""
 
@@ -53,3 +63,175 @@ class ResponseGenerator:
                 f"¿Deseas continuar la conversación? "
                 f"(Responde 'si' para continuar o 'no' para rechazar)")
 
+
+# Plantillas por defecto ({owner_name} se resuelve al cargar; el resto al responder)
+DEFAULT_TEMPLATES = {
+    "introduction": (
+        "{greeting}, mi nombre es Jarvis, soy el asistente personal del Sr. {owner_name}. "
+        "¿Puedo ayudarlo programando alguna cita o recordándole que se comunique con usted en la brevedad?"
+    ),
+    "appointment_ask_datetime": (
+        "{greeting}. Con gusto le agendo una cita con el Sr. {owner_name}. "
+        "¿Qué día y a qué hora le acomoda?"
+    ),
+    "appointment_ask_time": (
+        "{greeting}. Con gusto le agendo una cita con el Sr. {owner_name} el {date}. "
+        "¿A qué hora le acomoda?"
+    ),
+    "appointment_ask_date": (
+        "{greeting}. Con gusto le agendo una cita con el Sr. {owner_name} a las {time}. "
+        "¿Qué día le acomoda?"
+    ),
+    "appointment_offer_slots": (
+        "{greeting}. Con gusto le agendo una cita con el Sr. {owner_name}. "
+        "Tengo disponible: {slots}. ¿Cuál le acomoda?"
+    ),
+    "appointment_propose": (
+        "Con gusto. ¿Le confirmo su cita con el Sr. {owner_name} el {date} a las {time}?"
+    ),
+    "appointment_change": (
+        "Entendido. ¿Para qué día y a qué hora desea cambiar su cita?"
+    ),
+    "appointment_confirmed": (
+        "✅ Su cita ha sido confirmada para el {date} a las {time}. "
+        "El Sr. {owner_name} le contactará para confirmar los detalles."
+    ),
+    "busy": (
+        "El Sr. {owner_name} se encuentra ocupado en este momento, "
+        "pero se comunicará con usted a la brevedad posible."
+    ),
+    "farewell": (
+        "Con gusto, quedo a sus órdenes. ¡Que tenga un excelente día!"
+    ),
+}
+
+# Mensajes que son sólo un saludo
+GREETING_PATTERN = re.compile(
+    r"^(hola|buen[oa]s?( dias| tardes| noches)?|que tal|saludos)( jarvis)?$"
+)
+
+# Mensajes que sólo cierran la conversación
+FAREWELL_PATTERN = re.compile(
+    r"^(gracias|muchas gracias|ok gracias|perfecto gracias|hasta luego|adios|bye)$"
+)
+
+
+NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    """Minúsculas, sin acentos; puntuación y saltos de línea separan palabras"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return NON_WORD.sub(" ", text).strip()
+
+
+class TemplateResponder:
+    """
+    Respuestas por plantilla para intenciones conocidas
+
+    Si la intención y los datos necesarios se conocen con suficiente
+    confianza, la respuesta se arma con una plantilla; si no, respond()
+    devuelve None y el llamador recurre al LLM.
+    """
+
+    def __init__(
+        self,
+        owner_name: str,
+        templates_path: Optional[str] = None,
+        min_confidence: float = 0.7
+    ):
+        """
+        Cargar y precompilar plantillas del propietario
+
+        Args:
+            owner_name: Nombre del propietario
+            templates_path: JSON con plantillas que reemplazan a las de
+                            DEFAULT_TEMPLATES (RESPONSE_TEMPLATES_FILE)
+            min_confidence: Confianza mínima del análisis para usar plantilla
+        """
+        self.owner_name = owner_name
+        self.min_confidence = min_confidence
+        self.generator = ResponseGenerator()
+
+        templates = dict(DEFAULT_TEMPLATES)
+        templates_path = templates_path or os.getenv("RESPONSE_TEMPLATES_FILE")
+        if templates_path:
+            try:
+                with open(templates_path, encoding="utf-8") as f:
+                    templates.update(json.load(f))
+                logger.info(f"✅ Plantillas cargadas: {templates_path}")
+            except Exception as e:
+                logger.error(f"❌ Error cargando plantillas {templates_path}: {e}")
+
+        # Precompilar: resolver lo fijo del propietario una sola vez
+        self.templates: Dict[str, str] = {
+            name: text.replace("{owner_name}", owner_name)
+            for name, text in templates.items()
+        }
+
+    def render(self, name: str, **fields) -> str:
+        """Rellenar una plantilla"""
+        if "{greeting}" in self.templates[name]:
+            fields.setdefault("greeting", self.generator.greeting())
+        return self.templates[name].format_map(fields)
+
+    def introduction(self) -> str:
+        """Saludo formal completo"""
+        return self.render("introduction")
+
+    def appointment_confirmed(self, date: str, time: str) -> str:
+        """Confirmación de cita"""
+        return self.render("appointment_confirmed", date=date, time=time)
+
+    def respond(self, message_text: str, analysis: Dict,
+                slots: Optional[List[Dict]] = None) -> Optional[str]:
+        """
+        Elegir y rellenar una plantilla para un mensaje analizado
+
+        Args:
+            message_text: Texto original del mensaje
+            analysis: Resultado de AIAgent.analyze_message
+            slots: Horarios libres para ofrecer (opcional)
+
+        Returns:
+            Respuesta o None si hace falta el LLM
+        """
+        text = normalize(message_text)
+
+        # Reglas deterministas: no dependen de la confianza del análisis
+        if GREETING_PATTERN.match(text):
+            return self.introduction()
+        if FAREWELL_PATTERN.match(text):
+            return self.render("farewell")
+
+        message_type = str(analysis.get("message_type", ""))
+        if analysis.get("confidence", 0.0) < self.min_confidence:
+            return None
+
+        if message_type == "advertisement":
+            return None
+
+        if message_type == "appointment_request":
+            # Lo que el análisis no trajo puede venir en el mensaje ("mañana a las 5")
+            date = analysis.get("proposed_date") or extract_date_from_message(message_text)
+            time = analysis.get("proposed_time") or extract_time_from_message(message_text)
+            if date and time:
+                return self.render("appointment_propose", date=date, time=time)
+            if date:
+                same_day = [s for s in slots or [] if s["date"] == date]
+                if same_day:
+                    offered = ", ".join(f"{s['date']} {s['time']}" for s in same_day[:3])
+                    return self.render("appointment_offer_slots", slots=offered)
+                return self.render("appointment_ask_time", date=date)
+            if time:
+                return self.render("appointment_ask_date", time=time)
+            if slots:
+                offered = ", ".join(f"{s['date']} {s['time']}" for s in slots[:3])
+                return self.render("appointment_offer_slots", slots=offered)
+            return self.render("appointment_ask_datetime")
+
+        if message_type == "appointment_change":
+            return self.render("appointment_change")
+
+        return None
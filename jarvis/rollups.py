@@ -0,0 +1,152 @@
+"""
+Módulo de estadísticas
+Contadores por minuto/hora/día en buffers circulares de tamaño fijo:
+cada evento cuesta O(1) y los totales de cada ventana se mantienen al día
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pytz
+
+TZ_MEXICO = pytz.timezone('America/Mexico_City')
+
+# (nombre, segundos por bucket, buckets)
+RESOLUTIONS = (
+    ("minute", 60, 60),
+    ("hour", 3600, 48),
+    ("day", 86400, 30),
+)
+
+
+class RollingSeries:
+    """Serie circular de conteos con total de la ventana"""
+
+    __slots__ = ("bucket_seconds", "size", "counts", "total", "last_slot")
+
+    def __init__(self, bucket_seconds: int, size: int):
+        self.bucket_seconds = bucket_seconds
+        self.size = size
+        self.counts = [0] * size
+        self.total = 0
+        self.last_slot: Optional[int] = None
+
+    def advance(self, slot: int):
+        """Vaciar los buckets que salieron de la ventana hasta slot"""
+        if self.last_slot is None:
+            self.last_slot = slot
+            return
+        if slot <= self.last_slot:
+            return
+
+        if slot - self.last_slot >= self.size:
+            self.counts = [0] * self.size
+            self.total = 0
+        else:
+            for s in range(self.last_slot + 1, slot + 1):
+                idx = s % self.size
+                self.total -= self.counts[idx]
+                self.counts[idx] = 0
+        self.last_slot = slot
+
+    def add(self, slot: int, n: int = 1):
+        self.advance(slot)
+        if slot < self.last_slot - self.size + 1:
+            return  # más viejo que la ventana
+        self.counts[slot % self.size] += n
+        self.total += n
+
+    def ordered(self) -> List[int]:
+        """Conteos del bucket más antiguo al actual"""
+        start = (self.last_slot + 1) % self.size
+        return self.counts[start:] + self.counts[:start]
+
+
+class StatsRollup:
+    """
+    Estadísticas de un propietario
+
+    Métricas con nombre libre ("messages.appointment_request",
+    "analysis.llm", "bookings.queued"...); cada una tiene una serie por
+    resolución (60 minutos, 48 horas, 30 días).
+    """
+
+    def __init__(self, max_metrics: int = 64):
+        """
+        Args:
+            max_metrics: Métricas distintas máximas (memoria acotada)
+        """
+        self.max_metrics = max_metrics
+        self._metrics: Dict[str, Dict[str, RollingSeries]] = {}
+        self._lock = threading.Lock()
+
+        # Los buckets de hora/día se alinean a la hora local
+        offset = datetime.now(TZ_MEXICO).utcoffset()
+        self._offset = int(offset.total_seconds()) if offset else 0
+
+    def _slots(self, now: float) -> Dict[str, int]:
+        local = int(now) + self._offset
+        return {name: local // seconds for name, seconds, _ in RESOLUTIONS}
+
+    def record(self, metric: str, n: int = 1, now: Optional[float] = None):
+        """Registrar n eventos de una métrica"""
+        slots = self._slots(now or time.time())
+
+        with self._lock:
+            series = self._metrics.get(metric)
+            if series is None:
+                if len(self._metrics) >= self.max_metrics:
+                    return
+                series = {name: RollingSeries(seconds, size) for name, seconds, size in RESOLUTIONS}
+                self._metrics[metric] = series
+
+            for name, slot in slots.items():
+                series[name].add(slot, n)
+
+    def total(self, metric: str, resolution: str = "day") -> int:
+        """Total de una métrica en la ventana de una resolución"""
+        slots = self._slots(time.time())
+        with self._lock:
+            series = self._metrics.get(metric)
+            if series is None:
+                return 0
+            series[resolution].advance(slots[resolution])
+            return series[resolution].total
+
+    def snapshot(self) -> Dict:
+        """Series y totales de todas las métricas, por resolución"""
+        now = time.time()
+        slots = self._slots(now)
+        result = {}
+
+        with self._lock:
+            for name, seconds, size in RESOLUTIONS:
+                series_by_metric = {}
+                totals = {}
+                for metric, series in self._metrics.items():
+                    s = series[name]
+                    s.advance(slots[name])
+                    series_by_metric[metric] = s.ordered()
+                    totals[metric] = s.total
+
+                # Inicio del bucket más antiguo (hora local)
+                start = (slots[name] - size + 1) * seconds - self._offset
+                result[name] = {
+                    "bucket_seconds": seconds,
+                    "buckets": size,
+                    "start": datetime.fromtimestamp(start, TZ_MEXICO).isoformat(),
+                    "series": series_by_metric,
+                    "totals": totals
+                }
+
+        day = result["day"]["totals"]
+        llm = day.get("analysis.llm", 0)
+        fallback = day.get("analysis.fallback", 0)
+
+        return {
+            "generated_at": datetime.fromtimestamp(now, TZ_MEXICO).isoformat(),
+            "llm_rate": round(llm / (llm + fallback), 4) if llm + fallback else None,
+            "resolutions": result
+        }
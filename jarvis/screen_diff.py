@@ -0,0 +1,153 @@
+"""
+Módulo de diferencias de pantalla
+Extrae sólo los mensajes nuevos de los volcados de texto que envía
+el servicio de accesibilidad
+"""
+
+import difflib
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Líneas que sólo contienen hora/fecha (p.ej. "10:01", "3:15 p. m.")
+TIMESTAMP_LINE = re.compile(r'^[\d:/.\s]+([ap]\.?\s?m\.?)?$', re.IGNORECASE)
+
+
+class _Conversation:
+    """Volcado de referencia y mensajes salientes recientes de una conversación"""
+
+    __slots__ = ("digest", "lines", "outgoing")
+
+    def __init__(self):
+        self.digest: Optional[bytes] = None
+        self.lines: List[str] = []
+        self.outgoing: "OrderedDict[str, None]" = OrderedDict()
+
+
+class ScreenDiffTracker:
+    """
+    Último volcado de pantalla por conversación y diff por líneas
+
+    El diff es por posición: sólo cuenta lo que aparece debajo de lo que
+    ya estaba en pantalla, así un mensaje repetido ("Sí") se detecta y el
+    historial que aparece arriba al hacer scroll no. Un volcado que sólo
+    subió (scroll hacia arriba) no reemplaza a la referencia, para no
+    volver a analizar lo de abajo al regresar.
+
+    Las líneas salientes (respuestas de Jarvis registradas con
+    record_outgoing, o marcadas por el cliente) no se analizan.
+    """
+
+    def __init__(self, max_conversations: int = 1000, initial_lines: int = 1,
+                 outgoing_lines: int = 50):
+        """
+        Inicializar tracker
+
+        Args:
+            max_conversations: Conversaciones recordadas (LRU)
+            initial_lines: Líneas finales a considerar nuevas la primera vez
+                           que se ve una conversación (el resto es historial)
+            outgoing_lines: Mensajes salientes recordados por conversación
+        """
+        self.max_conversations = max_conversations
+        self.initial_lines = initial_lines
+        self.outgoing_lines = outgoing_lines
+        self._conversations: "OrderedDict[str, _Conversation]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _hash(content: str) -> bytes:
+        return hashlib.blake2b(content.encode("utf-8"), digest_size=16).digest()
+
+    @staticmethod
+    def _lines(content: str) -> List[str]:
+        """Líneas con texto, sin espacios sobrantes ni marcas de hora"""
+        lines = (line.strip() for line in content.splitlines())
+        return [line for line in lines if line and not TIMESTAMP_LINE.match(line)]
+
+    def _conversation(self, conversation_id: str) -> _Conversation:
+        conversation = self._conversations.get(conversation_id)
+        if conversation is None:
+            conversation = self._conversations[conversation_id] = _Conversation()
+        self._conversations.move_to_end(conversation_id)
+        while len(self._conversations) > self.max_conversations:
+            self._conversations.popitem(last=False)
+        return conversation
+
+    def record_outgoing(self, conversation_id: str, text: str):
+        """Registrar un mensaje enviado a la conversación (no es del cliente)"""
+        with self._lock:
+            outgoing = self._conversation(conversation_id).outgoing
+            for line in self._lines(text):
+                outgoing[line] = None
+                outgoing.move_to_end(line)
+            while len(outgoing) > self.outgoing_lines:
+                outgoing.popitem(last=False)
+
+    def ingest(self, conversation_id: str, content: str,
+               outgoing: Iterable[str] = ()) -> Optional[List[str]]:
+        """
+        Registrar un volcado de pantalla
+
+        Args:
+            conversation_id: Identificador de la conversación (teléfono o título)
+            content: Texto completo de la pantalla
+            outgoing: Líneas que el cliente sabe que son salientes
+
+        Returns:
+            Líneas nuevas entrantes respecto al volcado anterior, o None si
+            el volcado es idéntico al anterior
+        """
+        digest = self._hash(content)
+
+        with self._lock:
+            conversation = self._conversation(conversation_id)
+            if conversation.digest == digest:
+                return None
+
+            lines = self._lines(content)
+            skip = set(conversation.outgoing)
+            skip.update(line.strip() for line in outgoing)
+
+            if conversation.digest is None:
+                candidates = lines[-self.initial_lines:] if self.initial_lines else []
+                scrolled_up = False
+            else:
+                candidates, scrolled_up = self._below(conversation.lines, lines)
+
+            if not scrolled_up:
+                conversation.digest = digest
+                conversation.lines = lines
+
+        return [line for line in candidates if line not in skip]
+
+    def _below(self, previous: List[str], lines: List[str]):
+        """
+        Líneas insertadas debajo del primer tramo ya visto
+
+        Returns:
+            (líneas nuevas, True si el volcado sólo subió en el historial)
+        """
+        matcher = difflib.SequenceMatcher(None, previous, lines, autojunk=False)
+        opcodes = matcher.get_opcodes()
+
+        first_equal = next((k for k, op in enumerate(opcodes) if op[0] == "equal"), None)
+        if first_equal is None:
+            # Nada en común: pantalla nueva, sólo las últimas líneas
+            return (lines[-self.initial_lines:] if self.initial_lines else []), False
+
+        new_lines = [
+            line
+            for tag, _, _, j1, j2 in opcodes[first_equal + 1:]
+            if tag in ("insert", "replace")
+            for line in lines[j1:j2]
+        ]
+        # Sin nada nuevo abajo y con líneas de abajo que desaparecieron: scroll hacia arriba
+        dropped_below = any(tag in ("delete", "replace") for tag, *_ in opcodes[first_equal + 1:])
+        scrolled_up = not new_lines and (dropped_below or opcodes[-1][0] == "delete")
+        return new_lines, scrolled_up
@@ -0,0 +1,213 @@
+"""
+Módulo de caché semántica
+Reutiliza análisis de mensajes casi idénticos ("quiero una cita mañana" /
+"quisiera cita para mañana") usando vectores de n-gramas con hashing
+y similitud coseno en NumPy, sin llamadas de red
+"""
+
+import copy
+import logging
+import re
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from jarvis.responses import normalize
+
+logger = logging.getLogger(__name__)
+
+
+# Palabras sin contenido para la intención
+STOPWORDS = {
+    "el", "la", "los", "las", "un", "una", "unos", "unas", "de", "del", "para",
+    "por", "a", "al", "en", "y", "o", "que", "me", "mi", "se", "es", "lo", "con",
+    "favor", "porfa", "porfavor"
+}
+
+# Variantes que expresan lo mismo
+CANONICAL = {
+    "quiero": "querer", "quisiera": "querer", "queria": "querer",
+    "necesito": "querer", "necesitaria": "querer", "deseo": "querer",
+    "desearia": "querer", "ocupo": "querer", "gustaria": "querer",
+    "podria": "querer", "puedo": "querer",
+    "citas": "cita", "consulta": "cita", "turno": "cita", "agendar": "cita",
+    "apartar": "cita", "reservar": "cita",
+    "cancela": "cancelar", "anular": "cancelar",
+    "mover": "cambiar", "reagendar": "cambiar", "recorrer": "cambiar",
+    "urgencia": "urgente", "emergencia": "urgente"
+}
+
+# Fecha y hora se extraen aparte: no deben influir en la similitud
+DATE_TIME_WORDS = re.compile(
+    r'\b(hoy|manana|pasado|lunes|martes|miercoles|jueves|viernes|sabado|domingo|'
+    r'enero|febrero|marzo|abril|mayo|junio|julio|agosto|septiembre|octubre|'
+    r'noviembre|diciembre|\d+(:\d+)?|am|pm|tarde|noche|media|cuarto)\b'
+)
+
+# Palabras que cambian la intención: deben coincidir exactamente
+GUARD_WORDS = {"no", "nunca", "cancelar", "cambiar", "urgente"}
+
+
+def tokens(text: str) -> List[str]:
+    """Palabras normalizadas, sin fecha/hora ni palabras vacías"""
+    text = DATE_TIME_WORDS.sub(" ", normalize(text))
+    return [CANONICAL.get(w, w) for w in text.split() if w not in STOPWORDS]
+
+
+def signature(words: List[str]) -> int:
+    """Huella de las palabras que cambian la intención"""
+    guards = sorted(GUARD_WORDS.intersection(words))
+    return zlib.crc32(" ".join(guards).encode("utf-8"))
+
+
+def embed(text: str, dim: int = 2048) -> Tuple[np.ndarray, int]:
+    """
+    Vector normalizado de n-gramas de caracteres (3-grams) y palabras
+
+    Args:
+        text: Texto del mensaje
+        dim: Dimensión del vector (buckets de hashing)
+
+    Returns:
+        (vector float32 de norma 1 o ceros si no hay palabras, firma de intención)
+    """
+    words = tokens(text)
+    vector = np.zeros(dim, dtype=np.float32)
+
+    for word in words:
+        padded = f" {word} "
+        features = [padded[i:i + 3] for i in range(len(padded) - 2)]
+        features.append(f"w:{word}")
+        for feature in features:
+            h = zlib.crc32(feature.encode("utf-8"))
+            # Bit alto como signo: reduce el sesgo de las colisiones
+            vector[h % dim] += 1.0 if h & 0x80000000 else -1.0
+
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm else vector), signature(words)
+
+
+class SemanticCache:
+    """Caché de resultados por similitud coseno con desalojo LRU"""
+
+    def __init__(self, capacity: int = 2000, threshold: float = 0.85, dim: int = 2048):
+        """
+        Inicializar caché
+
+        Args:
+            capacity: Entradas máximas (filas de la matriz)
+            threshold: Similitud mínima para reutilizar un resultado
+            dim: Dimensión de los vectores
+        """
+        self.capacity = capacity
+        self.threshold = threshold
+        self.dim = dim
+
+        self._matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self._last_used = np.full(capacity, -1, dtype=np.int64)  # -1 = libre
+        self._signatures = np.zeros(capacity, dtype=np.int64)
+        self._values: List[Optional[Dict]] = [None] * capacity
+        self._tick = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return int((self._last_used >= 0).sum())
+
+    def lookup_batch(self, texts: List[str]) -> List[Optional[Dict]]:
+        """
+        Buscar varios mensajes con una sola multiplicación de matrices
+
+        Returns:
+            Por cada texto, copia del resultado cacheado o None
+        """
+        if not texts:
+            return []
+
+        embedded = [embed(t, self.dim) for t in texts]
+        queries = np.stack([vector for vector, _ in embedded])
+        signatures = np.array([sig for _, sig in embedded], dtype=np.int64)
+
+        with self._lock:
+            similarity = queries @ self._matrix.T
+            similarity[:, self._last_used < 0] = -1.0
+            similarity[signatures[:, None] != self._signatures[None, :]] = -1.0
+            best = similarity.argmax(axis=1)
+
+            results = []
+            for row, idx in enumerate(best):
+                if similarity[row, idx] >= self.threshold:
+                    self._tick += 1
+                    self._last_used[idx] = self._tick
+                    self.hits += 1
+                    results.append(copy.deepcopy(self._values[idx]))
+                else:
+                    self.misses += 1
+                    results.append(None)
+
+        return results
+
+    def lookup(self, text: str) -> Optional[Dict]:
+        """Buscar un mensaje; copia del resultado o None"""
+        return self.lookup_batch([text])[0]
+
+    def put(self, text: str, value: Dict):
+        """Guardar un resultado (desaloja el menos usado si está llena)"""
+        vector, sig = embed(text, self.dim)
+        if not vector.any():
+            return
+
+        with self._lock:
+            # Casi idéntico a una entrada existente: sobrescribirla
+            similarity = self._matrix @ vector
+            similarity[self._last_used < 0] = -1.0
+            similarity[self._signatures != sig] = -1.0
+            idx = int(similarity.argmax())
+            if similarity[idx] < 0.99:
+                idx = int(self._last_used.argmin())
+
+            self._tick += 1
+            self._matrix[idx] = vector
+            self._signatures[idx] = sig
+            self._values[idx] = copy.deepcopy(value)
+            self._last_used[idx] = self._tick
+
+    def discard(self, text: str) -> int:
+        """
+        Olvidar las entradas similares a un mensaje
+
+        Returns:
+            Número de entradas eliminadas
+        """
+        vector, sig = embed(text, self.dim)
+        if not vector.any():
+            return 0
+
+        with self._lock:
+            similarity = self._matrix @ vector
+            matched = (similarity >= self.threshold) & (self._last_used >= 0) & (self._signatures == sig)
+            for idx in np.flatnonzero(matched):
+                self._values[idx] = None
+            self._last_used[matched] = -1
+            self._matrix[matched] = 0.0
+            return int(matched.sum())
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict:
+        """Estadísticas de uso"""
+        return {
+            "entries": len(self),
+            "capacity": self.capacity,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4)
+        }
@@ -0,0 +1,89 @@
+"""
+Módulo de serialización de respuestas
+JSON rápido (orjson si está instalado, json de la biblioteca estándar si
+no) y caché de respuestas ya codificadas por versión del estado: un
+sondeo sin cambios cuesta una comparación de versión y una copia de bytes
+"""
+
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from fastapi import Response
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # opcional: en Termux puede no haber wheel
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """Tipos que el codificador no conoce (modelos Pydantic, escalares numpy)"""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if hasattr(obj, "item"):
+        return obj.item()
+    raise TypeError(f"Tipo no serializable: {type(obj).__name__}")
+
+
+def dumps(obj: Any) -> bytes:
+    """Codificar a JSON (UTF-8, sin espacios)"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, default=_default, ensure_ascii=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+class JSONBytesResponse(Response):
+    """Respuesta JSON con el cuerpo ya codificado"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return content if isinstance(content, bytes) else dumps(content)
+
+
+class ResponseCache:
+    """
+    Respuestas codificadas por clave y versión
+
+    get() devuelve los bytes guardados si la versión coincide; si no,
+    construye el contenido, lo codifica y lo guarda.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[Hashable, bytes]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, version: Hashable, build: Callable[[], Any]) -> bytes:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        body = dumps(build())
+        if entry is None and len(self._entries) >= self.max_entries:
+            self._entries.clear()
+        self._entries[key] = (version, body)
+        return body
+
+    @staticmethod
+    def ttl_version(seconds: float) -> int:
+        """Versión que cambia cada `seconds` (para estado sin contador de versión)"""
+        if seconds <= 0:
+            return time.monotonic_ns()
+        return int(time.monotonic() / seconds)
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "encoder": "orjson" if orjson is not None else "json",
+            "entries": len(self._entries),
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
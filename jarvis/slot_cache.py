@@ -0,0 +1,236 @@
+"""
+Módulo de caché de slots disponibles
+Mantiene precalculados los horarios libres de los próximos días
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from jarvis.availability import AvailabilityGrid
+
+logger = logging.getLogger(__name__)
+
+# Duraciones más comunes de cita (minutos)
+DEFAULT_DURATIONS = (30, 60, 90)
+
+
+class SlotCache:
+    """Caché de slots libres refrescada en segundo plano"""
+
+    def __init__(
+        self,
+        calendar_manager,
+        days_ahead: int = 7,
+        durations: Tuple[int, ...] = DEFAULT_DURATIONS,
+        step_minutes: int = 30,
+        max_age_seconds: int = 300
+    ):
+        """
+        Inicializar caché de slots
+
+        Args:
+            calendar_manager: GoogleCalendarManager del que leer ocupación
+            days_ahead: Días cubiertos por la caché
+            durations: Duraciones precalculadas
+            step_minutes: Separación entre inicios de slot
+            max_age_seconds: Antigüedad máxima antes de refrescar
+        """
+        self.calendar_manager = calendar_manager
+        self.days_ahead = days_ahead
+        self.durations = tuple(durations)
+        self.step_minutes = step_minutes
+        self.max_age_seconds = max_age_seconds
+
+        self._lock = threading.Lock()
+        self._grid: Optional[AvailabilityGrid] = None
+        self._slots: Dict[int, List[Dict]] = {}
+        self._built_at = 0.0
+        self._version = 0
+        self.refresh_needed = threading.Event()
+
+        calendar_manager.add_change_listener(self.invalidate)
+
+    @property
+    def is_fresh(self) -> bool:
+        """True si hay datos vigentes en caché"""
+        return (
+            self._grid is not None
+            and time.monotonic() - self._built_at < self.max_age_seconds
+        )
+
+    def invalidate(self, *args):
+        """
+        Cambio local en el calendario: pedir un refresco en segundo plano
+
+        Se sigue sirviendo la rejilla actual hasta que el refresco termine;
+        las citas propias ya se marcaron con mark_busy() al agendarlas.
+        """
+        with self._lock:
+            self._version += 1
+        self.refresh_needed.set()
+        logger.info("🗑️ Caché de slots marcada para refresco")
+
+    def mark_busy(self, start: datetime, end: datetime):
+        """
+        Marcar una cita recién agendada como ocupada en la rejilla actual
+        (copia nueva: las lecturas en curso no ven cambios a medias)
+        """
+        with self._lock:
+            self._version += 1
+            if self._grid is not None:
+                grid = self._grid.copy()
+                grid.mark_busy(start, end)
+                self._grid = grid
+                self._slots = self._precompute(grid)
+        self.refresh_needed.set()
+
+    def _precompute(self, grid: AvailabilityGrid) -> Dict[int, List[Dict]]:
+        """Slots de las duraciones más comunes"""
+        return {
+            duration: [
+                AvailabilityGrid.to_slot(dt)
+                for dt in grid.all_slots(duration, self.step_minutes)
+            ]
+            for duration in self.durations
+        }
+
+    def refresh(self) -> bool:
+        """
+        Reconstruir la rejilla y los slots precalculados
+
+        Returns:
+            True si la caché quedó actualizada
+        """
+        with self._lock:
+            version = self._version
+        self.refresh_needed.clear()
+
+        start = time.perf_counter()
+        grid = self.calendar_manager.build_availability_grid(self.days_ahead)
+        if grid is None:
+            return False
+
+        slots = self._precompute(grid)
+
+        with self._lock:
+            # Un cambio llegó mientras se consultaba Google: no publicar datos viejos
+            # (se sigue sirviendo la rejilla anterior y refresh_needed sigue activo)
+            if version != self._version:
+                return False
+            self._grid = grid
+            self._slots = slots
+            self._built_at = time.monotonic()
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"📅 Caché de slots actualizada en {elapsed_ms:.0f} ms")
+        return True
+
+    def get_slots(
+        self,
+        duration_minutes: int = 60,
+        days_ahead: Optional[int] = None,
+        limit: Optional[int] = None,
+        step_minutes: Optional[int] = None,
+        exclude: Optional[Callable[[datetime, datetime], bool]] = None
+    ) -> Optional[List[Dict]]:
+        """
+        Obtener slots desde la caché
+
+        Los slots que ya empezaron no se ofrecen aunque la rejilla todavía
+        no se haya refrescado.
+
+        Args:
+            duration_minutes: Duración de la cita
+            days_ahead: Recortar a los próximos N días
+            limit: Máximo número de slots
+            step_minutes: Separación entre inicios (por defecto la de la caché)
+            exclude: Función (inicio, fin) -> True si el bloque está apartado
+                     (p.ej. SlotReservationManager.is_reserved)
+
+        Returns:
+            Lista de slots o None si la caché no está lista
+        """
+        step = step_minutes or self.step_minutes
+
+        with self._lock:
+            grid = self._grid
+            precomputed = self._slots.get(duration_minutes)
+
+        if grid is None:
+            return None
+
+        if precomputed is not None and step == self.step_minutes:
+            slots = precomputed
+        else:
+            # Duración no precalculada: escaneo vectorizado sobre la rejilla
+            slots = [
+                AvailabilityGrid.to_slot(dt)
+                for dt in grid.all_slots(duration_minutes, step)
+            ]
+
+        if days_ahead is not None and days_ahead < self.days_ahead:
+            cutoff = (grid.start + timedelta(days=days_ahead)).strftime('%Y-%m-%d')
+            slots = [s for s in slots if s['date'] < cutoff]
+
+        now = datetime.now(grid.start.tzinfo)
+        duration = timedelta(minutes=duration_minutes)
+        offered = []
+        for slot in slots:
+            start = datetime.fromisoformat(slot['datetime'])
+            if start < now or (exclude and exclude(start, start + duration)):
+                continue
+            offered.append(slot)
+            if limit is not None and len(offered) >= limit:
+                break
+
+        return offered
+
+    def is_free(self, start: datetime, duration_minutes: int) -> Optional[bool]:
+        """
+        Verificar un bloque contra la rejilla en caché
+
+        Returns:
+            True/False, o None si la caché no está lista o el bloque queda
+            fuera de la rejilla (otro día u horario): hay que preguntar al calendario
+        """
+        with self._lock:
+            grid = self._grid
+
+        if grid is None:
+            return None
+        return grid.is_free(start, duration_minutes)
+
+    def nearest_slot(
+        self,
+        proposed: datetime,
+        duration_minutes: int = 60,
+        exclude: Optional[Callable[[datetime, datetime], bool]] = None,
+        candidates: int = 20
+    ) -> Optional[Dict]:
+        """
+        Slot libre más cercano a una hora propuesta
+
+        Args:
+            proposed: Hora propuesta por el cliente
+            duration_minutes: Duración de la cita
+            exclude: Función (inicio, fin) -> True para descartar un candidato
+            candidates: Número de candidatos cercanos a evaluar
+
+        Returns:
+            Slot o None si no hay disponibilidad
+        """
+        with self._lock:
+            grid = self._grid
+
+        if grid is None:
+            return None
+
+        for dt in grid.nearest_slots(proposed, duration_minutes, self.step_minutes, candidates):
+            if exclude and exclude(dt, dt + timedelta(minutes=duration_minutes)):
+                continue
+            return AvailabilityGrid.to_slot(dt)
+
+        return None
@@ -0,0 +1,269 @@
+"""
+Módulo de propietarios (multi-tenant)
+Cada propietario tiene su propia configuración, IA, calendario, base de
+datos y estado de conversaciones; un solo proceso atiende a varios
+"""
+
+import os
+import json
+import re
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from jarvis.ai import AIAgent, analyze_in_worker, init_worker_agent
+from jarvis.calendar import GoogleCalendarManager
+from jarvis.database import ClientDatabase
+from jarvis.responses import TemplateResponder
+from jarvis.slot_cache import SlotCache
+from jarvis.reservations import SlotReservationManager
+from jarvis.outbox import CalendarOutbox
+from jarvis.dedupe import IdempotencyStore
+from jarvis.screen_diff import ScreenDiffTracker
+from jarvis.coalesce import MessageCoalescer
+from jarvis.partitions import Partition, PartitionedPool
+from jarvis.transcripts import TranscriptStore
+from jarvis.conversations import ConversationStore
+from jarvis.rollups import StatsRollup
+from jarvis.serialization import ResponseCache
+from jarvis.tracing import span
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TENANT = "default"
+
+# El id se usa en nombres de archivo
+TENANT_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+@dataclass
+class TenantSettings:
+    """Datos de alta de un propietario"""
+    tenant_id: str
+    owner_name: str
+    owner_phone: str
+    hf_token: str = ""
+    calendar_credentials: Optional[Dict] = None
+    calendar_id: str = "primary"
+    api_key: str = ""
+    max_concurrency: int = 4
+    passive_interval_minutes: int = 5
+
+    def data_file(self, filename: str) -> str:
+        """
+        Archivo de datos propio del propietario
+
+        El propietario por defecto conserva los nombres de siempre
+        (jarvis_clients.db); los demás llevan su id (jarvis_clients_<id>.db).
+        """
+        if self.tenant_id == DEFAULT_TENANT:
+            return filename
+        base, ext = os.path.splitext(filename)
+        return f"{base}_{self.tenant_id}{ext}"
+
+
+def _parse_credentials(value) -> Optional[Dict]:
+    if not value:
+        return None
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def load_tenant_settings() -> List[TenantSettings]:
+    """
+    Cargar propietarios
+
+    - TENANTS_FILE: lista JSON de propietarios
+      [{"tenant_id": "...", "owner_name": "...", "owner_phone": "...",
+        "hf_token": "...", "google_calendar_credentials": {...},
+        "calendar_id": "...", "api_key": "...", "max_concurrency": 4}]
+    - Sin TENANTS_FILE: un único propietario "default" con las variables
+      de entorno de siempre (OWNER_NAME, HF_TOKEN, GOOGLE_CALENDAR_CREDENTIALS...)
+    """
+    default_concurrency = int(os.getenv("TENANT_MAX_CONCURRENCY", "4"))
+    passive_interval = int(os.getenv("PASSIVE_INTERVAL", "5"))
+
+    tenants_file = os.getenv("TENANTS_FILE", "")
+    if not tenants_file:
+        try:
+            credentials = _parse_credentials(os.getenv("GOOGLE_CALENDAR_CREDENTIALS", ""))
+        except ValueError as e:
+            logger.error(f"❌ GOOGLE_CALENDAR_CREDENTIALS inválido: {e}")
+            credentials = None
+
+        return [TenantSettings(
+            tenant_id=DEFAULT_TENANT,
+            owner_name=os.getenv("OWNER_NAME", "Sergio Sanchez"),
+            owner_phone=os.getenv("OWNER_PHONE", "+14084223904"),
+            hf_token=os.getenv("HF_TOKEN", ""),
+            calendar_credentials=credentials,
+            max_concurrency=default_concurrency,
+            passive_interval_minutes=passive_interval
+        )]
+
+    with open(os.path.expanduser(tenants_file)) as f:
+        entries = json.load(f)
+
+    settings = []
+    for entry in entries:
+        tenant_id = entry["tenant_id"]
+        if not TENANT_ID_PATTERN.match(tenant_id):
+            raise ValueError(f"tenant_id inválido: {tenant_id!r}")
+        settings.append(TenantSettings(
+            tenant_id=tenant_id,
+            owner_name=entry["owner_name"],
+            owner_phone=entry.get("owner_phone", ""),
+            hf_token=entry.get("hf_token", ""),
+            calendar_credentials=_parse_credentials(entry.get("google_calendar_credentials")),
+            calendar_id=entry.get("calendar_id", "primary"),
+            api_key=entry.get("api_key", ""),
+            max_concurrency=int(entry.get("max_concurrency", default_concurrency)),
+            passive_interval_minutes=int(entry.get("passive_interval_minutes", passive_interval))
+        ))
+
+    ids = [s.tenant_id for s in settings]
+    if len(set(ids)) != len(ids):
+        raise ValueError("tenant_id duplicado en TENANTS_FILE")
+
+    return settings
+
+
+class Tenant:
+    """Servicios y estado aislados de un propietario"""
+
+    def __init__(self, settings: TenantSettings, config: Any = None):
+        """
+        Inicializar estado del propietario (los servicios se asignan al arrancar)
+
+        Args:
+            settings: Datos de alta del propietario
+            config: MonitoringConfig del propietario
+        """
+        self.settings = settings
+        self.tenant_id = settings.tenant_id
+        self.config = config
+
+        # Servicios
+        self.ai_agent: Optional[AIAgent] = None
+        self.calendar_manager: Optional[GoogleCalendarManager] = None
+        self.db: Optional[ClientDatabase] = None
+        self.slot_cache: Optional[SlotCache] = None
+        self.outbox: Optional[CalendarOutbox] = None
+        self.responder: Optional[TemplateResponder] = None
+        self.transcripts: Optional[TranscriptStore] = None
+
+        # Reservas de horario en curso
+        self.reservations = SlotReservationManager(
+            pending_ttl_seconds=int(os.getenv("RESERVATION_TTL_SECONDS", "60"))
+        )
+
+        # Aviso al worker de la bandeja de salida
+        self.outbox_wakeup = asyncio.Event()
+
+        # Mensajes ya procesados (idempotencia por message_id)
+        self.idempotency = IdempotencyStore(
+            max_results=int(os.getenv("DEDUPE_MAX_RESULTS", "5000")),
+            window_seconds=int(os.getenv("DEDUPE_WINDOW_HOURS", "24")) * 3600,
+            content_window_seconds=float(os.getenv("DEDUPE_CONTENT_WINDOW_SECONDS", "10"))
+        )
+        self.inflight_messages: dict = {}
+
+        # Último volcado de pantalla por conversación
+        self.screen_tracker = ScreenDiffTracker()
+
+        # Estado de conversaciones y su versión (aumenta con cada cambio)
+        self.conversations = ConversationStore()
+
+        # Mensajes seguidos de un mismo número se analizan juntos
+        self.coalescer = MessageCoalescer(
+            window_seconds=float(os.getenv("COALESCE_WINDOW_SECONDS", "2")),
+            max_wait_seconds=float(os.getenv("COALESCE_MAX_WAIT_SECONDS", "10"))
+        )
+
+        # Procesamiento por número: en orden por remitente, en paralelo entre
+        # remitentes (los procesos arrancan con partitions.start() al iniciar)
+        self.partitions = PartitionedPool(
+            partitions=int(os.getenv("PARTITIONS", "4")),
+            processes=os.getenv("PARTITION_PROCESSES", "false").lower() in ("1", "true", "yes"),
+            initializer=init_worker_agent,
+            initargs=(settings.hf_token,)
+        )
+
+        # Respuestas de lectura ya codificadas (por versión del estado)
+        self.response_cache = ResponseCache()
+
+        # Estadísticas por minuto/hora/día
+        self.stats_rollup = StatsRollup()
+
+        # Trabajo bloqueante (IA, Calendar) simultáneo máximo de este propietario
+        self.limiter = asyncio.Semaphore(settings.max_concurrency)
+        self.waiting = 0
+
+    async def _acquire(self):
+        """Esperar turno dentro del límite de concurrencia del propietario"""
+        self.waiting += 1
+        try:
+            await self.limiter.acquire()
+        finally:
+            self.waiting -= 1
+
+    async def run(self, func, *args):
+        """
+        Ejecutar trabajo bloqueante en un hilo, dentro del límite de
+        concurrencia del propietario: uno muy ocupado espera su turno en
+        lugar de acaparar los hilos de todos
+        """
+        await self._acquire()
+        try:
+            return await asyncio.to_thread(func, *args)
+        finally:
+            self.limiter.release()
+
+    async def analyze(self, partition: Partition, message_text: str) -> Dict:
+        """
+        Analizar un mensaje en el proceso de la partición (o en un hilo, sin
+        procesos); en ambos casos cuenta para el límite del propietario
+        """
+        if partition.executor is None:
+            return await self.run(self.ai_agent.analyze_message, message_text)
+
+        await self._acquire()
+        try:
+            return await partition.call(analyze_in_worker, message_text)
+        finally:
+            self.limiter.release()
+
+    def build_responder(self):
+        """(Re)cargar plantillas de respuesta del propietario"""
+        if self.config:
+            self.responder = TemplateResponder(
+                self.config.owner_name,
+                min_confidence=float(os.getenv("TEMPLATE_MIN_CONFIDENCE", "0.7"))
+            )
+
+    def is_conversation_active(self, phone_number: str) -> bool:
+        """Verificar si hay una conversación activa"""
+        return self.conversations.is_active(phone_number)
+
+    def mark_conversation_active(self, phone_number: str):
+        """Marcar conversación como activa"""
+        with span("conversation.mark_active", tenant=self.tenant_id):
+            self.conversations.mark_active(phone_number)
+
+    def mark_conversation_inactive(self, phone_number: str):
+        """Marcar conversación como inactiva"""
+        self.conversations.mark_inactive(phone_number)
+
+    def stats(self) -> Dict:
+        """Resumen del estado del propietario"""
+        return {
+            "tenant_id": self.tenant_id,
+            "owner_name": self.config.owner_name if self.config else None,
+            "ai_agent": self.ai_agent is not None,
+            "calendar_manager": self.calendar_manager is not None,
+            "database": self.db is not None,
+            "active_conversations": self.conversations.active_count,
+            "conversations": len(self.conversations),
+            "waiting": self.waiting,
+            "max_concurrency": self.settings.max_concurrency
+        }
@@ -0,0 +1,148 @@
+"""
+Módulo de trazas por solicitud
+Spans ligeros con un request id propagado por contextvars
+(asyncio.to_thread copia el contexto, así que los hilos de trabajo heredan la traza)
+"""
+
+import os
+import json
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Traza y span actuales
+current_request_id: ContextVar[Optional[str]] = ContextVar("current_request_id", default=None)
+current_span_id: ContextVar[Optional[str]] = ContextVar("current_span_id", default=None)
+
+
+class SpanExporter:
+    """
+    Exportador de spans por lotes
+
+    - TRACE_FILE: archivo JSON Lines local
+    - TRACE_COLLECTOR_URL: POST de lotes JSON a un colector
+    """
+
+    def __init__(
+        self,
+        file_path: Optional[str] = None,
+        collector_url: Optional[str] = None,
+        batch_size: int = 50,
+        flush_interval: float = 2.0,
+        max_buffer: int = 10000
+    ):
+        self.file_path = file_path
+        self.collector_url = collector_url
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer: List[Dict] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+        if self.enabled:
+            threading.Thread(target=self._run, daemon=True, name="span-exporter").start()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.file_path or self.collector_url)
+
+    def export(self, span: Dict):
+        """Encolar un span terminado (nunca bloquea por E/S)"""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                # Colector caído: descartar lo más antiguo antes que crecer sin límite
+                self._buffer.pop(0)
+            self._buffer.append(span)
+            if len(self._buffer) >= self.batch_size:
+                self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Escribir/enviar los spans acumulados"""
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+
+        if not batch:
+            return
+
+        try:
+            if self.file_path:
+                with open(self.file_path, "a") as f:
+                    for span in batch:
+                        f.write(json.dumps(span) + "\n")
+
+            if self.collector_url:
+                requests.post(self.collector_url, json={"spans": batch}, timeout=5)
+
+        except Exception as e:
+            logger.error(f"❌ Error exportando spans: {e}")
+
+
+exporter = SpanExporter(
+    file_path=os.getenv("TRACE_FILE") or None,
+    collector_url=os.getenv("TRACE_COLLECTOR_URL") or None
+)
+
+
+def new_request_id() -> str:
+    """Generar un request id"""
+    return uuid.uuid4().hex[:16]
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Medir un bloque de código como span de la traza actual
+
+    Uso:
+        with span("ai.huggingface", max_tokens=256):
+            ...
+    """
+    span_id = uuid.uuid4().hex[:8]
+    parent_id = current_span_id.get()
+    token = current_span_id.set(span_id)
+    start_wall = time.time()
+    start = time.perf_counter()
+    error = None
+
+    try:
+        yield attributes
+    except Exception as e:
+        error = repr(e)
+        raise
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        current_span_id.reset(token)
+
+        record = {
+            "request_id": current_request_id.get(),
+            "span_id": span_id,
+            "parent_id": parent_id,
+            "name": name,
+            "start": start_wall,
+            "duration_ms": round(duration_ms, 3),
+            "thread": threading.current_thread().name,
+            "attributes": attributes
+        }
+        if error:
+            record["error"] = error
+
+        exporter.export(record)
+        logger.debug(f"⏱️ {name} {duration_ms:.1f} ms [{record['request_id']}]")
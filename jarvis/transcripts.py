@@ -0,0 +1,416 @@
+"""
+Módulo de transcripciones
+Historial de mensajes (entrantes y respuestas) en segmentos de sólo
+escritura al final, con índice compacto por teléfono y lectura por mmap
+"""
+
+import os
+import json
+import glob
+import hashlib
+import logging
+import mmap
+import struct
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Registro en el segmento: longitud (uint32) + JSON
+RECORD_HEADER = struct.Struct("<I")
+
+# Entrada del índice (.idx): hash del teléfono, offset, longitud, timestamp, tipo
+INDEX_ENTRY = struct.Struct("<QIIdB3x")
+
+KIND_MESSAGE = 0
+KIND_DELETE = 1
+
+DIRECTION_IN = "in"
+DIRECTION_OUT = "out"
+
+
+def phone_key(phone_number: str) -> int:
+    """Hash de 64 bits del teléfono (clave del índice)"""
+    digest = hashlib.blake2b(phone_number.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class _PhoneIndex:
+    """Ubicaciones de los mensajes de un teléfono, en orden de escritura"""
+
+    __slots__ = ("segments", "offsets", "lengths", "timestamps")
+
+    def __init__(self):
+        self.segments = array("I")
+        self.offsets = array("I")
+        self.lengths = array("I")
+        self.timestamps = array("d")
+
+    def add(self, segment: int, offset: int, length: int, timestamp: float):
+        self.segments.append(segment)
+        self.offsets.append(offset)
+        self.lengths.append(length)
+        self.timestamps.append(timestamp)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def drop_segment(self, segment: int):
+        keep = [i for i, seg in enumerate(self.segments) if seg != segment]
+        self.segments = array("I", (self.segments[i] for i in keep))
+        self.offsets = array("I", (self.offsets[i] for i in keep))
+        self.lengths = array("I", (self.lengths[i] for i in keep))
+        self.timestamps = array("d", (self.timestamps[i] for i in keep))
+
+
+class TranscriptStore:
+    """
+    Almacén de transcripciones por segmentos
+
+    - append(): agrega un registro al segmento activo (nunca reescribe datos)
+    - last(): últimos N mensajes de un teléfono, leídos por mmap
+    - apply_retention() / compact(): borran segmentos vencidos y reescriben
+      los segmentos cerrados con mucho contenido muerto
+    """
+
+    def __init__(
+        self,
+        base_dir: str = "transcripts",
+        segment_max_bytes: int = 8 * 1024 * 1024,
+        retention_days: float = 90,
+        fsync: bool = False
+    ):
+        """
+        Inicializar almacén
+
+        Args:
+            base_dir: Directorio de los segmentos
+            segment_max_bytes: Tamaño a partir del cual se abre un segmento nuevo
+            retention_days: Días que se conservan los mensajes
+            fsync: Forzar a disco cada escritura (más lento, más durable)
+        """
+        # En Railway, usar directorio temporal
+        if 'RAILWAY' in os.environ:
+            base_dir = os.path.join('/tmp', os.path.basename(base_dir))
+
+        self.base_dir = os.path.expanduser(base_dir)
+        self.segment_max_bytes = segment_max_bytes
+        self.retention_seconds = retention_days * 86400
+        self.fsync = fsync
+
+        self._lock = threading.Lock()
+        self._index: Dict[int, _PhoneIndex] = {}
+        self._maps: Dict[int, Tuple[mmap.mmap, int]] = {}
+        self._segment_newest: Dict[int, float] = {}
+
+        os.makedirs(self.base_dir, exist_ok=True)
+        self._load()
+
+    # ==================== ARCHIVOS ====================
+
+    def _path(self, segment: int, ext: str = "log") -> str:
+        return os.path.join(self.base_dir, f"segment-{segment:08d}.{ext}")
+
+    def _segments(self) -> List[int]:
+        pattern = os.path.join(self.base_dir, "segment-*.log")
+        return sorted(int(os.path.basename(p)[8:16]) for p in glob.glob(pattern))
+
+    def _read_index(self, segment: int) -> List[Tuple[int, int, int, float, int]]:
+        """Entradas del .idx de un segmento"""
+        idx_path = self._path(segment, "idx")
+        if not os.path.exists(idx_path):
+            return []
+        with open(idx_path, "rb") as f:
+            data = f.read()
+        usable = len(data) - len(data) % INDEX_ENTRY.size
+        return list(INDEX_ENTRY.iter_unpack(data[:usable]))
+
+    def _load(self):
+        """Reconstruir el índice desde los .idx (sin leer los mensajes)"""
+        segments = self._segments()
+
+        for segment in segments:
+            log_size = os.path.getsize(self._path(segment))
+            entries = self._read_index(segment)
+
+            # Descartar entradas de registros incompletos (corte a media escritura)
+            valid_end = 0
+            valid_count = 0
+            newest = 0.0
+            for key, offset, length, timestamp, kind in entries:
+                end = offset + RECORD_HEADER.size + length
+                if end > log_size:
+                    break
+                valid_end = max(valid_end, end)
+                valid_count += 1
+                newest = max(newest, timestamp)
+                self._apply_entry(segment, key, offset, length, timestamp, kind)
+
+            self._segment_newest[segment] = newest
+
+            if segment == segments[-1]:
+                # Segmento activo: truncar colas sin indexar o entradas sin registro
+                if valid_end < log_size:
+                    with open(self._path(segment), "r+b") as f:
+                        f.truncate(valid_end)
+                if os.path.exists(self._path(segment, "idx")):
+                    with open(self._path(segment, "idx"), "r+b") as f:
+                        f.truncate(valid_count * INDEX_ENTRY.size)
+
+        self._active = segments[-1] if segments else 0
+        self._open_active()
+
+        logger.info(f"✅ Transcripciones cargadas: {len(self._index)} teléfonos, {len(segments)} segmentos")
+
+    def _apply_entry(self, segment: int, key: int, offset: int, length: int,
+                     timestamp: float, kind: int):
+        if kind == KIND_DELETE:
+            self._index.pop(key, None)
+        else:
+            self._index.setdefault(key, _PhoneIndex()).add(segment, offset, length, timestamp)
+
+    def _open_active(self):
+        self._log = open(self._path(self._active), "ab")
+        self._idx = open(self._path(self._active, "idx"), "ab")
+        self._active_size = self._log.tell()
+        self._segment_newest.setdefault(self._active, 0.0)
+
+    def _rotate(self):
+        self._log.close()
+        self._idx.close()
+        self._active += 1
+        self._open_active()
+
+    def _map(self, segment: int, needed: int) -> mmap.mmap:
+        """mmap del segmento; el activo se vuelve a mapear si creció"""
+        cached = self._maps.get(segment)
+        if cached is not None and cached[1] >= needed:
+            return cached[0]
+
+        with open(self._path(segment), "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            mapped = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        # El mapa anterior no se cierra: puede haber memoryviews vivos sobre él
+        self._maps[segment] = (mapped, size)
+        return mapped
+
+    # ==================== ESCRITURA ====================
+
+    def _write(self, key: int, payload: bytes, timestamp: float, kind: int):
+        if self._active_size and self._active_size + len(payload) > self.segment_max_bytes:
+            self._rotate()
+
+        offset = self._active_size
+        self._log.write(RECORD_HEADER.pack(len(payload)) + payload)
+        self._log.flush()
+        self._idx.write(INDEX_ENTRY.pack(key, offset, len(payload), timestamp, kind))
+        self._idx.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+            os.fsync(self._idx.fileno())
+
+        self._active_size += RECORD_HEADER.size + len(payload)
+        self._segment_newest[self._active] = max(self._segment_newest[self._active], timestamp)
+        self._apply_entry(self._active, key, offset, len(payload), timestamp, kind)
+
+    def append(self, phone_number: str, direction: str, text: str,
+               timestamp: Optional[float] = None, **meta):
+        """
+        Agregar un mensaje a la transcripción
+
+        Args:
+            phone_number: Teléfono de la conversación
+            direction: "in" (del cliente) u "out" (respuesta de Jarvis)
+            text: Texto del mensaje
+            timestamp: Epoch en segundos (default: ahora)
+            meta: Campos extra (message_type, message_id...)
+        """
+        timestamp = timestamp or time.time()
+        record = {"phone": phone_number, "dir": direction, "text": text, "ts": timestamp}
+        record.update(meta)
+        payload = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+        with self._lock:
+            self._write(phone_key(phone_number), payload, timestamp, KIND_MESSAGE)
+
+    def delete_phone(self, phone_number: str):
+        """Olvidar la transcripción de un teléfono (se purga al compactar)"""
+        payload = json.dumps({"phone": phone_number, "deleted": True}).encode("utf-8")
+        with self._lock:
+            self._write(phone_key(phone_number), payload, time.time(), KIND_DELETE)
+
+    # ==================== LECTURA ====================
+
+    def last_raw(self, phone_number: str, n: int = 20) -> List[memoryview]:
+        """
+        Últimos N registros de un teléfono sin copiar ni decodificar
+
+        Los memoryview apuntan al mmap del segmento y siguen siendo válidos
+        aunque el segmento se compacte después.
+        """
+        key = phone_key(phone_number)
+        with self._lock:
+            entries = self._index.get(key)
+            if not entries:
+                return []
+
+            views = []
+            for i in range(max(0, len(entries) - n), len(entries)):
+                start = entries.offsets[i] + RECORD_HEADER.size
+                end = start + entries.lengths[i]
+                mapped = self._map(entries.segments[i], end)
+                views.append(memoryview(mapped)[start:end])
+            return views
+
+    def last(self, phone_number: str, n: int = 20) -> List[Dict]:
+        """Últimos N mensajes de un teléfono, del más antiguo al más reciente"""
+        messages = []
+        for view in self.last_raw(phone_number, n):
+            record = json.loads(bytes(view))
+            # Colisión de hash (muy improbable): descartar registros de otro teléfono
+            if record.get("phone") == phone_number:
+                messages.append(record)
+        return messages
+
+    def count(self, phone_number: str) -> int:
+        """Número de mensajes guardados de un teléfono"""
+        entries = self._index.get(phone_key(phone_number))
+        return len(entries) if entries else 0
+
+    # ==================== RETENCIÓN ====================
+
+    def apply_retention(self) -> int:
+        """
+        Borrar los segmentos cerrados cuyo mensaje más reciente ya venció
+
+        Returns:
+            Segmentos borrados
+        """
+        cutoff = time.time() - self.retention_seconds
+        removed = 0
+
+        with self._lock:
+            for segment in self._segments():
+                if segment == self._active or self._segment_newest.get(segment, 0) >= cutoff:
+                    continue
+                self._remove_segment(segment)
+                removed += 1
+
+        if removed:
+            logger.info(f"🗑️ {removed} segmentos de transcripción vencidos borrados")
+        return removed
+
+    def _remove_segment(self, segment: int):
+        for key in list(self._index):
+            entries = self._index[key]
+            entries.drop_segment(segment)
+            if not entries:
+                del self._index[key]
+        self._maps.pop(segment, None)
+        self._segment_newest.pop(segment, None)
+        os.remove(self._path(segment))
+        if os.path.exists(self._path(segment, "idx")):
+            os.remove(self._path(segment, "idx"))
+
+    def compact(self, min_live_ratio: float = 0.5) -> int:
+        """
+        Reescribir los segmentos cerrados con poco contenido vivo
+
+        Un mensaje está muerto si venció o si su teléfono fue borrado; las
+        marcas de borrado se conservan para que un reinicio no reviva
+        mensajes de segmentos anteriores. El segmento se reescribe en un
+        archivo nuevo que reemplaza al original de forma atómica; el
+        segmento activo nunca se toca.
+
+        Returns:
+            Segmentos compactados
+        """
+        cutoff = time.time() - self.retention_seconds
+        compacted = 0
+
+        with self._lock:
+            for segment in self._segments():
+                if segment == self._active:
+                    continue
+
+                indexed = {
+                    entries.offsets[i]
+                    for entries in self._index.values()
+                    for i, seg in enumerate(entries.segments)
+                    if seg == segment
+                }
+                entries = self._read_index(segment)
+                live = [
+                    entry for entry in entries
+                    if entry[4] == KIND_DELETE or (entry[1] in indexed and entry[3] >= cutoff)
+                ]
+                if entries and len(live) / len(entries) >= min_live_ratio:
+                    continue
+
+                self._rewrite_segment(segment, live)
+                compacted += 1
+
+        if compacted:
+            logger.info(f"🧹 {compacted} segmentos de transcripción compactados")
+        return compacted
+
+    def _rewrite_segment(self, segment: int, live: List[Tuple[int, int, int, float, int]]):
+        if not live:
+            self._remove_segment(segment)
+            return
+
+        mapped = self._map(segment, 0)
+        tmp_log = self._path(segment, "log.tmp")
+        tmp_idx = self._path(segment, "idx.tmp")
+        moved = {}
+
+        with open(tmp_log, "wb") as log, open(tmp_idx, "wb") as idx:
+            offset = 0
+            for key, old_offset, length, timestamp, kind in live:
+                log.write(mapped[old_offset:old_offset + RECORD_HEADER.size + length])
+                idx.write(INDEX_ENTRY.pack(key, offset, length, timestamp, kind))
+                moved[old_offset] = offset
+                offset += RECORD_HEADER.size + length
+            log.flush()
+            idx.flush()
+            os.fsync(log.fileno())
+            os.fsync(idx.fileno())
+
+        os.replace(tmp_log, self._path(segment))
+        os.replace(tmp_idx, self._path(segment, "idx"))
+        self._maps.pop(segment, None)
+
+        # Nuevos offsets; lo que no se copió sale del índice
+        for key in list(self._index):
+            entries = self._index[key]
+            if segment not in entries.segments:
+                continue
+            rebuilt = _PhoneIndex()
+            for i in range(len(entries)):
+                seg, old_offset = entries.segments[i], entries.offsets[i]
+                if seg == segment:
+                    if old_offset not in moved:
+                        continue
+                    old_offset = moved[old_offset]
+                rebuilt.add(seg, old_offset, entries.lengths[i], entries.timestamps[i])
+            if rebuilt:
+                self._index[key] = rebuilt
+            else:
+                del self._index[key]
+
+    def stats(self) -> Dict:
+        """Estadísticas del almacén"""
+        segments = self._segments()
+        return {
+            "phones": len(self._index),
+            "messages": sum(len(entries) for entries in self._index.values()),
+            "segments": len(segments),
+            "bytes": sum(os.path.getsize(self._path(s)) for s in segments)
+        }
+
+    def close(self):
+        with self._lock:
+            self._log.close()
+            self._idx.close()
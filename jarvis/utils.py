@@ -2,9 +2,21 @@
 Utilidades generales para Jarvis
 """
 
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytz
 import re
+import unicodedata
+
+DIAS_SEMANA = {
+    'lunes': 0, 'martes': 1, 'miercoles': 2, 'jueves': 3,
+    'viernes': 4, 'sabado': 5, 'domingo': 6
+}
+
+MESES = {
+    'enero': 1, 'febrero': 2, 'marzo': 3, 'abril': 4, 'mayo': 5, 'junio': 6,
+    'julio': 7, 'agosto': 8, 'septiembre': 9, 'setiembre': 9, 'octubre': 10,
+    'noviembre': 11, 'diciembre': 12
+}
 
 def get_current_time_mexico():
     """Obtener hora actual en México"""
@@ -25,12 +37,98 @@ def format_phone(phone):
 
     return f"+{digits}"
 
-def extract_date_from_message(message):
-    """Extraer posible fecha de un mensaje"""
+def _strip_accents(text):
+    """Quitar acentos para comparar palabras"""
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+def extract_date_from_message(message, now=None):
+    """Extraer posible fecha de un mensaje (YYYY-MM-DD o None)"""
     # Patrones comunes: "para mañana", "el lunes", "15/02", "15 de febrero"
-    message = message.lower()
+    message = _strip_accents(message.lower())
+    today = (now or get_current_time_mexico()).date()
+
+    if 'pasado manana' in message:
+        return (today + timedelta(days=2)).isoformat()
+    # "mañana" como día, no "por la mañana"
+    if re.search(r'(?<!la )\bmanana\b', message):
+        return (today + timedelta(days=1)).isoformat()
+    if re.search(r'\bhoy\b', message):
+        return today.isoformat()
+
+    match = re.search(r'\b(\d{1,2})\s+de\s+([a-z]+)\b', message)
+    if match and match.group(2) in MESES:
+        day, month = int(match.group(1)), MESES[match.group(2)]
+        return _next_date(today, month, day)
+
+    match = re.search(r'\b(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?\b', message)
+    if match:
+        day, month = int(match.group(1)), int(match.group(2))
+        if match.group(3):
+            year = int(match.group(3))
+            year = year + 2000 if year < 100 else year
+            try:
+                return datetime(year, month, day).date().isoformat()
+            except ValueError:
+                return None
+        return _next_date(today, month, day)
+
+    for name, weekday in DIAS_SEMANA.items():
+        if re.search(rf'\b{name}\b', message):
+            days = (weekday - today.weekday()) % 7 or 7
+            return (today + timedelta(days=days)).isoformat()
+
+    return None
+
+def _next_date(today, month, day):
+    """Próxima ocurrencia de día/mes a partir de hoy"""
+    for year in (today.year, today.year + 1):
+        try:
+            candidate = datetime(year, month, day).date()
+        except ValueError:
+            return None
+        if candidate >= today:
+            return candidate.isoformat()
+    return None
+
+TIME_PATTERN = re.compile(
+    r'\b(a las |a la |las )?(\d{1,2})(?::(\d{2})| y (media|cuarto))?\s*'
+    r'(a\.? ?m\b\.?|p\.? ?m\b\.?|de la manana|de la tarde|de la noche|hrs\b|horas\b)?'
+)
+
+# "en 2 horas", "dentro de 3 hrs", "hace 2 horas": duraciones, no horas del día
+RELATIVE_TIME_PREFIX = re.compile(r'\b(en|dentro de|hace|por|cada|durante|unas?|como)\s+$')
+
+def extract_time_from_message(message):
+    """Extraer posible hora de un mensaje (HH:MM o None)"""
+    # Patrones comunes: "a las 5", "5pm", "15:00", "5 de la tarde", "a las 10 y media"
+    message = _strip_accents(message.lower())
+
+    for match in TIME_PATTERN.finditer(message):
+        prefix, hour, minute, fraction, suffix = match.groups()
+        suffix = (suffix or '').replace('.', '').replace(' ', '')
+
+        # Un número suelto ("tengo 2 preguntas") no es una hora
+        if not (prefix or minute or fraction or suffix):
+            continue
+        if not prefix and RELATIVE_TIME_PREFIX.search(message, 0, match.start()):
+            continue
+
+        hour = int(hour)
+        minute = int(minute) if minute else {'media': 30, 'cuarto': 15}.get(fraction, 0)
+        if hour > 23 or minute > 59:
+            continue
+
+        if suffix in ('pm', 'delatarde', 'delanoche') and hour < 12:
+            hour += 12
+        elif suffix in ('am', 'delamanana') and hour == 12:
+            hour = 0
+        elif not suffix and not match.group(3) and 1 <= hour <= 7:
+            # "a las 5" en horario de citas se entiende por la tarde
+            hour += 12
+
+        return f"{hour:02d}:{minute:02d}"
 
-    # Lógica simple - expandir según necesidad
     return None
 
 def is_weekend(dt):
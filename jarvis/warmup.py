@@ -0,0 +1,117 @@
+"""
+Módulo de calentamiento de modelos
+Un ping de inferencia al arrancar y pings periódicos mientras el backend
+está inactivo, en horario laboral y un poco antes de abrir, para que la
+carga en frío del modelo no le toque a un SMS real. El intervalo se adapta:
+si un ping encuentra el modelo frío se acorta, si lo encuentra caliente
+se alarga poco a poco.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Optional
+
+from jarvis.inference import InferenceBackend
+from jarvis.utils import get_current_time_mexico, is_business_hours
+
+logger = logging.getLogger(__name__)
+
+
+class ModelWarmer:
+    """Mantener calientes los backends que lo admiten"""
+
+    def __init__(
+        self,
+        backends: Iterable[InferenceBackend],
+        interval_seconds: float = 300,
+        min_interval_seconds: float = 60,
+        max_interval_seconds: float = 1800,
+        lead_minutes: float = 15,
+        keep_warm: bool = True,
+        clock: Callable[[], datetime] = get_current_time_mexico
+    ):
+        """
+        Args:
+            backends: Backends del agente (sólo se calientan los que lo admiten)
+            interval_seconds: Inactividad inicial tras la que se hace un ping
+            min_interval_seconds: Intervalo mínimo
+            max_interval_seconds: Intervalo máximo
+            lead_minutes: Minutos antes de abrir en que se empieza a calentar
+            keep_warm: Pings periódicos (sin ellos sólo se calienta al arrancar)
+            clock: Hora local actual
+        """
+        self.backends = [b for b in backends if b.supports_warmup]
+        self.min_interval = min_interval_seconds
+        self.max_interval = max_interval_seconds
+        self.lead = timedelta(minutes=lead_minutes)
+        self.keep_warm = keep_warm
+        self.clock = clock
+
+        initial = min(max(interval_seconds, min_interval_seconds), max_interval_seconds)
+        self.intervals: Dict[str, float] = {b.name: initial for b in self.backends}
+        # Menor inactividad tras la que se encontró el modelo frío
+        self.cold_after_idle: Dict[str, Optional[float]] = {b.name: None for b in self.backends}
+
+    def in_window(self, now: Optional[datetime] = None) -> bool:
+        """Horario laboral, o a punto de empezar"""
+        now = now or self.clock()
+        return is_business_hours(now) or is_business_hours(now + self.lead)
+
+    def warm_all(self):
+        """Calentamiento al arrancar (a cualquier hora)"""
+        for backend in self.backends:
+            if backend.available():
+                self._ping(backend)
+
+    def tick(self, now: Optional[datetime] = None):
+        """
+        Ping a los backends inactivos más que su intervalo (dentro de la
+        ventana) y, a cualquier hora, a los que una solicitud encontró fríos
+        """
+        if not self.keep_warm:
+            return
+        in_window = self.in_window(now)
+        for backend in self.backends:
+            if not backend.available():
+                continue
+            idle = backend.idle_seconds()
+            if backend.cold:
+                self._ping(backend, idle)
+            elif in_window and (idle is None or idle >= self.intervals[backend.name]):
+                self._ping(backend, idle)
+
+    def _ping(self, backend: InferenceBackend, idle: Optional[float] = None):
+        was_cold = backend.warm()
+        if was_cold is None:
+            return
+
+        name = backend.name
+        if was_cold:
+            logger.info(f"🔥 Modelo {backend.model} cargado en {backend.last_warmup_seconds:.1f} s")
+            if idle is not None:
+                # Se enfrió antes del ping: acortar el intervalo a la mitad de esa inactividad
+                shortest = self.cold_after_idle[name]
+                self.cold_after_idle[name] = idle if shortest is None else min(shortest, idle)
+                self.intervals[name] = max(self.min_interval, min(self.intervals[name], idle) / 2)
+        else:
+            # Caliente: alargar un poco, sin acercarse a la inactividad que ya lo enfrió
+            limit = self.max_interval
+            if self.cold_after_idle[name] is not None:
+                limit = min(limit, 0.8 * self.cold_after_idle[name])
+            self.intervals[name] = max(self.min_interval, min(limit, self.intervals[name] * 1.25))
+
+    def stats(self) -> Dict:
+        return {
+            "keep_warm": self.keep_warm,
+            "in_window": self.in_window(),
+            "backends": {
+                b.name: {
+                    "interval_seconds": round(self.intervals[b.name], 1),
+                    "cold_after_idle_seconds": (
+                        round(self.cold_after_idle[b.name], 1)
+                        if self.cold_after_idle[b.name] is not None else None
+                    )
+                }
+                for b in self.backends
+            }
+        }
@@ -0,0 +1,74 @@
+"""
+Log de actividad en buffer circular
+Modelo de datos independiente de Kivy, seguro entre hilos
+"""
+
+import threading
+from collections import deque
+from itertools import islice
+from typing import List, Tuple
+
+
+class RingLog:
+    """Buffer circular de entradas de log con capacidad fija"""
+
+    def __init__(self, capacity: int = 2000):
+        """
+        Inicializar buffer
+
+        Args:
+            capacity: Número máximo de entradas; las más antiguas se descartan
+        """
+        self.capacity = capacity
+        self._entries = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._seq = 0
+
+    def append(self, entry) -> int:
+        """
+        Agregar entrada (O(1), desde cualquier hilo)
+
+        Returns:
+            Número de secuencia asignado
+        """
+        with self._lock:
+            self._seq += 1
+            self._entries.append((self._seq, entry))
+            return self._seq
+
+    @property
+    def last_seq(self) -> int:
+        """Secuencia de la última entrada agregada"""
+        return self._seq
+
+    def since(self, seq: int) -> Tuple[List, int, bool]:
+        """
+        Entradas posteriores a una secuencia
+
+        Args:
+            seq: Última secuencia ya consumida
+
+        Returns:
+            (entradas nuevas, última secuencia, True si se perdieron entradas
+            porque el buffer dio la vuelta)
+        """
+        with self._lock:
+            last = self._seq
+            new_count = last - seq
+            if new_count <= 0:
+                return [], last, False
+
+            overflow = new_count > len(self._entries)
+            take = min(new_count, len(self._entries))
+            # Recorrer desde el final: O(nuevas), no O(capacidad)
+            entries = [entry for _, entry in islice(reversed(self._entries), take)]
+            entries.reverse()
+            return entries, last, overflow
+
+    def snapshot(self) -> List:
+        """Copia de todas las entradas actuales"""
+        with self._lock:
+            return [entry for _, entry in self._entries]
+
+    def __len__(self) -> int:
+        return len(self._entries)
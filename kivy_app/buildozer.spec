@@ -13,7 +13,7 @@ source.include_exts = py,png,jpg,kv,atlas
 version = 2.0.0
 
 # Requisitos
-requirements = python3,kivy,requests,jnius
+requirements = python3,kivy,requests,jnius,android
 
 # Permisos de Android
 android.permissions = INTERNET,READ_SMS,SEND_SMS,RECEIVE_SMS,WRITE_SMS,ACCESS_NETWORK_STATE,CHANGE_NETWORK_STATE,BIND_ACCESSIBILITY_SERVICE,SYSTEM_ALERT_WINDOW,WAKE_LOCK
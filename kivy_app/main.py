@@ -9,20 +9,26 @@ from kivy.uix.gridlayout import GridLayout
 from kivy.uix.label import Label
 from kivy.uix.button import Button
 from kivy.uix.textinput import TextInput
-from kivy.uix.scrollview import ScrollView
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 from kivy.uix.popup import Popup
 from kivy.uix.image import Image
 from kivy.clock import Clock
-from kivy.garden.matplotlib.backend_kivyagg import FigureCanvasKivyAgg
 from kivy.core.window import Window
+from kivy.metrics import dp
 
 import requests
 import json
+import gzip
 import logging
+import random
 from datetime import datetime
-from threading import Thread
+from threading import Thread, Lock
 import os
 
+from activity_log import RingLog
+from sms_outbox import SmsOutbox
+
 # Configurar ventana
 Window.size = (360, 640)
 
@@ -30,6 +36,32 @@ Window.size = (360, 640)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Envío por lotes de la cola offline
+OUTBOX_BATCH_SIZE = 20
+
+# Log de actividad
+LOG_CAPACITY = 2000
+LOG_MAX_FPS = 10
+
+LEVEL_COLORS = {
+    "ERROR": "ff3333",
+    "SUCCESS": "33ff33",
+    "WARNING": "ffff33",
+    "INFO": "ffffff",
+}
+
+
+class LogRow(Label):
+    """Fila del log (reutilizada por RecycleView)"""
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.markup = True
+        self.font_size = '10sp'
+        self.halign = 'left'
+        self.valign = 'middle'
+        self.bind(size=lambda row, size: setattr(row, 'text_size', size))
+
 
 class JarvisApp(App):
     """Aplicación principal de Jarvis"""
@@ -41,23 +73,48 @@ class JarvisApp(App):
         self.backend_url = os.getenv("BACKEND_URL", "http://192.168.1.100:8000")
         self.owner_name = os.getenv("OWNER_NAME", "Sergio Sanchez")
         self.owner_phone = os.getenv("OWNER_PHONE", "+14084223904")
+        self.tenant_id = os.getenv("TENANT_ID", "")
+        self.tenant_key = os.getenv("TENANT_KEY", "")
         
         # Estado
         self.monitoring_active = False
         self.connected_to_backend = False
-        self.active_conversations = []
+        self.active_conversations = {}
         self.messages_log = []
+        self.activity_log = RingLog(LOG_CAPACITY)
+        self.log_flushed_seq = 0
+        
+        # Sincronización incremental con el backend
+        self.conversations_version = None
+        self.conversations_etag = None
+        
+        # Sesión HTTP persistente (keep-alive): evita un handshake TCP/TLS por consulta
+        self.session = requests.Session()
+        self.apply_tenant_headers()
+        self.connection_failures = 0
+        
+        # Estadísticas del backend; matplotlib se importa al abrir la pantalla
+        self.messages_today = None
+        self.chart_backend = None
+        
+        # Cola offline de SMS capturados (se crea en build, con user_data_dir)
+        self.sms_outbox = None
+        self.outbox_flush_lock = Lock()
+        self.sms_receiver = None
         
         # UI Elements
         self.status_label = None
-        self.log_text = None
+        self.log_view = None
         self.start_button = None
         self.stop_button = None
         self.config_button = None
+        self.stats_button = None
         
     def build(self):
         """Construir interfaz de la app"""
         
+        self.sms_outbox = SmsOutbox(self.user_data_dir)
+        
         main_layout = BoxLayout(orientation='vertical', padding=10, spacing=10)
         
         # ==================== HEADER ====================
@@ -97,7 +154,7 @@ class JarvisApp(App):
         self.start_button = Button(
             text='Iniciar',
             background_color=(0.04, 0.49, 0.64, 1),
-            size_hint_x=0.33
+            size_hint_x=0.25
         )
         self.start_button.bind(on_press=self.start_monitoring)
         controls.add_widget(self.start_button)
@@ -105,7 +162,7 @@ class JarvisApp(App):
         self.stop_button = Button(
             text='Detener',
             background_color=(0.8, 0.2, 0.2, 1),
-            size_hint_x=0.33,
+            size_hint_x=0.25,
             disabled=True
         )
         self.stop_button.bind(on_press=self.stop_monitoring)
@@ -114,11 +171,19 @@ class JarvisApp(App):
         self.config_button = Button(
             text='Configurar',
             background_color=(0.5, 0.5, 0.5, 1),
-            size_hint_x=0.34
+            size_hint_x=0.25
         )
         self.config_button.bind(on_press=self.show_config)
         controls.add_widget(self.config_button)
         
+        self.stats_button = Button(
+            text='Estadísticas',
+            background_color=(0.3, 0.3, 0.6, 1),
+            size_hint_x=0.25
+        )
+        self.stats_button.bind(on_press=self.show_stats)
+        controls.add_widget(self.stats_button)
+        
         main_layout.add_widget(controls)
         
         # ==================== INFORMACIÓN ====================
@@ -150,76 +215,224 @@ class JarvisApp(App):
         log_label = Label(text='Log de Actividad', font_size='12sp', bold=True, size_hint_y=0.05)
         main_layout.add_widget(log_label)
         
-        scroll_view = ScrollView(size_hint_y=0.58)
-        self.log_text = Label(
-            text='Iniciando Jarvis...\n',
-            font_size='10sp',
-            markup=True,
-            size_hint_y=None,
-            text_size=(330, None)
+        # Sólo se dibujan las filas visibles
+        self.log_view = RecycleView(size_hint_y=0.58)
+        self.log_view.viewclass = LogRow
+        log_layout = RecycleBoxLayout(
+            orientation='vertical',
+            default_size=(None, dp(16)),
+            default_size_hint=(1, None),
+            size_hint_y=None
         )
-        self.log_text.bind(texture_size=self.log_text.setter('size'))
-        scroll_view.add_widget(self.log_text)
-        main_layout.add_widget(scroll_view)
+        log_layout.bind(minimum_height=log_layout.setter('height'))
+        self.log_view.add_widget(log_layout)
+        main_layout.add_widget(self.log_view)
+        
+        self.log_message("Iniciando Jarvis...")
+        Clock.schedule_interval(self.flush_log, 1 / LOG_MAX_FPS)
         
         # Verificar conexión al iniciar
         Clock.schedule_once(lambda dt: self.check_backend_connection(), 1)
         
+        self.start_sms_receiver()
+        
         return main_layout
     
+    def on_stop(self):
+        """Dejar de escuchar SMS al cerrar la app"""
+        if self.sms_receiver:
+            self.sms_receiver.stop()
+    
     def log_message(self, message: str, level: str = "INFO"):
-        """Agregar mensaje al log"""
+        """Agregar mensaje al log (seguro desde cualquier hilo)"""
         timestamp = datetime.now().strftime("%H:%M:%S")
         
         # Colores según nivel
-        if level == "ERROR":
-            color = "[color=ff3333]"
-        elif level == "SUCCESS":
-            color = "[color=33ff33]"
-        elif level == "WARNING":
-            color = "[color=ffff33]"
-        else:
-            color = "[color=ffffff]"
+        color = LEVEL_COLORS.get(level, LEVEL_COLORS["INFO"])
         
-        log_entry = f"{color}[{timestamp}] {message}[/color]\n"
+        self.activity_log.append(f"[color={color}][{timestamp}] {message}[/color]")
         
-        # Agregar al log
-        self.log_text.text += log_entry
+        logger.info(f"{level}: {message}")
+    
+    def flush_log(self, dt):
+        """Volcar entradas nuevas del buffer a la vista (en el hilo de Kivy)"""
+        entries, last_seq, overflow = self.activity_log.since(self.log_flushed_seq)
+        if not entries:
+            return
         
-        # Mantener solo últimas 50 líneas
-        lines = self.log_text.text.split('\n')
-        if len(lines) > 50:
-            self.log_text.text = '\n'.join(lines[-50:])
+        self.log_flushed_seq = last_seq
         
-        logger.info(f"{level}: {message}")
+        if overflow:
+            # El buffer dio la vuelta desde el último volcado: reconstruir
+            self.log_view.data = [{'text': e} for e in self.activity_log.snapshot()]
+        else:
+            data = self.log_view.data
+            data.extend({'text': e} for e in entries)
+            excess = len(data) - LOG_CAPACITY
+            if excess > 0:
+                del data[:excess]
+        
+        # Mantener la vista al final
+        self.log_view.scroll_y = 0
+    
+    def backoff_delay(self, failures: int, base: float = 2, cap: float = 300) -> float:
+        """Espera exponencial con jitter para reintentos"""
+        delay = min(cap, base * (2 ** failures))
+        return random.uniform(delay / 2, delay)
     
     def check_backend_connection(self):
         """Verificar conexión con backend"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.backend_url}/health",
                 timeout=5
             )
             
             if response.status_code == 200:
                 self.connected_to_backend = True
+                self.connection_failures = 0
                 self.backend_label.text = "Conectado ✓"
                 self.backend_label.color = (0.2, 0.8, 0.2, 1)  # Verde
                 self.log_message("Conectado con backend", "SUCCESS")
+                
+                # Enviar lo capturado durante la desconexión
+                self.start_outbox_flush()
             else:
                 self.connected_to_backend = False
+                self.connection_failures += 1
                 self.backend_label.text = "Error"
                 self.backend_label.color = (1, 0.3, 0.3, 1)  # Rojo
                 self.log_message(f"Backend error: {response.status_code}", "ERROR")
         
         except Exception as e:
             self.connected_to_backend = False
+            self.connection_failures += 1
             self.backend_label.text = "Desconectado"
             self.backend_label.color = (1, 0.3, 0.3, 1)  # Rojo
             self.log_message(f"No se pudo conectar: {str(e)}", "ERROR")
         
-        # Reintentar cada 30 segundos
-        Clock.schedule_once(lambda dt: self.check_backend_connection(), 30)
+        # Reintentar cada 30 segundos, con backoff si el backend no responde
+        if self.connection_failures:
+            retry_in = self.backoff_delay(self.connection_failures)
+        else:
+            retry_in = 30
+        Clock.schedule_once(lambda dt: self.check_backend_connection(), retry_in)
+    
+    def capture_sms(self, phone_number: str, message_text: str,
+                    message_id: str = None, timestamp: str = None):
+        """
+        Registrar un SMS capturado en el dispositivo
+        
+        Se guarda primero en la cola local, así no se pierde si el backend
+        no está disponible; luego se intenta enviar.
+        """
+        is_new = self.sms_outbox.enqueue({
+            "phone_number": phone_number,
+            "message_text": message_text,
+            "timestamp": timestamp or datetime.now().isoformat(),
+            "message_id": message_id
+        })
+        
+        if is_new:
+            self.messages_log.append(message_id)
+            if self.connected_to_backend:
+                self.start_outbox_flush()
+    
+    def start_sms_receiver(self):
+        """
+        Escuchar SMS_RECEIVED y pasar cada SMS a capture_sms
+        
+        Sólo en Android (python-for-android); en escritorio no hay captura.
+        """
+        try:
+            from android.broadcast import BroadcastReceiver
+            from android.permissions import Permission, request_permissions
+        except ImportError:
+            self.log_message("Captura de SMS no disponible en esta plataforma", "WARNING")
+            return
+        
+        request_permissions([Permission.RECEIVE_SMS, Permission.READ_SMS])
+        self.sms_receiver = BroadcastReceiver(
+            self.on_sms_received,
+            actions=["android.provider.Telephony.SMS_RECEIVED"]
+        )
+        self.sms_receiver.start()
+        self.log_message("Captura de SMS activa", "SUCCESS")
+    
+    def on_sms_received(self, context, intent):
+        """
+        SMS entrante (hilo de Android)
+        
+        Un SMS largo llega en varias partes dentro del mismo intent: se
+        unen por remitente. La hora es la del centro de mensajes, así los
+        reenvíos del mismo SMS tienen la misma clave en la cola.
+        """
+        from jnius import autoclass
+        intents = autoclass("android.provider.Telephony$Sms$Intents")
+        
+        messages = {}
+        for sms in intents.getMessagesFromIntent(intent) or []:
+            phone = sms.getOriginatingAddress()
+            if phone not in messages:
+                messages[phone] = [sms.getTimestampMillis(), []]
+            messages[phone][1].append(sms.getMessageBody() or "")
+        
+        for phone, (millis, bodies) in messages.items():
+            timestamp = datetime.fromtimestamp(millis / 1000).isoformat()
+            # capture_sms en el hilo de Kivy
+            Clock.schedule_once(
+                lambda dt, p=phone, t="".join(bodies), ts=timestamp:
+                    self.capture_sms(p, t, timestamp=ts)
+            )
+    
+    def start_outbox_flush(self):
+        """Lanzar envío de la cola offline en segundo plano"""
+        Thread(target=self.flush_outbox, daemon=True).start()
+    
+    def flush_outbox(self):
+        """Enviar la cola offline al backend en lotes comprimidos"""
+        # Un solo envío a la vez
+        if not self.outbox_flush_lock.acquire(blocking=False):
+            return
+        
+        try:
+            sent = 0
+            while True:
+                batch = self.sms_outbox.peek(OUTBOX_BATCH_SIZE)
+                if not batch:
+                    break
+                
+                response = self.session.post(
+                    f"{self.backend_url}/analyze-messages/batch",
+                    data=gzip.compress(json.dumps(batch).encode("utf-8")),
+                    headers={
+                        "Content-Type": "application/json",
+                        "Content-Encoding": "gzip"
+                    },
+                    timeout=120
+                )
+                
+                if response.status_code != 200:
+                    self.log_message(f"Error enviando cola offline: {response.status_code}", "ERROR")
+                    break
+                
+                # Retirar lo atendido; los errores temporales (5xx) esperan al siguiente envío
+                results = response.json()["results"]
+                delivered = SmsOutbox.settled_ids(results)
+                self.sms_outbox.ack(delivered)
+                sent += len(delivered)
+                
+                if len(delivered) < len(batch):
+                    break
+            
+            if sent:
+                self.log_message(f"Cola offline enviada: {sent} mensajes", "SUCCESS")
+        
+        except Exception as e:
+            self.log_message(f"Error enviando cola offline: {str(e)}", "ERROR")
+        
+        finally:
+            self.outbox_flush_lock.release()
     
     def start_monitoring(self, instance):
         """Iniciar monitoreo"""
@@ -250,24 +463,68 @@ class JarvisApp(App):
         
         self.log_message("Monitoreo detenido", "WARNING")
     
+    def fetch_conversations(self) -> bool:
+        """
+        Sincronizar conversaciones activas de forma incremental
+        
+        Returns:
+            True si la consulta fue correcta (con o sin cambios)
+        """
+        headers = {}
+        params = {}
+        if self.conversations_etag:
+            headers["If-None-Match"] = self.conversations_etag
+        if self.conversations_version is not None:
+            params["since"] = self.conversations_version
+        
+        response = self.session.get(
+            f"{self.backend_url}/active-conversations",
+            params=params,
+            headers=headers,
+            timeout=5
+        )
+        
+        if response.status_code == 304:
+            # Sin cambios desde la última consulta
+            return True
+        
+        if response.status_code != 200:
+            self.log_message(f"Error obteniendo conversaciones: {response.status_code}", "ERROR")
+            return False
+        
+        data = response.json()
+        
+        if isinstance(data, list):
+            # Respuesta completa
+            self.active_conversations = {conv["phone_number"]: conv for conv in data}
+            self.conversations_version = response.headers.get("X-Conversations-Version")
+        else:
+            # Respuesta delta
+            if data.get("full"):
+                self.active_conversations = {}
+            for conv in data["conversations"]:
+                self.active_conversations[conv["phone_number"]] = conv
+            for phone in data["removed"]:
+                self.active_conversations.pop(phone, None)
+            self.conversations_version = data["version"]
+        
+        self.conversations_etag = response.headers.get("ETag")
+        return True
+    
     def monitoring_loop(self):
         """Loop de monitoreo en background"""
         import time
         
         passive_interval = 300  # 5 minutos
         active_interval = 1     # 1 segundo
+        failures = 0
         
         while self.monitoring_active:
             try:
                 # Obtener conversaciones activas
-                response = requests.get(
-                    f"{self.backend_url}/active-conversations",
-                    timeout=5
-                )
-                
-                if response.status_code == 200:
-                    conversations = response.json()
-                    self.active_conversations = conversations
+                if self.fetch_conversations():
+                    failures = 0
+                    conversations = self.active_conversations
                     
                     # Actualizar UI
                     Clock.schedule_once(
@@ -285,24 +542,122 @@ class JarvisApp(App):
                         self.log_message("Modo PASIVO: próxima verificación en 5 minutos", "INFO")
                         time.sleep(passive_interval)
                 else:
-                    self.log_message(f"Error obteniendo conversaciones: {response.status_code}", "ERROR")
-                    time.sleep(10)
+                    failures += 1
+                    time.sleep(self.backoff_delay(failures))
             
             except Exception as e:
+                failures += 1
                 self.log_message(f"Error en loop de monitoreo: {str(e)}", "ERROR")
-                time.sleep(10)
+                time.sleep(self.backoff_delay(failures))
     
     def update_ui_stats(self):
         """Actualizar estadísticas en UI"""
         # Conversaciones activas
         self.conversations_label.text = str(len(self.active_conversations))
         
-        # Mensajes procesados
-        self.messages_label.text = str(len(self.messages_log))
+        # Mensajes de hoy según el backend (o los procesados localmente)
+        if self.messages_today is not None:
+            self.messages_label.text = str(self.messages_today)
+        else:
+            self.messages_label.text = str(len(self.messages_log))
         
         # Última actualización
         self.last_update_label.text = datetime.now().strftime("%H:%M:%S")
     
+    def show_stats(self, instance):
+        """Pedir estadísticas al backend y mostrarlas"""
+        Thread(target=self.fetch_stats, daemon=True).start()
+    
+    def fetch_stats(self):
+        """Descargar estadísticas precalculadas (/stats) en background"""
+        try:
+            response = self.session.get(f"{self.backend_url}/stats", timeout=10)
+            response.raise_for_status()
+            stats = response.json()
+        except Exception as e:
+            self.log_message(f"No se pudieron obtener estadísticas: {str(e)}", "ERROR")
+            return
+        
+        Clock.schedule_once(lambda dt: self.open_stats_popup(stats), 0)
+    
+    def load_chart_backend(self):
+        """Importar matplotlib sólo la primera vez que se abre la pantalla de estadísticas"""
+        if self.chart_backend is None:
+            try:
+                from matplotlib.figure import Figure
+                from kivy.garden.matplotlib.backend_kivyagg import FigureCanvasKivyAgg
+                self.chart_backend = (Figure, FigureCanvasKivyAgg)
+            except ImportError as e:
+                self.log_message(f"Gráficas no disponibles: {str(e)}", "WARNING")
+                self.chart_backend = False
+        return self.chart_backend or None
+    
+    def open_stats_popup(self, stats: dict):
+        """Pantalla de estadísticas: resumen del día y mensajes por hora"""
+        daily = stats["resolutions"]["day"]
+        day_totals = daily["totals"]
+        hourly = stats["resolutions"]["hour"]
+        
+        # El último bucket diario es hoy
+        self.messages_today = sum(
+            counts[-1] for metric, counts in daily["series"].items() if metric.startswith("messages.")
+        )
+        messages_month = sum(
+            count for metric, count in day_totals.items() if metric.startswith("messages.")
+        )
+        self.update_ui_stats()
+        
+        content = BoxLayout(orientation='vertical', padding=10, spacing=10)
+        
+        summary = GridLayout(cols=2, size_hint_y=0.35, spacing=5)
+        llm_rate = stats.get("llm_rate")
+        rows = [
+            ("Mensajes hoy:", self.messages_today),
+            ("Mensajes (30 días):", messages_month),
+            ("Respondidos por IA:", f"{llm_rate:.0%}" if llm_rate is not None else "-"),
+            ("Citas agendadas:", day_totals.get("bookings.queued", 0) + day_totals.get("bookings.created", 0)),
+            ("Horarios en conflicto:", day_totals.get("bookings.conflict", 0)),
+        ]
+        for label, value in rows:
+            summary.add_widget(Label(text=label, font_size='11sp', bold=True))
+            summary.add_widget(Label(text=str(value), font_size='11sp'))
+        content.add_widget(summary)
+        
+        backend = self.load_chart_backend()
+        if backend:
+            Figure, FigureCanvasKivyAgg = backend
+            figure = Figure(figsize=(4, 3))
+            axes = figure.add_subplot(111)
+            
+            # Últimas 24 horas, barras apiladas por tipo de mensaje
+            bottom = [0] * 24
+            for metric, counts in sorted(hourly["series"].items()):
+                if not metric.startswith("messages."):
+                    continue
+                values = counts[-24:]
+                axes.bar(range(24), values, bottom=bottom, label=metric.split(".", 1)[1])
+                bottom = [b + v for b, v in zip(bottom, values)]
+            axes.set_title("Mensajes por hora (24 h)", fontsize=9)
+            axes.tick_params(labelsize=7)
+            if any(bottom):
+                axes.legend(fontsize=6)
+            content.add_widget(FigureCanvasKivyAgg(figure))
+        
+        close_button = Button(text='Cerrar', size_hint_y=0.1)
+        content.add_widget(close_button)
+        
+        popup = Popup(title='Estadísticas', content=content, size_hint=(0.95, 0.9))
+        close_button.bind(on_press=popup.dismiss)
+        popup.open()
+    
+    def apply_tenant_headers(self):
+        """Identificar al propietario en todas las solicitudes (backend multi-propietario)"""
+        for header, value in (("X-Tenant-ID", self.tenant_id), ("X-Tenant-Key", self.tenant_key)):
+            if value:
+                self.session.headers[header] = value
+            else:
+                self.session.headers.pop(header, None)
+    
     def show_config(self, instance):
         """Mostrar diálogo de configuración"""
         content = BoxLayout(orientation='vertical', padding=10, spacing=10)
@@ -334,6 +689,24 @@ class JarvisApp(App):
         )
         content.add_widget(phone_input)
         
+        # Propietario en el backend (vacío = propietario por defecto)
+        content.add_widget(Label(text='ID de Propietario:', size_hint_y=0.1, bold=True))
+        tenant_input = TextInput(
+            text=self.tenant_id,
+            multiline=False,
+            size_hint_y=0.1
+        )
+        content.add_widget(tenant_input)
+        
+        content.add_widget(Label(text='Clave de Propietario:', size_hint_y=0.1, bold=True))
+        tenant_key_input = TextInput(
+            text=self.tenant_key,
+            multiline=False,
+            password=True,
+            size_hint_y=0.1
+        )
+        content.add_widget(tenant_key_input)
+        
         # Botones
         buttons = BoxLayout(size_hint_y=0.2, spacing=10)
         
@@ -353,7 +726,14 @@ class JarvisApp(App):
         )
         
         def save_config(instance):
+            if backend_input.text != self.backend_url or tenant_input.text != self.tenant_id:
+                # Otro backend o propietario: descartar el estado sincronizado
+                self.conversations_version = None
+                self.conversations_etag = None
             self.backend_url = backend_input.text
+            self.tenant_id = tenant_input.text.strip()
+            self.tenant_key = tenant_key_input.text.strip()
+            self.apply_tenant_headers()
             self.owner_name = name_input.text
             self.owner_phone = phone_input.text
             self.log_message("Configuración guardada", "SUCCESS")
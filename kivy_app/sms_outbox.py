@@ -0,0 +1,140 @@
+"""
+Bandeja de salida offline de SMS
+Cola SQLite en el directorio de datos de la app, con límite de tamaño
+"""
+
+import os
+import json
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List
+
+# Errores 4xx que no mejoran al reintentar (el mensaje se retira de la cola)
+PERMANENT_CLIENT_ERRORS = frozenset({400, 404, 409, 413, 422})
+
+
+class SmsOutbox:
+    """Cola persistente de SMS capturados pendientes de enviar al backend"""
+
+    def __init__(self, data_dir: str, max_bytes: int = 5 * 1024 * 1024):
+        """
+        Inicializar cola
+
+        Args:
+            data_dir: Directorio de datos de la app (App.user_data_dir)
+            max_bytes: Tamaño máximo de los mensajes guardados; al superarlo
+                       se descartan los más antiguos
+        """
+        os.makedirs(data_dir, exist_ok=True)
+        self.db_path = os.path.join(data_dir, 'sms_outbox.db')
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sms_outbox (
+                    message_id TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_sms_outbox_created "
+                "ON sms_outbox (created_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abrir conexión a la base de datos"""
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    @staticmethod
+    def message_key(message: Dict) -> str:
+        """ID del mensaje o, si falta, hash de su contenido"""
+        if message.get("message_id"):
+            return message["message_id"]
+        raw = f"{message.get('phone_number')}|{message.get('timestamp')}|{message.get('message_text')}"
+        return "sha1:" + hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def enqueue(self, message: Dict) -> bool:
+        """
+        Guardar un SMS capturado
+
+        Args:
+            message: Dict con phone_number, message_text, timestamp, message_id
+
+        Returns:
+            True si era nuevo, False si ya estaba en cola
+        """
+        message = dict(message, message_id=self.message_key(message))
+        payload = json.dumps(message, ensure_ascii=False)
+
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO sms_outbox (message_id, payload, size, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (message["message_id"], payload, len(payload.encode("utf-8")), time.time())
+            )
+            inserted = cursor.rowcount == 1
+            if inserted:
+                self._evict(conn)
+
+        return inserted
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Descartar los mensajes más antiguos si se supera el límite"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM sms_outbox").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        excess = total - self.max_bytes
+        freed = 0
+        doomed = []
+        for message_id, size in conn.execute(
+            "SELECT message_id, size FROM sms_outbox ORDER BY created_at"
+        ):
+            doomed.append((message_id,))
+            freed += size
+            if freed >= excess:
+                break
+
+        conn.executemany("DELETE FROM sms_outbox WHERE message_id = ?", doomed)
+
+    def peek(self, limit: int = 20) -> List[Dict]:
+        """Mensajes más antiguos pendientes, sin retirarlos"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT payload FROM sms_outbox ORDER BY created_at LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    @staticmethod
+    def is_settled(status: int) -> bool:
+        """
+        ¿El backend terminó con el mensaje?
+
+        2xx y 409 (duplicado) ya están atendidos; los 4xx de validación no
+        cambian al reintentar. 5xx, 408 y 429 se quedan en cola.
+        """
+        return 200 <= status < 300 or status in PERMANENT_CLIENT_ERRORS
+
+    @classmethod
+    def settled_ids(cls, results: Iterable[Dict]) -> List[str]:
+        """IDs de un resultado de /analyze-messages/batch que se pueden retirar"""
+        return [r["message_id"] for r in results if cls.is_settled(r["status"])]
+
+    def ack(self, message_ids: List[str]):
+        """Retirar mensajes ya entregados"""
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "DELETE FROM sms_outbox WHERE message_id = ?",
+                [(mid,) for mid in message_ids]
+            )
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM sms_outbox").fetchone()[0]
@@ -3,22 +3,37 @@ Jarvis - Asistente Personal SMS con IA
 Backend FastAPI para monitoreo inteligente de SMS y gestión de citas
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, Response, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, List
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict
 import os
 import json
+import gzip
+import hashlib
+import hmac
 import logging
+import time
 from datetime import datetime, timedelta
 import pytz
 import asyncio
 from enum import Enum
 
 # Importar módulos de Jarvis
-from jarvis.ai import AIAgent
+from jarvis.ai import AIAgent, mark_not_spam_in_worker
 from jarvis.calendar import GoogleCalendarManager
 from jarvis.database import ClientDatabase
+from jarvis.responses import ResponseGenerator
+from jarvis.slot_cache import SlotCache
+from jarvis.outbox import CalendarOutbox
+from jarvis.dedupe import IdempotencyStore
+from jarvis.tenants import Tenant, TenantSettings, load_tenant_settings, DEFAULT_TENANT
+from jarvis.partitions import Partition
+from jarvis.transcripts import TranscriptStore, DIRECTION_IN, DIRECTION_OUT
+from jarvis.tracing import span, current_request_id, new_request_id
+from jarvis.profiler import SamplingProfiler, profile_for
+from jarvis.serialization import JSONBytesResponse, ResponseCache
 
 # Configuración de logging
 logging.basicConfig(level=logging.INFO)
@@ -40,6 +55,51 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Perfiles de solicitudes individuales (X-Profile), los más recientes
+request_profiles: dict = {}
+MAX_REQUEST_PROFILES = 20
+
+
+def is_admin(request: Request) -> bool:
+    """Verificar token de administración (ADMIN_TOKEN)"""
+    token = os.getenv("ADMIN_TOKEN", "")
+    return bool(token) and request.headers.get("x-admin-token") == token
+
+
+@app.middleware("http")
+async def tracing_middleware(request: Request, call_next):
+    """
+    Asignar request id y span raíz a cada solicitud
+    
+    Con X-Profile: 1 (y X-Admin-Token) la solicitud se perfila por muestreo;
+    el perfil queda en GET /admin/profiles/{request_id}.
+    """
+    request_id = request.headers.get("x-request-id") or new_request_id()
+    token = current_request_id.set(request_id)
+
+    profiler = None
+    if request.headers.get("x-profile") and is_admin(request):
+        profiler = SamplingProfiler()
+        profiler.start()
+
+    try:
+        with span("http.request", method=request.method, path=request.url.path,
+                  tenant=request.headers.get("x-tenant-id")) as attrs:
+            response = await call_next(request)
+            attrs["status_code"] = response.status_code
+    finally:
+        current_request_id.reset(token)
+        if profiler:
+            request_profiles[request_id] = await asyncio.to_thread(profiler.stop)
+            while len(request_profiles) > MAX_REQUEST_PROFILES:
+                request_profiles.pop(next(iter(request_profiles)))
+
+    response.headers["X-Request-ID"] = request_id
+    if profiler:
+        response.headers["X-Profile-ID"] = request_id
+    return response
+
+
 # ==================== MODELOS ====================
 
 class MessageType(str, Enum):
@@ -58,6 +118,15 @@ class SMSMessage(BaseModel):
     message_id: Optional[str] = None
 
 
+class ScreenDump(BaseModel):
+    """Volcado de texto de pantalla enviado por el servicio de accesibilidad"""
+    conversation_id: str
+    content: str
+    package_name: Optional[str] = None
+    timestamp: Optional[str] = None
+    outgoing: List[str] = []  # líneas que el cliente sabe que son salientes (propietario)
+
+
 class MessageAnalysis(BaseModel):
     """Análisis de mensaje por IA"""
     message_type: MessageType
@@ -67,6 +136,11 @@ class MessageAnalysis(BaseModel):
     confidence: float
     requires_response: bool
     suggested_response: str
+    merged_messages: int = Field(1, description="Mensajes del mismo número analizados juntos")
+    merged_position: int = Field(
+        1, description="Posición del mensaje en su grupo (1..merged_messages); la respuesta "
+                       "sugerida va sólo en el último, los anteriores traen requires_response=false"
+    )
 
 
 class MonitoringConfig(BaseModel):
@@ -78,166 +152,295 @@ class MonitoringConfig(BaseModel):
     active_mode: bool = False
 
 
-class ConversationState(BaseModel):
-    """Estado de una conversación activa"""
-    phone_number: str
-    last_message_time: str
-    conversation_active: bool
-    appointment_scheduled: bool
-    context: dict
-
-
 # ==================== VARIABLES GLOBALES ====================
 
-# Servicios
-ai_agent: Optional[AIAgent] = None
-calendar_manager: Optional[GoogleCalendarManager] = None
-db: Optional[ClientDatabase] = None
-
-# Configuración
-config: Optional[MonitoringConfig] = None
+# Propietarios atendidos por este proceso (tenant_id -> Tenant)
+tenants: Dict[str, Tenant] = {}
 
-# Estado de conversaciones activas
-active_conversations: dict = {}
+# Propietario de las solicitudes sin X-Tenant-ID
+default_tenant_id: Optional[str] = DEFAULT_TENANT
 
 # Zona horaria
 TZ_MEXICO = pytz.timezone('America/Mexico_City')
 
+# Segundos que /health reutiliza sus estadísticas ya codificadas
+HEALTH_CACHE_SECONDS = float(os.getenv("HEALTH_CACHE_SECONDS", "1"))
+
 
 # ==================== FUNCIONES AUXILIARES ====================
 
-def get_greeting_by_hour() -> str:
-    """Obtener saludo formal según la hora del día"""
-    now = datetime.now(TZ_MEXICO)
-    hour = now.hour
+def get_tenant(request: Request) -> Tenant:
+    """
+    Propietario de la solicitud
+    
+    Se elige con el header X-Tenant-ID (o ?tenant=); sin él, el propietario
+    por defecto. Si el propietario tiene api_key se exige X-Tenant-Key.
+    """
+    tenant_id = (
+        request.headers.get("x-tenant-id")
+        or request.query_params.get("tenant")
+        or default_tenant_id
+    )
+    if not tenant_id:
+        raise HTTPException(status_code=400, detail="X-Tenant-ID required")
 
-    if 6 <= hour < 12:
-        return "Buenos días"
-    elif 12 <= hour < 18:
-        return "Buenas tardes"
-    else:
-        return "Buenas noches"
+    tenant = tenants.get(tenant_id)
+    if tenant is None:
+        raise HTTPException(status_code=404, detail="Unknown tenant")
+
+    api_key = tenant.settings.api_key
+    if api_key and not hmac.compare_digest(request.headers.get("x-tenant-key", ""), api_key):
+        raise HTTPException(status_code=403, detail="Invalid tenant key")
 
+    return tenant
 
-def get_formal_greeting(client_name: Optional[str] = None) -> str:
+
+def get_formal_greeting(tenant: Tenant, client_name: Optional[str] = None) -> str:
     """Obtener saludo formal completo"""
-    greeting = get_greeting_by_hour()
-    if config:
-        response = f"{greeting}, mi nombre es Jarvis, soy el asistente personal del Sr. {config.owner_name}. "
-        response += "¿Puedo ayudarlo programando alguna cita o recordándole que se comunique con usted en la brevedad?"
-        return response
-    return greeting
-
-
-def is_conversation_active(phone_number: str) -> bool:
-    """Verificar si hay una conversación activa"""
-    if phone_number in active_conversations:
-        conv = active_conversations[phone_number]
-        if conv["conversation_active"]:
-            return True
-    return False
-
-
-def mark_conversation_active(phone_number: str):
-    """Marcar conversación como activa"""
-    if phone_number not in active_conversations:
-        active_conversations[phone_number] = {
-            "phone_number": phone_number,
-            "last_message_time": datetime.now(TZ_MEXICO).isoformat(),
-            "conversation_active": True,
-            "appointment_scheduled": False,
-            "context": {}
-        }
-    else:
-        active_conversations[phone_number]["conversation_active"] = True
-        active_conversations[phone_number]["last_message_time"] = datetime.now(TZ_MEXICO).isoformat()
+    if tenant.responder:
+        return tenant.responder.introduction()
+    return ResponseGenerator().greeting()
 
 
-def mark_conversation_inactive(phone_number: str):
-    """Marcar conversación como inactiva"""
-    if phone_number in active_conversations:
-        active_conversations[phone_number]["conversation_active"] = False
+def slot_conflict(tenant: Tenant, start: datetime, duration_minutes: int) -> HTTPException:
+    """Construir error 409 con el horario libre más cercano como alternativa"""
+    alternative = None
+    if tenant.slot_cache:
+        alternative = tenant.slot_cache.nearest_slot(
+            start, duration_minutes, exclude=tenant.reservations.is_reserved
+        )
+
+    logger.info(f"🔒 Horario ocupado: {start.isoformat()} [{tenant.tenant_id}]")
+
+    return HTTPException(
+        status_code=409,
+        detail={
+            "message": "Horario no disponible",
+            "alternative": alternative
+        }
+    )
 
 
 # ==================== ENDPOINTS ====================
 
-@app.on_event("startup")
-async def startup_event():
-    """Inicializar servicios al iniciar la app"""
-    global ai_agent, calendar_manager, db, config
-    
-    logger.info("🚀 Iniciando Jarvis Backend...")
-    
+def timed(timings: dict, name: str, func, *args):
+    """Ejecutar una función registrando su duración en ms"""
+    start = time.perf_counter()
     try:
-        # Cargar configuración desde variables de entorno
-        config = MonitoringConfig(
-            owner_name=os.getenv("OWNER_NAME", "Sergio Sanchez"),
-            owner_phone=os.getenv("OWNER_PHONE", "+14084223904"),
-            hf_token=os.getenv("HF_TOKEN", ""),
-            passive_interval_minutes=int(os.getenv("PASSIVE_INTERVAL", "5"))
-        )
-        logger.info(f"✅ Configuración cargada: {config.owner_name}")
-    except Exception as e:
-        logger.error(f"❌ Error cargando configuración: {e}")
-        config = None
+        return func(*args)
+    finally:
+        timings[name] = (time.perf_counter() - start) * 1000
+
 
+def init_ai_agent(config: MonitoringConfig) -> Optional[AIAgent]:
+    """Inicializar agente de IA (token y cachés propios del propietario)"""
     try:
-        # Inicializar IA
-        if config and config.hf_token:
-            ai_agent = AIAgent(hf_token=config.hf_token)
-            logger.info("✅ Agente IA inicializado (Mistral 7B)")
-        else:
-            logger.warning("⚠️ HF_TOKEN no configurado")
+        agent = AIAgent(hf_token=config.hf_token)
+        if agent.router.available():
+            logger.info(f"✅ Agente IA inicializado ({agent.router.describe()}): {config.owner_name}")
+            return agent
+        logger.warning(f"⚠️ HF_TOKEN no configurado ni otro backend disponible: {config.owner_name}")
     except Exception as e:
         logger.error(f"❌ Error inicializando IA: {e}")
+    return None
+
 
+def init_calendar(settings: TenantSettings) -> Optional[GoogleCalendarManager]:
+    """
+    Inicializar Google Calendar del propietario
+    
+    El cliente de la API se construye en el primer uso, no aquí.
+    """
     try:
-        # Inicializar Google Calendar
-        creds_json = os.getenv("GOOGLE_CALENDAR_CREDENTIALS", "")
-        if creds_json:
-            creds = json.loads(creds_json)
-            calendar_manager = GoogleCalendarManager(creds)
-            logger.info("✅ Google Calendar inicializado")
-        else:
-            logger.warning("⚠️ GOOGLE_CALENDAR_CREDENTIALS no configurado")
+        if settings.calendar_credentials:
+            manager = GoogleCalendarManager(settings.calendar_credentials, settings.calendar_id)
+            logger.info(f"✅ Google Calendar inicializado: {settings.tenant_id}")
+            return manager
+        logger.warning(f"⚠️ GOOGLE_CALENDAR_CREDENTIALS no configurado: {settings.tenant_id}")
     except Exception as e:
         logger.error(f"❌ Error inicializando Calendar: {e}")
+    return None
+
+
+def init_outbox(settings: TenantSettings) -> Optional[CalendarOutbox]:
+    """Inicializar bandeja de salida de citas del propietario"""
+    try:
+        box = CalendarOutbox(settings.data_file("jarvis_outbox.db"))
+        logger.info(f"✅ Bandeja de salida lista ({box.pending_count()} pendientes): {settings.tenant_id}")
+        return box
+    except Exception as e:
+        logger.error(f"❌ Error inicializando bandeja de salida: {e}")
+    return None
+
 
+def init_database(settings: TenantSettings) -> Optional[ClientDatabase]:
+    """Inicializar base de datos del propietario"""
     try:
-        # Inicializar base de datos
-        db = ClientDatabase("jarvis_clients.db")
-        logger.info("✅ Base de datos inicializada")
+        database = ClientDatabase(settings.data_file("jarvis_clients.db"))
+        logger.info(f"✅ Base de datos inicializada: {settings.tenant_id}")
+        return database
     except Exception as e:
         logger.error(f"❌ Error inicializando BD: {e}")
+    return None
 
-    logger.info("✅ Jarvis Backend listo para recibir solicitudes")
+
+async def init_tenant(settings: TenantSettings, timings: dict) -> Tenant:
+    """Inicializar configuración, servicios y workers de un propietario"""
+    config = MonitoringConfig(
+        owner_name=settings.owner_name,
+        owner_phone=settings.owner_phone,
+        hf_token=settings.hf_token,
+        passive_interval_minutes=settings.passive_interval_minutes
+    )
+    tenant = Tenant(settings, config)
+    tenant.build_responder()
+    logger.info(f"✅ Configuración cargada: {config.owner_name} [{settings.tenant_id}]")
+
+    # Servicios independientes entre sí: inicializar en paralelo
+    prefix = f"{settings.tenant_id}."
+    (tenant.ai_agent, tenant.calendar_manager, tenant.outbox,
+     tenant.db, tenant.transcripts) = await asyncio.gather(
+        asyncio.to_thread(timed, timings, prefix + "ia", init_ai_agent, config),
+        asyncio.to_thread(timed, timings, prefix + "calendar", init_calendar, settings),
+        asyncio.to_thread(timed, timings, prefix + "outbox", init_outbox, settings),
+        asyncio.to_thread(timed, timings, prefix + "bd", init_database, settings),
+        asyncio.to_thread(timed, timings, prefix + "transcripts", init_transcripts, settings)
+    )
+
+    # Procesos de partición (con PARTITION_PROCESSES=true)
+    tenant.partitions.start()
+
+    if tenant.transcripts:
+        asyncio.create_task(transcript_maintenance_loop(tenant))
+
+    if tenant.ai_agent and tenant.ai_agent.warmer.backends:
+        asyncio.create_task(model_warmup_loop(tenant))
+
+    if tenant.calendar_manager:
+        tenant.slot_cache = SlotCache(
+            tenant.calendar_manager,
+            days_ahead=int(os.getenv("SLOT_CACHE_DAYS", "7")),
+            max_age_seconds=int(os.getenv("SLOT_CACHE_REFRESH_SECONDS", "300"))
+        )
+        asyncio.create_task(slot_cache_loop(tenant))
+        logger.info(f"✅ Caché de slots programada: {settings.tenant_id}")
+
+        if tenant.outbox:
+            restore_pending_bookings(tenant)
+            asyncio.create_task(calendar_outbox_loop(tenant))
+    else:
+        tenant.outbox = None
+
+    return tenant
+
+
+def init_transcripts(settings: TenantSettings) -> Optional[TranscriptStore]:
+    """Inicializar historial de conversaciones del propietario"""
+    try:
+        store = TranscriptStore(
+            settings.data_file("transcripts"),
+            segment_max_bytes=int(os.getenv("TRANSCRIPT_SEGMENT_MB", "8")) * 1024 * 1024,
+            retention_days=float(os.getenv("TRANSCRIPT_RETENTION_DAYS", "90"))
+        )
+        return store
+    except Exception as e:
+        logger.error(f"❌ Error inicializando transcripciones: {e}")
+    return None
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Inicializar servicios de todos los propietarios al iniciar la app"""
+    global default_tenant_id
+    
+    logger.info("🚀 Iniciando Jarvis Backend...")
+    startup_start = time.perf_counter()
+    timings = {}
+    
+    try:
+        all_settings = load_tenant_settings()
+    except Exception as e:
+        logger.error(f"❌ Error cargando propietarios: {e}")
+        all_settings = []
+
+    # Propietarios independientes entre sí: inicializar en paralelo
+    initialized = await asyncio.gather(
+        *(init_tenant(settings, timings) for settings in all_settings)
+    )
+    tenants.clear()
+    tenants.update({tenant.tenant_id: tenant for tenant in initialized})
+
+    # Sin X-Tenant-ID: "default", o el único propietario si sólo hay uno
+    if DEFAULT_TENANT in tenants:
+        default_tenant_id = DEFAULT_TENANT
+    elif len(tenants) == 1:
+        default_tenant_id = next(iter(tenants))
+    else:
+        default_tenant_id = None
+
+    total_ms = (time.perf_counter() - startup_start) * 1000
+    breakdown = ", ".join(f"{name} {ms:.0f} ms" for name, ms in timings.items())
+    logger.info(f"⏱️ Arranque en {total_ms:.0f} ms ({breakdown})")
+
+    logger.info(f"✅ Jarvis Backend listo para recibir solicitudes ({len(tenants)} propietarios)")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Detener los procesos de partición"""
+    for tenant in tenants.values():
+        tenant.partitions.close()
 
 
 @app.get("/")
 async def root():
     """Endpoint raíz"""
+    default = tenants.get(default_tenant_id) if default_tenant_id else None
     return {
         "status": "online",
         "service": "Jarvis - Asistente Personal SMS",
         "version": "2.0.0",
-        "owner": config.owner_name if config else "Unknown"
+        "owner": default.config.owner_name if default and default.config else "Unknown",
+        "tenants": len(tenants)
     }
 
 
 @app.get("/health")
-async def health_check():
-    """Verificar salud del servicio"""
-    return {
-        "status": "healthy",
-        "ai_agent": ai_agent is not None,
-        "calendar_manager": calendar_manager is not None,
-        "database": db is not None,
-        "config_loaded": config is not None
-    }
+async def health_check(tenant: Tenant = Depends(get_tenant)):
+    """
+    Verificar salud del servicio (para el propietario de la solicitud)
+    
+    Las estadísticas se recalculan a lo más cada HEALTH_CACHE_SECONDS.
+    Con procesos de partición, la caché semántica, las huellas de publicidad,
+    las latencias de inferencia y el calentamiento son los del proceso
+    principal: cada proceso de partición lleva los suyos.
+    """
+    def build():
+        ai_agent = tenant.ai_agent
+        return {
+            "status": "healthy",
+            "tenant": tenant.stats(),
+            "ai_agent": ai_agent is not None,
+            "ai_stats_scope": "main_process" if tenant.partitions.mode == "process" else "all",
+            "semantic_cache": ai_agent.semantic_cache.stats() if ai_agent and ai_agent.semantic_cache is not None else None,
+            "ad_index": ai_agent.ad_index.stats() if ai_agent else None,
+            "inference": ai_agent.router.stats() if ai_agent else None,
+            "warmup": ai_agent.warmer.stats() if ai_agent else None,
+            "coalescing": tenant.coalescer.stats(),
+            "partitions": tenant.partitions.stats(),
+            "calendar_manager": tenant.calendar_manager is not None,
+            "database": tenant.db is not None,
+            "transcripts": tenant.transcripts.stats() if tenant.transcripts else None,
+            "responses": tenant.response_cache.stats(),
+            "config_loaded": tenant.config is not None
+        }
+
+    version = ResponseCache.ttl_version(HEALTH_CACHE_SECONDS)
+    return JSONBytesResponse(tenant.response_cache.get("health", version, build))
 
 
 @app.post("/analyze-message")
-async def analyze_message(message: SMSMessage) -> MessageAnalysis:
+async def analyze_message(message: SMSMessage, tenant: Tenant = Depends(get_tenant)) -> MessageAnalysis:
     """
     Analizar un mensaje SMS y determinar tipo y respuesta
     
@@ -245,37 +448,245 @@ async def analyze_message(message: SMSMessage) -> MessageAnalysis:
     - Si es publicidad → ignorar
     - Si requiere respuesta inmediata → responder y marcar conversación activa
     - Si es solicitud de cita → agendar y responder
+    
+    Idempotente por message_id (o hash de hora y contenido): un reintento
+    recibe el análisis original sin volver a llamar a la IA. Sin message_id
+    ni timestamp, el mismo texto sólo se considera reintento por unos segundos.
     """
     
-    if not ai_agent:
+    if not tenant.ai_agent:
         raise HTTPException(status_code=503, detail="AI Agent not initialized")
 
+    idempotency = tenant.idempotency
+    inflight_messages = tenant.inflight_messages
+
+    key = IdempotencyStore.key_for(
+        message.phone_number, message.message_text, message.message_id, message.timestamp
+    )
+
+    cached = idempotency.get(key)
+    if cached is not None:
+        logger.info(f"♻️ Mensaje duplicado: {message.phone_number} - {key}")
+        return cached
+
+    pending = inflight_messages.get(key)
+    if pending is not None:
+        # El mismo mensaje se está procesando: esperar ese resultado
+        result = await pending
+        if result is None:
+            raise HTTPException(status_code=500, detail="Original request failed, retry")
+        return result
+
+    if idempotency.seen(key):
+        # Visto dentro de la ventana (confirmado en el índice exacto, no sólo
+        # por el filtro de Bloom) pero su resultado ya salió del LRU
+        raise HTTPException(status_code=409, detail="Duplicate message")
+
+    future = asyncio.get_running_loop().create_future()
+    inflight_messages[key] = future
+
     try:
-        # Analizar mensaje con IA
-        analysis = ai_agent.analyze_message(message.message_text)
-        
-        logger.info(f"📊 Análisis: {message.phone_number} - {analysis['message_type']}")
-        
-        # Determinar si requiere respuesta
-        requires_response = analysis["message_type"] != MessageType.ADVERTISEMENT
-        
-        if requires_response:
-            mark_conversation_active(message.phone_number)
-        
-        return MessageAnalysis(
-            message_type=analysis["message_type"],
-            client_name=analysis.get("client_name"),
-            proposed_date=analysis.get("proposed_date"),
-            proposed_time=analysis.get("proposed_time"),
-            confidence=analysis.get("confidence", 0.0),
-            requires_response=requires_response,
-            suggested_response=analysis.get("suggested_response", get_formal_greeting())
+        result, index, count = await tenant.coalescer.submit(
+            message.phone_number, message,
+            lambda burst: tenant.partitions.submit(
+                message.phone_number, lambda partition: process_messages(tenant, burst, partition)
+            )
         )
+        if index < count - 1:
+            # Agrupado con mensajes posteriores: la respuesta va en el último
+            result = result.model_copy(update={
+                "requires_response": False, "suggested_response": "", "merged_position": index + 1
+            })
+        elif count > 1:
+            result = result.model_copy(update={"merged_position": count})
+
+        idempotency.put(key, result)
+        future.set_result(result)
+        return result
     
     except Exception as e:
+        future.set_result(None)
         logger.error(f"❌ Error analizando mensaje: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    finally:
+        inflight_messages.pop(key, None)
+
+
+async def process_messages(tenant: Tenant, messages: List[SMSMessage],
+                           partition: Partition) -> MessageAnalysis:
+    """
+    Analizar uno o varios mensajes seguidos de un mismo número como uno solo
+    
+    Una llamada a la IA y una respuesta para todo el grupo; cada mensaje
+    entrante queda en el historial por separado. Corre en la partición del
+    número: los mensajes de un remitente se procesan en orden.
+    """
+    phone_number = messages[0].phone_number
+    message_text = " ".join(m.message_text for m in messages)
+
+    # Analizar mensaje con IA (fuera del event loop)
+    analysis = await tenant.analyze(partition, message_text)
+    
+    logger.info(f"📊 Análisis: {phone_number} - {analysis['message_type']}")
+
+    message_type = analysis["message_type"]
+    if message_type not in MessageType._value2member_map_:
+        message_type = MessageType.UNKNOWN.value
+    tenant.stats_rollup.record(f"messages.{message_type}")
+    tenant.stats_rollup.record(f"analysis.{analysis.get('source', 'llm')}")
+    if len(messages) > 1:
+        tenant.stats_rollup.record("messages.coalesced", len(messages) - 1)
+    
+    # Determinar si requiere respuesta
+    requires_response = analysis["message_type"] != MessageType.ADVERTISEMENT
+    
+    if requires_response:
+        tenant.mark_conversation_active(phone_number)
+
+    # Plantilla si la intención es clara; si no, la respuesta del LLM
+    suggested_response = None
+    if tenant.responder:
+        slots = None
+        if analysis["message_type"] == MessageType.APPOINTMENT_REQUEST and tenant.slot_cache:
+            slots = tenant.slot_cache.get_slots(limit=3, exclude=tenant.reservations.is_reserved)
+        suggested_response = tenant.responder.respond(message_text, analysis, slots)
+    if not suggested_response:
+        suggested_response = analysis.get("suggested_response") or get_formal_greeting(tenant)
+    
+    if tenant.transcripts:
+        for message in messages:
+            tenant.transcripts.append(
+                phone_number, DIRECTION_IN, message.message_text,
+                message_id=message.message_id, message_type=str(analysis["message_type"])
+            )
+        if requires_response:
+            tenant.transcripts.append(phone_number, DIRECTION_OUT, suggested_response)
+
+    if requires_response:
+        # Al aparecer en pantalla no debe analizarse como mensaje del cliente
+        tenant.screen_tracker.record_outgoing(phone_number, suggested_response)
+
+    return MessageAnalysis(
+        message_type=analysis["message_type"],
+        client_name=analysis.get("client_name"),
+        proposed_date=analysis.get("proposed_date"),
+        proposed_time=analysis.get("proposed_time"),
+        confidence=analysis.get("confidence", 0.0),
+        requires_response=requires_response,
+        suggested_response=suggested_response,
+        merged_messages=len(messages)
+    )
+
+
+@app.post("/generate-response")
+async def generate_response(message: SMSMessage, tenant: Tenant = Depends(get_tenant)):
+    """
+    Generar respuesta para un mensaje
+    
+    Saludos y despedidas se responden con plantilla; el resto va al LLM.
+    """
+    
+    source = "template"
+    response = tenant.responder.respond(message.message_text, {}) if tenant.responder else None
+
+    if not response:
+        if not tenant.ai_agent:
+            raise HTTPException(status_code=503, detail="AI Agent not initialized")
+
+        owner_name = tenant.config.owner_name if tenant.config else "Sergio"
+        response = await tenant.run(tenant.ai_agent.generate_response, message.message_text, owner_name)
+        source = "llm"
+
+    if tenant.transcripts:
+        tenant.transcripts.append(message.phone_number, DIRECTION_OUT, response, source=source)
+    tenant.screen_tracker.record_outgoing(message.phone_number, response)
+
+    return {"response": response, "source": source}
+
+
+@app.post("/analyze-messages/batch")
+async def analyze_messages_batch(request: Request, tenant: Tenant = Depends(get_tenant)):
+    """
+    Analizar un lote de SMS acumulados sin conexión en el dispositivo
+    
+    Cuerpo: lista JSON de SMSMessage, opcionalmente con Content-Encoding: gzip.
+    Devuelve un resultado por mensaje para que el cliente retire de su cola
+    sólo los que no deba reintentar.
+    """
+    
+    raw = await request.body()
+    try:
+        if request.headers.get("content-encoding", "").lower() == "gzip":
+            raw = gzip.decompress(raw)
+        messages = [SMSMessage(**m) for m in json.loads(raw)]
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch: {e}")
+
+    async def analyze_one(message: SMSMessage) -> dict:
+        try:
+            analysis = await analyze_message(message, tenant)
+            return {
+                "message_id": message.message_id,
+                "status": 200,
+                "analysis": analysis
+            }
+        except HTTPException as e:
+            return {
+                "message_id": message.message_id,
+                "status": e.status_code,
+                "error": e.detail
+            }
+
+    # A la vez: las particiones conservan el orden de cada número y los
+    # mensajes seguidos de un número se agrupan si hay ventana
+    results = list(await asyncio.gather(*(analyze_one(m) for m in messages)))
+
+    logger.info(f"📦 Lote procesado: {len(messages)} mensajes")
+
+    return {"results": results}
+
+
+@app.post("/screen-dump")
+async def ingest_screen_dump(dump: ScreenDump, tenant: Tenant = Depends(get_tenant)):
+    """
+    Ingerir un volcado de pantalla de la app de mensajes
+    
+    - Volcado idéntico al anterior → se descarta sin más trabajo
+    - Si cambió → diff por líneas y sólo los mensajes entrantes nuevos se
+      analizan (las respuestas de Jarvis y las líneas en `outgoing` no)
+    """
+    
+    new_lines = tenant.screen_tracker.ingest(dump.conversation_id, dump.content, dump.outgoing)
+
+    if new_lines is None:
+        return {"status": "unchanged", "new_messages": [], "analyses": []}
+
+    timestamp = dump.timestamp or datetime.now(TZ_MEXICO).isoformat()
+    # Un id por volcado y posición: dos "Sí" seguidos son mensajes distintos
+    dump_id = hashlib.blake2b(dump.content.encode("utf-8"), digest_size=8).hexdigest()
+
+    # A la vez y en orden: la partición del número conserva el orden y la
+    # ventana de agrupación puede juntarlas en un solo análisis
+    analyses = list(await asyncio.gather(*(
+        analyze_message(SMSMessage(
+            phone_number=dump.conversation_id,
+            message_text=line,
+            timestamp=timestamp,
+            message_id=f"screen:{dump_id}:{index}"
+        ), tenant)
+        for index, line in enumerate(new_lines)
+    )))
+
+    if new_lines:
+        logger.info(f"🖥️ {len(new_lines)} mensajes nuevos en pantalla: {dump.conversation_id}")
+
+    return {
+        "status": "processed",
+        "new_messages": new_lines,
+        "analyses": analyses
+    }
+
 
 @app.post("/schedule-appointment")
 async def schedule_appointment(
@@ -283,66 +694,271 @@ async def schedule_appointment(
     client_name: str,
     proposed_date: str,
     proposed_time: str,
-    background_tasks: BackgroundTasks
+    background_tasks: BackgroundTasks,
+    duration_minutes: int = 30,
+    tenant: Tenant = Depends(get_tenant)
 ):
     """
     Agendar una cita en Google Calendar
+    
+    El horario se reserva primero en la tabla de reservas: si otra solicitud
+    ya tiene un intervalo solapado se rechaza con 409 y una alternativa.
+    La cita se guarda en la bandeja de salida local y se responde de
+    inmediato; un worker la envía a Google Calendar con reintentos.
     """
     
+    calendar_manager = tenant.calendar_manager
+    slot_cache = tenant.slot_cache
+    reservations = tenant.reservations
+    responder = tenant.responder
+
     if not calendar_manager:
         raise HTTPException(status_code=503, detail="Calendar Manager not initialized")
 
     try:
+        start = TZ_MEXICO.localize(
+            datetime.strptime(f"{proposed_date} {proposed_time}", "%Y-%m-%d %H:%M")
+        )
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Invalid proposed_date/proposed_time")
+    end = start + timedelta(minutes=duration_minutes)
+
+    reservation_id = reservations.reserve(start, end, owner=phone_number)
+    if not reservation_id:
+        tenant.stats_rollup.record("bookings.conflict")
+        raise slot_conflict(tenant, start, duration_minutes)
+
+    try:
+        # La caché (hasta SLOT_CACHE_REFRESH_SECONDS de antigüedad) sólo sirve
+        # para rechazar rápido: un "libre" se confirma con el calendario real
+        available = slot_cache.is_free(start, duration_minutes) if slot_cache else None
+        if available is not False:
+            available = await tenant.run(
+                calendar_manager.check_availability, start.isoformat(), end.isoformat()
+            )
+        if not available:
+            reservations.release(reservation_id)
+            tenant.stats_rollup.record("bookings.conflict")
+            raise slot_conflict(tenant, start, duration_minutes)
+
         # Crear evento
         event = {
             "summary": f"Cita con {client_name}",
             "description": f"Cliente: {client_name}\nTeléfono: {phone_number}",
             "start": {
-                "dateTime": f"{proposed_date}T{proposed_time}:00",
+                "dateTime": start.strftime("%Y-%m-%dT%H:%M:%S"),
                 "timeZone": "America/Mexico_City"
             },
             "end": {
-                "dateTime": f"{proposed_date}T{proposed_time}:30",
+                "dateTime": end.strftime("%Y-%m-%dT%H:%M:%S"),
                 "timeZone": "America/Mexico_City"
             }
         }
-        
-        event_id = calendar_manager.create_event(event)
+
+        client_message = responder.appointment_confirmed(proposed_date, proposed_time) if responder else None
+        if client_message:
+            tenant.screen_tracker.record_outgoing(phone_number, client_message)
+
+        if slot_cache:
+            slot_cache.mark_busy(start, end)
+
+        if tenant.outbox:
+            booking_id = tenant.outbox.enqueue(event, phone_number, reservation_id)
+            reservations.confirm(reservation_id, booking_id)
+            tenant.outbox_wakeup.set()
+            tenant.stats_rollup.record("bookings.queued")
+
+            # Marcar conversación como completada
+            tenant.mark_conversation_inactive(phone_number)
+
+            logger.info(f"✅ Cita registrada: {client_name} - {proposed_date} {proposed_time}")
+
+            return {
+                "status": "queued",
+                "booking_id": booking_id,
+                "message": f"Cita agendada para {proposed_date} a las {proposed_time}",
+                "client_message": client_message
+            }
+
+        # Sin bandeja de salida: escribir directamente en Google Calendar
+        event_id = await tenant.run(calendar_manager.create_event, event)
         
         if event_id:
+            reservations.confirm(reservation_id, event_id)
+            tenant.stats_rollup.record("bookings.created")
+
             # Marcar conversación como completada
-            mark_conversation_inactive(phone_number)
+            tenant.mark_conversation_inactive(phone_number)
             
             logger.info(f"✅ Cita agendada: {client_name} - {proposed_date} {proposed_time}")
             
             return {
                 "status": "success",
                 "event_id": event_id,
-                "message": f"Cita agendada para {proposed_date} a las {proposed_time}"
+                "message": f"Cita agendada para {proposed_date} a las {proposed_time}",
+                "client_message": client_message
             }
         else:
             raise Exception("Failed to create event")
     
+    except HTTPException:
+        raise
     except Exception as e:
+        reservations.release(reservation_id)
+        tenant.stats_rollup.record("bookings.failed")
         logger.error(f"❌ Error agendando cita: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/bookings/{booking_id}")
+async def get_booking(booking_id: str, tenant: Tenant = Depends(get_tenant)):
+    """Consultar estado de envío de una cita a Google Calendar"""
+
+    if not tenant.outbox:
+        raise HTTPException(status_code=503, detail="Outbox not initialized")
+
+    entry = tenant.outbox.get(booking_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Booking not found")
+
+    return {
+        "booking_id": booking_id,
+        "status": entry["status"],
+        "event_id": entry["event_id"],
+        "attempts": entry["attempts"],
+        "last_error": entry["last_error"]
+    }
+
+
+@app.get("/available-slots")
+async def get_available_slots(
+    duration_minutes: int = 60,
+    days_ahead: Optional[int] = None,
+    limit: int = 20,
+    step_minutes: Optional[int] = None,
+    tenant: Tenant = Depends(get_tenant)
+):
+    """Obtener horarios libres desde la caché precalculada"""
+
+    slot_cache = tenant.slot_cache
+
+    if not slot_cache:
+        raise HTTPException(status_code=503, detail="Calendar Manager not initialized")
+
+    slots = slot_cache.get_slots(duration_minutes, days_ahead, limit, step_minutes,
+                                    exclude=tenant.reservations.is_reserved)
+
+    if slots is None:
+        # Caché vacía (todavía no termina el primer refresco): reconstruir una vez
+        await tenant.run(slot_cache.refresh)
+        slots = slot_cache.get_slots(duration_minutes, days_ahead, limit, step_minutes,
+                                    exclude=tenant.reservations.is_reserved)
+
+    if slots is None:
+        raise HTTPException(status_code=503, detail="Available slots not ready")
+
+    return {
+        "duration_minutes": duration_minutes,
+        "slots": slots
+    }
+
+
 @app.get("/active-conversations")
-async def get_active_conversations() -> List[ConversationState]:
-    """Obtener conversaciones activas"""
-    return [
-        ConversationState(**conv) 
-        for conv in active_conversations.values() 
-        if conv["conversation_active"]
-    ]
+async def get_active_conversations(
+    request: Request,
+    since: Optional[str] = None,
+    tenant: Tenant = Depends(get_tenant)
+):
+    """
+    Obtener conversaciones activas
+    
+    - ETag con la versión del estado: If-None-Match igual → 304 sin cuerpo
+    - ?since=<token>: sólo las conversaciones que cambiaron desde ese token
+    - El token lleva la época del proceso: tras un reinicio la versión
+      vuelve a 0 y un token viejo recibe el estado completo
+    - El JSON se codifica una vez por versión y se reutiliza en los sondeos
+    """
+    conversations = tenant.conversations
+    version = conversations.version
+    token = conversations.token(version)
+    etag = f'W/"{tenant.tenant_id}:{token}"'
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag, "Vary": "X-Tenant-ID"})
+
+    headers = {
+        "ETag": etag,
+        "Vary": "X-Tenant-ID",
+        "X-Conversations-Version": token
+    }
+
+    if since is None:
+        body = tenant.response_cache.get("conversations", version, conversations.list_active)
+        return JSONBytesResponse(body, headers=headers)
+
+    # Token de otra época (reinicio) o posterior a nuestra versión: enviar todo
+    since_version = conversations.parse_token(since)
+    full = since_version is None or since_version > version
+
+    def build():
+        changed, removed = conversations.changes(None if full else since_version)
+        return {
+            "version": token,
+            "full": full,
+            "conversations": changed,
+            "removed": removed
+        }
+
+    key = "conversations:full" if full else f"conversations:since:{since_version}"
+    return JSONBytesResponse(tenant.response_cache.get(key, version, build), headers=headers)
+
+
+@app.get("/stats")
+async def get_stats(tenant: Tenant = Depends(get_tenant)):
+    """
+    Estadísticas precalculadas del propietario
+    
+    Por minuto (última hora), por hora (48 h) y por día (30 días):
+    mensajes por tipo, análisis por origen (llm, fallback, caché,
+    huella de publicidad) y citas (en cola, creadas, conflicto, fallidas).
+    """
+    return tenant.stats_rollup.snapshot()
+
+
+@app.get("/conversations/{phone_number}/transcript")
+async def get_transcript(phone_number: str, limit: int = 20, tenant: Tenant = Depends(get_tenant)):
+    """Últimos mensajes (entrantes y respuestas) de una conversación"""
+    if not tenant.transcripts:
+        raise HTTPException(status_code=503, detail="Transcripts not initialized")
+
+    limit = min(max(limit, 1), 500)
+    return {
+        "phone_number": phone_number,
+        "total": tenant.transcripts.count(phone_number),
+        "messages": tenant.transcripts.last(phone_number, limit)
+    }
+
+
+@app.delete("/conversations/{phone_number}/transcript")
+async def delete_transcript(phone_number: str, tenant: Tenant = Depends(get_tenant)):
+    """Borrar el historial de una conversación"""
+    if not tenant.transcripts:
+        raise HTTPException(status_code=503, detail="Transcripts not initialized")
+
+    tenant.transcripts.delete_phone(phone_number)
+    logger.info(f"🗑️ Transcripción borrada: {phone_number} [{tenant.tenant_id}]")
+    return {"status": "deleted", "phone_number": phone_number}
 
 
 @app.post("/postpone-conversation")
-async def postpone_conversation(phone_number: str, minutes: int = 60):
-    """Posponer una conversación"""
+async def postpone_conversation(phone_number: str, minutes: int = 60,
+                                tenant: Tenant = Depends(get_tenant)):
+    """Posponer una conversación (después de los mensajes del número ya en cola)"""
     
-    mark_conversation_inactive(phone_number)
+    async def postpone(partition: Partition):
+        tenant.mark_conversation_inactive(phone_number)
+
+    await tenant.partitions.submit(phone_number, postpone)
     
     logger.info(f"⏱️ Conversación pospuesta: {phone_number} por {minutes} minutos")
     
@@ -353,9 +969,27 @@ async def postpone_conversation(phone_number: str, minutes: int = 60):
     }
 
 
+@app.post("/not-spam")
+async def not_spam(message: SMSMessage, tenant: Tenant = Depends(get_tenant)):
+    """Marcar un mensaje como no publicidad (deja de clasificarse por huella)"""
+    if not tenant.ai_agent:
+        raise HTTPException(status_code=503, detail="AI agent not initialized")
+    
+    removed = tenant.ai_agent.mark_not_spam(message.message_text)
+    # Los procesos de partición tienen sus propias huellas
+    await tenant.partitions.broadcast(mark_not_spam_in_worker, message.message_text)
+    
+    return {
+        "status": "ok",
+        "phone_number": message.phone_number,
+        "fingerprints_removed": removed
+    }
+
+
 @app.get("/config")
-async def get_config():
+async def get_config(tenant: Tenant = Depends(get_tenant)):
     """Obtener configuración actual (sin exponer tokens)"""
+    config = tenant.config
     if not config:
         raise HTTPException(status_code=503, detail="Config not loaded")
     
@@ -368,33 +1002,78 @@ async def get_config():
 
 
 @app.post("/config")
-async def update_config(new_config: MonitoringConfig):
-    """Actualizar configuración"""
-    global config
-    config = new_config
-    logger.info(f"✅ Configuración actualizada: {config.owner_name}")
-    return {"status": "updated", "config": config}
+async def update_config(new_config: MonitoringConfig, tenant: Tenant = Depends(get_tenant)):
+    """Actualizar configuración del propietario"""
+    tenant.config = new_config
+    tenant.build_responder()
+    logger.info(f"✅ Configuración actualizada: {new_config.owner_name} [{tenant.tenant_id}]")
+    return {"status": "updated", "config": new_config}
+
+
+@app.post("/admin/profile")
+async def admin_profile(request: Request, seconds: float = 10, interval_ms: float = 5):
+    """
+    Perfilar el proceso durante una ventana de tiempo
+    
+    Devuelve las pilas agregadas en formato folded (flamegraph.pl / speedscope).
+    Requiere X-Admin-Token.
+    """
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+    seconds = min(max(seconds, 0.1), 60)
+    folded = await asyncio.to_thread(profile_for, seconds, interval_ms / 1000)
+    return PlainTextResponse(folded)
+
+
+@app.post("/admin/partitions")
+async def admin_partitions(request: Request, count: int, tenant: Tenant = Depends(get_tenant)):
+    """
+    Cambiar el número de particiones del propietario
+    
+    Los números con mensajes en cola los terminan en su partición anterior.
+    Requiere X-Admin-Token.
+    """
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Admin token required")
+    if not 1 <= count <= 64:
+        raise HTTPException(status_code=400, detail="count must be between 1 and 64")
+
+    tenant.partitions.resize(count)
+    return tenant.partitions.stats()
+
+
+@app.get("/admin/profiles/{request_id}")
+async def admin_request_profile(request: Request, request_id: str):
+    """Obtener el perfil de una solicitud hecha con X-Profile"""
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+    if request_id not in request_profiles:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(request_profiles[request_id])
 
 
 # ==================== MONITOREO EN BACKGROUND ====================
 
-async def monitoring_loop():
+async def monitoring_loop(tenant: Tenant):
     """
     Loop de monitoreo inteligente:
     - Modo pasivo: verificar cada 5 minutos
     - Modo activo: verificar instantáneamente cuando hay conversación activa
     """
     
-    logger.info("🔄 Iniciando loop de monitoreo...")
+    logger.info(f"🔄 Iniciando loop de monitoreo: {tenant.tenant_id}")
     
     while True:
         try:
+            config = tenant.config
             if config.active_mode:
                 # Modo activo: verificar conversaciones activas
-                active = [conv for conv in active_conversations.values() if conv["conversation_active"]]
+                active = tenant.conversations.active_count
                 
                 if active:
-                    logger.info(f"📱 {len(active)} conversaciones activas - verificando instantáneamente")
+                    logger.info(f"📱 {active} conversaciones activas - verificando instantáneamente")
                     await asyncio.sleep(1)  # Verificar cada 1 segundo en modo activo
                 else:
                     # Sin conversaciones activas: modo pasivo
@@ -409,6 +1088,120 @@ async def monitoring_loop():
             await asyncio.sleep(60)
 
 
+async def slot_cache_loop(tenant: Tenant):
+    """
+    Mantener la caché de slots del propietario actualizada:
+    - Refrescar cuando caduca
+    - Refrescar en cuanto un cambio local la invalida
+    """
+    
+    slot_cache = tenant.slot_cache
+    while True:
+        try:
+            if slot_cache.refresh_needed.is_set() or not slot_cache.is_fresh:
+                if not await asyncio.to_thread(slot_cache.refresh):
+                    await asyncio.sleep(30)
+            await asyncio.sleep(1)
+        
+        except Exception as e:
+            logger.error(f"❌ Error refrescando caché de slots [{tenant.tenant_id}]: {e}")
+            await asyncio.sleep(60)
+
+
+def release_failed_booking(tenant: Tenant, entry: dict):
+    """Liberar el horario de una cita que no se pudo enviar"""
+    if entry.get("reservation_id"):
+        tenant.reservations.release(entry["reservation_id"])
+
+
+def restore_pending_bookings(tenant: Tenant):
+    """
+    Volver a bloquear los horarios de las citas que siguen en la bandeja
+    de salida: tras un reinicio todavía no están en Google ni en memoria
+    """
+    restored = 0
+    for entry in tenant.outbox.pending():
+        try:
+            event = entry["event"]
+            start = TZ_MEXICO.localize(datetime.strptime(event["start"]["dateTime"], "%Y-%m-%dT%H:%M:%S"))
+            end = TZ_MEXICO.localize(datetime.strptime(event["end"]["dateTime"], "%Y-%m-%dT%H:%M:%S"))
+        except (KeyError, ValueError) as e:
+            logger.warning(f"⚠️ Cita pendiente sin horario válido {entry['booking_id']}: {e}")
+            continue
+
+        reservation_id = entry["reservation_id"] or entry["booking_id"]
+        if tenant.reservations.restore(reservation_id, start, end,
+                                       owner=entry["phone_number"] or "",
+                                       event_id=entry["booking_id"]):
+            restored += 1
+
+    if restored:
+        logger.info(f"🔒 {restored} reservas restauradas de la bandeja de salida [{tenant.tenant_id}]")
+
+
+async def calendar_outbox_loop(tenant: Tenant):
+    """
+    Enviar a Google Calendar las citas de la bandeja de salida del propietario:
+    - Inmediatamente al registrar una cita nueva
+    - Periódicamente para los reintentos con backoff
+    """
+    
+    def on_failed(entry: dict):
+        release_failed_booking(tenant, entry)
+        tenant.stats_rollup.record("bookings.failed")
+
+    while True:
+        try:
+            tenant.outbox_wakeup.clear()
+            sent = await asyncio.to_thread(
+                tenant.outbox.push_due, tenant.calendar_manager.create_event, on_failed
+            )
+            if sent:
+                tenant.stats_rollup.record("bookings.created", sent)
+            try:
+                await asyncio.wait_for(tenant.outbox_wakeup.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                pass
+        
+        except Exception as e:
+            logger.error(f"❌ Error en bandeja de salida [{tenant.tenant_id}]: {e}")
+            await asyncio.sleep(30)
+
+
+async def transcript_maintenance_loop(tenant: Tenant):
+    """Aplicar retención y compactar las transcripciones cada hora"""
+    
+    while True:
+        await asyncio.sleep(3600)
+        try:
+            await asyncio.to_thread(tenant.transcripts.apply_retention)
+            await asyncio.to_thread(tenant.transcripts.compact)
+        
+        except Exception as e:
+            logger.error(f"❌ Error manteniendo transcripciones [{tenant.tenant_id}]: {e}")
+
+
+async def model_warmup_loop(tenant: Tenant):
+    """
+    Calentar el modelo al arrancar y mantenerlo caliente en horario
+    laboral (fuera de los límites de concurrencia del propietario: no es
+    tráfico de usuarios)
+    """
+    
+    try:
+        await asyncio.to_thread(tenant.ai_agent.warmup)
+    except Exception as e:
+        logger.error(f"❌ Error calentando modelo [{tenant.tenant_id}]: {e}")
+
+    while True:
+        await asyncio.sleep(30)
+        try:
+            await asyncio.to_thread(tenant.ai_agent.warmer.tick)
+        
+        except Exception as e:
+            logger.error(f"❌ Error en keep-warm [{tenant.tenant_id}]: {e}")
+
+
 # ==================== EJECUCIÓN ====================
 
 if __name__ == "__main__":
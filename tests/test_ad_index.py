@@ -0,0 +1,53 @@
+from jarvis import ad_index
+from jarvis.ad_index import AdBlastIndex
+
+PROMO = "¡Hola Ana! Aprovecha 50% de descuento en toda la tienda con el código AHORRA50 en www.tienda.mx/promo"
+VARIANT = "¡Hola Luis! Aprovecha 50% de descuento en toda la tienda con el código LUIS2024 en bit.ly/x9Yz"
+OTHER = "Buenas tardes, quisiera saber si el doctor puede atenderme el jueves por la mañana"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_variations_of_a_promotion_match():
+    index = AdBlastIndex()
+    assert index.add(PROMO)
+    assert index.match(VARIANT) is not None
+    assert index.match(OTHER) is None
+    assert index.stats()["hits"] == 1
+
+
+def test_short_messages_are_not_indexed():
+    index = AdBlastIndex()
+    assert not index.add("Promo 2x1")
+    assert index.match("Promo 2x1") is None
+
+
+def test_not_spam_removes_and_blocks_reindexing():
+    index = AdBlastIndex()
+    index.add(PROMO)
+    assert index.mark_not_spam(VARIANT) == 1
+    assert index.match(PROMO) is None
+    assert not index.add(PROMO)
+    assert index.stats()["not_spam"] == 1
+
+
+def test_unused_promotions_age_out(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ad_index.time, "monotonic", clock)
+    index = AdBlastIndex(max_age_seconds=60)
+    index.add(PROMO)
+
+    clock.now += 59
+    assert index.match(VARIANT) is not None
+    # match() refresca la entrada: cuenta desde el último uso
+    clock.now += 59
+    assert index.match(PROMO) is not None
+    clock.now += 61
+    assert index.match(PROMO) is None
+    assert index.stats()["ads"] == 0
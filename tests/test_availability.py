@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+import pytz
+
+from jarvis.availability import AvailabilityGrid
+
+TZ = pytz.timezone("America/Mexico_City")
+MONDAY_9 = TZ.localize(datetime(2026, 10, 19, 9, 0))
+
+
+def grid(hours=2, busy=(), business_hours_only=False):
+    return AvailabilityGrid(MONDAY_9, MONDAY_9 + timedelta(hours=hours), busy, business_hours_only)
+
+
+def test_is_free_at_window_edges():
+    g = grid()
+    assert g.is_free(MONDAY_9, 30) is True
+    assert g.is_free(MONDAY_9 + timedelta(minutes=90), 30) is True
+    # Termina un minuto después de la ventana / empieza antes de ella
+    assert g.is_free(MONDAY_9 + timedelta(minutes=91), 30) is None
+    assert g.is_free(MONDAY_9 - timedelta(minutes=1), 30) is None
+
+
+def test_is_free_busy_interval():
+    g = grid(busy=[(MONDAY_9 + timedelta(minutes=30), MONDAY_9 + timedelta(minutes=60))])
+    assert g.is_free(MONDAY_9, 30) is True
+    assert g.is_free(MONDAY_9 + timedelta(minutes=1), 30) is False
+    assert g.is_free(MONDAY_9 + timedelta(minutes=59), 30) is False
+    assert g.is_free(MONDAY_9 + timedelta(minutes=60), 30) is True
+
+
+def test_is_free_outside_grid_defers_to_calendar():
+    start = TZ.localize(datetime(2026, 10, 19, 8, 0))
+    g = AvailabilityGrid(start, start + timedelta(days=7))
+    assert g.is_free(start + timedelta(days=10, hours=4), 30) is None
+    # Sábado y después de las 18:00: fuera de las reglas, la rejilla no sabe
+    assert g.is_free(TZ.localize(datetime(2026, 10, 24, 12, 0)), 30) is None
+    assert g.is_free(TZ.localize(datetime(2026, 10, 19, 17, 45)), 30) is None
+    assert g.is_free(TZ.localize(datetime(2026, 10, 19, 17, 30)), 30) is True
+
+
+def test_fits_at_window_edges():
+    g = grid(hours=1)
+    assert list(g.fits(60)) == [0]
+    assert list(g.fits(61)) == []
+    assert list(g.fits(0)) == []
+    assert list(g.fits(30, step_minutes=30)) == [0, 30]
+
+
+def test_fits_busy_at_end():
+    g = grid(hours=1, busy=[(MONDAY_9 + timedelta(minutes=45), MONDAY_9 + timedelta(hours=2))])
+    starts = g.fits(15)
+    assert starts[0] == 0
+    assert starts[-1] == 30
+
+
+def test_business_mask_edges():
+    start = TZ.localize(datetime(2026, 10, 19, 8, 0))
+    g = AvailabilityGrid(start, start + timedelta(hours=12))
+    slots = g.all_slots(60, step_minutes=60)
+    assert slots[0].hour == 9
+    assert slots[-1].hour == 17
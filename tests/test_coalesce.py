@@ -0,0 +1,96 @@
+import asyncio
+
+from jarvis.coalesce import MessageCoalescer
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def recording_handler(calls):
+    async def handler(items):
+        calls.append(list(items))
+        return "+".join(items)
+    return handler
+
+
+def test_messages_inside_window_flush_once():
+    calls = []
+
+    async def scenario():
+        coalescer = MessageCoalescer(window_seconds=0.05, max_wait_seconds=1)
+        handler = recording_handler(calls)
+        first = asyncio.ensure_future(coalescer.submit("555", "Hola", handler))
+        await asyncio.sleep(0.02)
+        second = asyncio.ensure_future(coalescer.submit("555", "soy Juan", handler))
+        other = asyncio.ensure_future(coalescer.submit("777", "Oferta", handler))
+        return await asyncio.gather(first, second, other), coalescer.stats()
+
+    (first, second, other), stats = run(scenario())
+    assert first == ("Hola+soy Juan", 0, 2)
+    assert second == ("Hola+soy Juan", 1, 2)
+    assert other == ("Oferta", 0, 1)
+    assert sorted(calls) == [["Hola", "soy Juan"], ["Oferta"]]
+    assert (stats["bursts"], stats["merged"], stats["open"]) == (2, 1, 0)
+
+
+def test_max_wait_closes_a_burst_that_keeps_growing():
+    calls = []
+
+    async def scenario():
+        coalescer = MessageCoalescer(window_seconds=0.05, max_wait_seconds=0.1)
+        handler = recording_handler(calls)
+        pending = []
+        for text in "abcdefgh":
+            pending.append(asyncio.ensure_future(coalescer.submit("555", text, handler)))
+            await asyncio.sleep(0.03)
+        await asyncio.gather(*pending)
+
+    run(scenario())
+    assert len(calls) > 1
+    assert "".join("".join(burst) for burst in calls) == "abcdefgh"
+
+
+def test_max_messages_flushes_immediately():
+    calls = []
+
+    async def scenario():
+        coalescer = MessageCoalescer(window_seconds=10, max_messages=2)
+        handler = recording_handler(calls)
+        return await asyncio.wait_for(asyncio.gather(
+            coalescer.submit("555", "a", handler),
+            coalescer.submit("555", "b", handler)
+        ), timeout=1)
+
+    assert run(scenario()) == [("a+b", 0, 2), ("a+b", 1, 2)]
+
+
+def test_zero_window_disables_grouping():
+    calls = []
+
+    async def scenario():
+        coalescer = MessageCoalescer(window_seconds=0)
+        handler = recording_handler(calls)
+        return await asyncio.gather(
+            coalescer.submit("555", "a", handler),
+            coalescer.submit("555", "b", handler)
+        )
+
+    assert run(scenario()) == [("a", 0, 1), ("b", 0, 1)]
+    assert calls == [["a"], ["b"]]
+
+
+def test_handler_error_reaches_every_message():
+    async def failing(items):
+        raise RuntimeError("sin IA")
+
+    async def scenario():
+        coalescer = MessageCoalescer(window_seconds=0.02)
+        return await asyncio.gather(
+            coalescer.submit("555", "a", failing),
+            coalescer.submit("555", "b", failing),
+            return_exceptions=True
+        )
+
+    results = run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
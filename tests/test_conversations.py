@@ -0,0 +1,71 @@
+from jarvis.conversations import ConversationStore
+
+
+def test_token_from_another_process_is_rejected():
+    store = ConversationStore()
+    store.mark_active("5550001")
+    token = store.token()
+    assert store.parse_token(token) == store.version
+
+    # Reinicio: la versión vuelve a empezar, la época cambia
+    restarted = ConversationStore()
+    restarted.mark_active("5550002")
+    assert restarted.parse_token(token) is None
+
+
+def test_invalid_tokens_are_rejected():
+    store = ConversationStore()
+    for token in (None, "", "3", f"{store.epoch}.", f"{store.epoch}.x"):
+        assert store.parse_token(token) is None
+
+
+def phones(conversations):
+    return [c["phone_number"] for c in conversations]
+
+
+def test_changes_since_version():
+    store = ConversationStore()
+    store.mark_active("a")
+    store.mark_active("b")
+    since = store.version
+
+    store.mark_active("c")
+    store.mark_inactive("a")
+    store.mark_active("c")
+    changed, removed = store.changes(since)
+    assert (phones(changed), removed) == (["c"], ["a"])
+
+    # Sin versión: todo, y cada teléfono una sola vez
+    changed, removed = store.changes(None)
+    assert (phones(changed), removed) == (["b", "c"], ["a"])
+    assert store.changes(store.version) == ([], [])
+
+
+def test_active_index_and_api_format():
+    store = ConversationStore()
+    store.mark_active("a", now=0)
+    store.mark_active("b", now=0)
+    assert not store.mark_inactive("missing")
+    store.mark_inactive("a")
+
+    assert store.active_count == 1 and len(store) == 2
+    assert store.is_active("b") and not store.is_active("a")
+    [conversation] = store.list_active()
+    assert conversation["phone_number"] == "b"
+    assert conversation["conversation_active"] is True
+    assert conversation["last_message_time"].startswith("1969-12-31T18:00:00")
+
+
+def test_log_compaction_keeps_incremental_answers():
+    store = ConversationStore()
+    for phone in ("a", "b", "c"):
+        store.mark_active(phone)
+    since = store.version
+
+    for _ in range(3000):
+        store.mark_active("b")
+    store.mark_inactive("c")
+
+    assert len(store._log_rows) < 3000
+    changed, removed = store.changes(since)
+    assert (phones(changed), removed) == (["b"], ["c"])
@@ -0,0 +1,87 @@
+from jarvis import dedupe
+from jarvis.dedupe import IdempotencyStore, RotatingBloomFilter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rotating_bloom_remembers_between_one_and_two_windows(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(dedupe.time, "monotonic", clock)
+
+    bloom = RotatingBloomFilter(capacity=1000, window_seconds=60)
+    bloom.add("a")
+    assert "a" in bloom
+    assert "b" not in bloom
+
+    # Primera rotación: "a" pasa a la generación anterior
+    clock.now += 60
+    assert "a" in bloom
+    bloom.add("b")
+
+    # Segunda rotación: "a" se descarta, "b" sigue
+    clock.now += 60
+    assert "a" not in bloom
+    assert "b" in bloom
+
+    clock.now += 60
+    assert "b" not in bloom
+
+
+def test_rotating_bloom_no_rotation_inside_window(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(dedupe.time, "monotonic", clock)
+
+    bloom = RotatingBloomFilter(capacity=100, window_seconds=60)
+    bloom.add("a")
+    clock.now += 59
+    bloom.add("b")
+    clock.now += 59
+    assert "a" in bloom and "b" in bloom
+
+
+def test_content_only_keys_expire_after_short_window(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(dedupe.time, "monotonic", clock)
+    store = IdempotencyStore(content_window_seconds=10)
+
+    key = IdempotencyStore.key_for("5550001", "Sí")
+    store.put(key, "resultado")
+    assert store.get(key) == "resultado"
+
+    # Un segundo "Sí" más tarde es un mensaje nuevo, no un duplicado
+    clock.now += 11
+    assert store.get(key) is None
+    assert not store.seen(key)
+
+
+def test_timestamp_distinguishes_repeated_text():
+    first = IdempotencyStore.key_for("5550001", "Sí", timestamp="2026-10-19T10:00:00")
+    second = IdempotencyStore.key_for("5550001", "Sí", timestamp="2026-10-19T10:05:00")
+    assert first != second
+    assert IdempotencyStore.key_for("5550001", "Sí", message_id="m1") == "id:m1"
+
+
+def test_bloom_hit_alone_is_not_a_duplicate():
+    store = IdempotencyStore(max_results=1)
+    store._bloom.add("id:never-processed")  # falso positivo del filtro
+    assert not store.seen("id:never-processed")
+
+
+def test_evicted_result_is_still_seen_within_window(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(dedupe.time, "monotonic", clock)
+    store = IdempotencyStore(max_results=1, window_seconds=3600)
+
+    store.put("id:a", "A")
+    store.put("id:b", "B")
+    assert store.get("id:a") is None
+    assert store.seen("id:a")
+
+    clock.now += 3601
+    assert not store.seen("id:a")
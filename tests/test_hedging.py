@@ -0,0 +1,81 @@
+import threading
+import time
+
+from jarvis.hedging import HedgeBudget, HedgedExecutor, LatencyTracker
+
+
+def warmed_executor(**kwargs):
+    """Executor con latencias previas de 10 ms (umbral = min_delay)"""
+    executor = HedgedExecutor(min_samples=5, min_delay=0.02, **kwargs)
+    for _ in range(5):
+        executor.primary_latency.record(0.01)
+    return executor
+
+
+def test_budget_limits_hedges_to_ratio_of_requests():
+    budget = HedgeBudget(ratio=0.25, max_tokens=1.0)
+    assert budget.withdraw()  # crédito inicial
+    assert not budget.withdraw()
+
+    granted = 0
+    for _ in range(100):
+        budget.deposit()
+        granted += budget.withdraw()
+    assert granted == 25
+
+
+def test_quantile_of_window():
+    tracker = LatencyTracker(window=10)
+    for ms in range(1, 21):
+        tracker.record(ms / 1000)
+    assert tracker.quantile(0.9) == 0.02
+    assert LatencyTracker().quantile(0.5) is None
+
+
+def test_slow_primary_is_hedged_and_hedge_wins():
+    executor = warmed_executor(budget_ratio=0.0)
+    calls = []
+    release = threading.Event()
+
+    def call():
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(1)  # primario atascado
+            return "lento"
+        return "rápido"
+
+    assert executor.call(call) == "rápido"
+    release.set()
+    assert (executor.hedges, executor.hedge_wins) == (1, 1)
+
+
+def test_no_hedge_without_budget():
+    executor = warmed_executor(budget_ratio=0.0)
+    executor.budget.withdraw()  # gastar el crédito inicial
+
+    start = time.perf_counter()
+    assert executor.call(lambda: time.sleep(0.05) or "ok") == "ok"
+    assert time.perf_counter() - start >= 0.05
+    assert executor.hedges == 0
+
+
+def test_failed_primary_falls_back_to_hedge():
+    executor = warmed_executor()
+    calls = []
+
+    def call():
+        calls.append(1)
+        if len(calls) == 1:
+            time.sleep(0.05)
+            raise ConnectionError("503")
+        return "ok"
+
+    assert executor.call(call) == "ok"
+
+
+def test_disabled_only_measures():
+    executor = HedgedExecutor(enabled=False)
+    assert executor.call(lambda: "ok") == "ok"
+    stats = executor.stats()
+    assert (stats["hedges"], stats["requests"]) == (0, 1)
+    assert stats["observed_latency"]["p50"] is not None
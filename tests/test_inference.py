@@ -0,0 +1,36 @@
+import pytest
+
+from jarvis.inference import (
+    InferenceRouter, StubBackend, TASK_CLASSIFY, TASK_RESPOND, parse_routes
+)
+
+
+def failing(prompt, max_tokens):
+    return None
+
+
+def test_router_falls_back_along_the_task_chain():
+    small = StubBackend("small", responder=failing)
+    large = StubBackend("large", responder=lambda prompt, max_tokens: "ok")
+    router = InferenceRouter({"small": small, "large": large},
+                             parse_routes("classify=small|large"))
+
+    assert router.generate(TASK_CLASSIFY, "hola") == "ok"
+    assert (small.failures, large.calls) == (1, 1)
+    # Sin ruta explícita: el primer backend declarado
+    assert [b.name for b in router.chain(TASK_RESPOND)] == ["small"]
+
+
+def test_cold_backend_moves_to_end_of_chain():
+    small, large = StubBackend("small"), StubBackend("large")
+    router = InferenceRouter({"small": small, "large": large},
+                             parse_routes("classify=small|large"))
+    small.cold = True
+    assert [b.name for b in router.chain(TASK_CLASSIFY)] == ["large", "small"]
+
+
+def test_routes_are_validated():
+    with pytest.raises(ValueError):
+        parse_routes("translate=small")
+    with pytest.raises(ValueError):
+        InferenceRouter({"small": StubBackend("small")}, {"classify": ["missing"]})
@@ -0,0 +1,89 @@
+from unittest import mock
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from jarvis import outbox as outbox_module
+from jarvis.calendar import GoogleCalendarManager
+from jarvis.outbox import STATUS_FAILED, STATUS_PENDING, STATUS_SENT, CalendarOutbox
+
+EVENT = {
+    "summary": "Cita",
+    "start": {"dateTime": "2030-10-21T09:00:00-06:00"},
+    "end": {"dateTime": "2030-10-21T10:00:00-06:00"},
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_outbox(tmp_path, monkeypatch, **kwargs):
+    clock = FakeClock()
+    monkeypatch.setattr(outbox_module.time, "time", clock)
+    return CalendarOutbox(str(tmp_path / "outbox.db"), **kwargs), clock
+
+
+def test_retry_waits_for_backoff(tmp_path, monkeypatch):
+    outbox, clock = make_outbox(tmp_path, monkeypatch, base_backoff_seconds=2.0)
+    booking_id = outbox.enqueue(EVENT, "5550001")
+    calls = []
+
+    def flaky(event):
+        calls.append(event["id"])
+        if len(calls) == 1:
+            raise ConnectionError("sin red")
+        return event["id"]
+
+    assert outbox.push_due(flaky) == 0
+    entry = outbox.get(booking_id)
+    assert (entry["status"], entry["attempts"]) == (STATUS_PENDING, 1)
+    assert entry["last_error"] == "sin red"
+
+    # Antes de la espera no se reintenta
+    assert outbox.push_due(flaky) == 0
+    assert len(calls) == 1
+
+    clock.now += 2
+    assert outbox.push_due(flaky) == 1
+    entry = outbox.get(booking_id)
+    assert (entry["status"], entry["attempts"], entry["event_id"]) == (STATUS_SENT, 2, booking_id)
+    # El mismo ID en cada intento: los reintentos son idempotentes
+    assert calls == [booking_id, booking_id]
+
+
+def test_entry_fails_after_max_attempts(tmp_path, monkeypatch):
+    outbox, clock = make_outbox(tmp_path, monkeypatch, max_attempts=2)
+    booking_id = outbox.enqueue(EVENT, "5550001", reservation_id="r1")
+    failed = []
+
+    for _ in range(3):
+        outbox.push_due(lambda event: None, on_failed=failed.append)
+        clock.now += 3600
+
+    assert outbox.get(booking_id)["status"] == STATUS_FAILED
+    assert [entry["reservation_id"] for entry in failed] == ["r1"]
+    assert outbox.pending() == []
+
+
+def test_conflict_on_retry_counts_as_sent(tmp_path, monkeypatch):
+    """Un 409 por ID repetido significa que un intento anterior sí llegó a Google"""
+    outbox, _ = make_outbox(tmp_path, monkeypatch)
+    booking_id = outbox.enqueue(EVENT, "5550001")
+
+    manager = GoogleCalendarManager.__new__(GoogleCalendarManager)
+    manager.calendar_id = "primary"
+    manager._notify_change = lambda *args: None
+    manager._service_attempted = True
+    manager._service = mock.MagicMock()
+    manager._service.events().insert().execute.side_effect = HttpError(
+        httplib2.Response({"status": 409}), b"duplicate"
+    )
+
+    assert outbox.push_due(manager.create_event) == 1
+    entry = outbox.get(booking_id)
+    assert (entry["status"], entry["event_id"]) == (STATUS_SENT, booking_id)
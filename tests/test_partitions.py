@@ -0,0 +1,72 @@
+import asyncio
+import random
+
+from jarvis.partitions import PartitionedPool, jump_hash
+
+KEYS = [f"+52155{n:08d}" for n in range(5000)]
+
+
+def test_jump_hash_stable_and_in_range():
+    first = [jump_hash(k, 8) for k in KEYS]
+    assert first == [jump_hash(k, 8) for k in KEYS]
+    assert set(first) == set(range(8))
+    assert all(jump_hash(k, 1) == 0 for k in KEYS[:100])
+
+
+def test_jump_hash_moves_only_to_new_partition():
+    before = [jump_hash(k, 4) for k in KEYS]
+    after = [jump_hash(k, 5) for k in KEYS]
+    moved = [(b, a) for b, a in zip(before, after) if b != a]
+    assert all(a == 4 for _, a in moved)
+    assert 0.1 < len(moved) / len(KEYS) < 0.3
+
+
+def test_resize_keeps_hash_partitions():
+    pool = PartitionedPool(4)
+    before = {k: pool.partition_for(k) for k in KEYS}
+    pool.resize(6)
+    pool.resize(4)
+    assert {k: pool.partition_for(k) for k in KEYS} == before
+    assert pool.rebalances == 2
+
+
+def test_per_key_order_across_resize():
+    async def scenario():
+        pool = PartitionedPool(4)
+        log = {}
+
+        async def submit(key, i):
+            async def job(partition):
+                await asyncio.sleep(random.random() * 0.002)
+                log.setdefault(key, []).append(i)
+                return i
+            return await pool.submit(key, job)
+
+        tasks = []
+        for i in range(120):
+            tasks.append(asyncio.create_task(submit(f"k{i % 7}", i)))
+            if i == 40:
+                pool.resize(2)
+            if i == 80:
+                pool.resize(6)
+        results = await asyncio.gather(*tasks)
+        return pool, log, results
+
+    pool, log, results = asyncio.run(scenario())
+    assert results == list(range(120))
+    assert all(v == sorted(v) for v in log.values())
+    assert pool.stats()["pending_keys"] == 0
+
+
+def test_processes_start_with_start_not_constructor():
+    pool = PartitionedPool(2, processes=True)
+    try:
+        assert all(p.executor is None for p in pool._partitions)
+        pool.resize(3)
+        assert all(p.executor is None for p in pool._partitions)
+
+        pool.start()
+        if pool.processes:  # sin semáforos POSIX se sigue con hilos
+            assert all(p.executor is not None for p in pool._partitions)
+    finally:
+        pool.close()
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+import pytz
+
+from jarvis import reservations
+from jarvis.reservations import SlotReservationManager
+
+TZ = pytz.timezone("America/Mexico_City")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def interval(minutes_from_now, duration=30):
+    start = datetime.now(TZ).replace(microsecond=0) + timedelta(minutes=minutes_from_now)
+    return start, start + timedelta(minutes=duration)
+
+
+def test_overlapping_reservation_is_rejected():
+    manager = SlotReservationManager()
+    start, end = interval(60)
+    assert manager.reserve(start, end, "a")
+    assert manager.reserve(start + timedelta(minutes=15), end + timedelta(minutes=15), "b") is None
+    # Contiguas no se solapan
+    assert manager.reserve(end, end + timedelta(minutes=30), "c")
+
+
+def test_pending_reservation_expires(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(reservations.time, "monotonic", clock)
+    manager = SlotReservationManager(pending_ttl_seconds=60)
+    start, end = interval(60)
+
+    assert manager.reserve(start, end)
+    clock.now += 59
+    assert manager.is_reserved(start, end)
+    clock.now += 1
+    assert not manager.is_reserved(start, end)
+    assert manager.reserve(start, end)
+
+
+def test_confirmed_reservation_lasts_until_appointment_ends(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(reservations.time, "monotonic", clock)
+    manager = SlotReservationManager(pending_ttl_seconds=60)
+    start, end = interval(60)
+
+    rid = manager.reserve(start, end)
+    assert manager.confirm(rid, "evt")
+    clock.now += 3600
+    assert manager.is_reserved(start, end)
+    clock.now += 1800
+    assert not manager.is_reserved(start, end)
+
+
+def test_release_frees_the_interval():
+    manager = SlotReservationManager()
+    start, end = interval(60)
+    rid = manager.reserve(start, end)
+    assert manager.release(rid)
+    assert not manager.release(rid)
+    assert manager.reserve(start, end)
+
+
+def test_restore_skips_finished_appointments():
+    manager = SlotReservationManager()
+    assert not manager.restore("old", *interval(-90))
+    assert manager.restore("future", *interval(60))
+    assert [r.reservation_id for r in manager.active_reservations()] == ["future"]
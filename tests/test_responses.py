@@ -0,0 +1,18 @@
+from jarvis.responses import TemplateResponder, normalize
+
+
+def test_normalize_keeps_word_boundaries():
+    assert normalize("Hola\nsoy Juan\n¿tiene cita mañana?") == "hola soy juan tiene cita manana"
+    assert normalize("Hola,buenas  tardes") == "hola buenas tardes"
+
+
+def test_template_uses_date_and_time_from_message():
+    responder = TemplateResponder("Sergio")
+    analysis = {"message_type": "appointment_request", "confidence": 0.9}
+
+    reply = responder.respond("Quiero una cita mañana a las 5", analysis)
+    assert "17:00" in reply and "¿Le confirmo" in reply
+
+    assert "¿A qué hora" in responder.respond("Quiero una cita mañana", analysis)
+    assert "¿Qué día le acomoda" in responder.respond("Quiero una cita a las 5 pm", analysis)
+    assert "¿Qué día y a qué hora" in responder.respond("Quiero una cita", analysis)
@@ -0,0 +1,55 @@
+import time
+
+from jarvis import rollups
+from jarvis.rollups import RollingSeries, StatsRollup
+
+
+def test_series_drops_buckets_that_leave_the_window():
+    series = RollingSeries(bucket_seconds=60, size=3)
+    series.add(10, 2)
+    series.add(11)
+    series.add(12, 4)
+    assert (series.ordered(), series.total) == ([2, 1, 4], 7)
+
+    series.add(13)
+    assert (series.ordered(), series.total) == ([1, 4, 1], 6)
+
+    series.advance(20)
+    assert (series.ordered(), series.total) == ([0, 0, 0], 0)
+
+
+def test_events_older_than_window_are_ignored():
+    series = RollingSeries(bucket_seconds=60, size=3)
+    series.add(10)
+    series.add(7)
+    series.add(9)  # sigue en la ventana (8..10)
+    assert series.total == 2
+
+
+def test_rollup_totals_per_resolution(monkeypatch):
+    now = [time.time()]
+    monkeypatch.setattr(rollups.time, "time", lambda: now[0])
+    stats = StatsRollup()
+
+    stats.record("messages.appointment_request", now=now[0])
+    stats.record("messages.appointment_request", 2, now=now[0])
+    assert stats.total("messages.appointment_request", "minute") == 3
+
+    now[0] += 2 * 3600
+    assert stats.total("messages.appointment_request", "minute") == 0
+    assert stats.total("messages.appointment_request", "day") == 3
+    assert stats.total("missing") == 0
+
+
+def test_snapshot_llm_rate_and_metric_cap():
+    stats = StatsRollup(max_metrics=2)
+    stats.record("analysis.llm", 3)
+    stats.record("analysis.fallback", 1)
+    stats.record("bookings.queued")  # sobre el tope: se ignora
+
+    snapshot = stats.snapshot()
+    assert snapshot["llm_rate"] == 0.75
+    minute = snapshot["resolutions"]["minute"]
+    assert set(minute["totals"]) == {"analysis.llm", "analysis.fallback"}
+    assert len(minute["series"]["analysis.llm"]) == minute["buckets"] == 60
+    assert minute["series"]["analysis.llm"][-1] == 3
@@ -0,0 +1,40 @@
+from jarvis.screen_diff import ScreenDiffTracker
+
+HISTORY = [f"mensaje {i}" for i in range(20)]
+FOOTER = ["Escribe un mensaje"]
+
+
+def dump(lines):
+    return "\n".join(lines)
+
+
+def tracker_at(lines):
+    tracker = ScreenDiffTracker()
+    tracker.ingest("c", dump(lines))
+    return tracker
+
+
+def test_identical_dump_is_unchanged():
+    tracker = tracker_at(HISTORY[5:15] + FOOTER)
+    assert tracker.ingest("c", dump(HISTORY[5:15] + FOOTER)) is None
+
+
+def test_repeated_message_is_new():
+    tracker = tracker_at(HISTORY[5:15] + ["Sí"] + FOOTER)
+    assert tracker.ingest("c", dump(HISTORY[6:15] + ["Sí", "Sí"] + FOOTER)) == ["Sí"]
+
+
+def test_scroll_up_and_back_is_not_new():
+    tracker = tracker_at(HISTORY[5:15] + FOOTER)
+    assert tracker.ingest("c", dump(HISTORY[0:10] + FOOTER)) == []
+    assert not tracker.ingest("c", dump(HISTORY[5:15] + FOOTER))
+
+
+def test_outgoing_lines_are_skipped():
+    tracker = tracker_at(HISTORY[5:15] + FOOTER)
+    tracker.record_outgoing("c", "Con gusto, ¿a qué hora?")
+    new = tracker.ingest(
+        "c", dump(HISTORY[6:15] + ["Con gusto, ¿a qué hora?", "Voy en camino", "A las 5"] + FOOTER),
+        outgoing=["Voy en camino"]
+    )
+    assert new == ["A las 5"]
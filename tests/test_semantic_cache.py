@@ -0,0 +1,47 @@
+from jarvis.semantic_cache import SemanticCache, embed
+
+ANALYSIS = {"message_type": "appointment_request", "confidence": 0.9}
+
+
+def test_paraphrase_reuses_analysis_and_returns_a_copy():
+    cache = SemanticCache(capacity=8)
+    cache.put("Quiero una cita para mañana a las 5", ANALYSIS)
+
+    hit = cache.lookup("quisiera cita el viernes a las 10")
+    assert hit == ANALYSIS
+    hit["message_type"] = "changed"
+    assert cache.lookup("quiero una cita")["message_type"] == "appointment_request"
+
+
+def test_intent_words_must_match():
+    cache = SemanticCache(capacity=8)
+    cache.put("quiero una cita mañana", ANALYSIS)
+    assert cache.lookup("quiero cancelar una cita mañana") is None
+    assert cache.lookup("no quiero una cita mañana") is None
+
+
+def test_date_and_time_do_not_change_the_vector():
+    a, sig_a = embed("quiero cita mañana a las 5")
+    b, sig_b = embed("quiero cita el lunes a las 10")
+    assert sig_a == sig_b
+    assert float(a @ b) > 0.99
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SemanticCache(capacity=2)
+    cache.put("quiero una cita", {"n": 1})
+    cache.put("cual es su direccion", {"n": 2})
+    assert cache.lookup("quiero una cita") == {"n": 1}
+
+    cache.put("aceptan tarjeta de credito", {"n": 3})
+    assert len(cache) == 2
+    assert cache.lookup("cual es su direccion") is None
+    assert cache.lookup("quiero una cita") == {"n": 1}
+
+
+def test_discard_forgets_similar_entries():
+    cache = SemanticCache(capacity=8)
+    cache.put("Promoción 2x1 en pizzas solo hoy", {"message_type": "advertisement"})
+    assert cache.discard("promocion 2x1 en pizzas") == 1
+    assert cache.lookup("Promoción 2x1 en pizzas solo hoy") is None
+    assert len(cache) == 0
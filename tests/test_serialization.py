@@ -0,0 +1,56 @@
+import json
+
+import numpy as np
+from pydantic import BaseModel
+
+from jarvis import serialization
+from jarvis.serialization import JSONBytesResponse, ResponseCache, dumps
+
+
+class Slot(BaseModel):
+    date: str
+    free: bool
+
+
+PAYLOAD = {"slot": Slot(date="2030-10-21", free=True), "count": np.int64(3), "texto": "¿Sí?"}
+EXPECTED = {"slot": {"date": "2030-10-21", "free": True}, "count": 3, "texto": "¿Sí?"}
+
+
+def test_dumps_handles_models_and_numpy_scalars():
+    assert json.loads(dumps(PAYLOAD)) == EXPECTED
+
+
+def test_stdlib_fallback_produces_same_json(monkeypatch):
+    fast = dumps(PAYLOAD)
+    monkeypatch.setattr(serialization, "orjson", None)
+    assert json.loads(dumps(PAYLOAD)) == json.loads(fast)
+    assert ResponseCache().stats()["encoder"] == "json"
+
+
+def test_response_cache_rebuilds_only_on_new_version():
+    cache = ResponseCache()
+    builds = []
+
+    def build():
+        builds.append(1)
+        return {"n": len(builds)}
+
+    first = cache.get("conversations", 1, build)
+    assert cache.get("conversations", 1, build) is first
+    assert json.loads(cache.get("conversations", 2, build)) == {"n": 2}
+    assert len(builds) == 2
+    assert cache.stats()["hit_rate"] == round(1 / 3, 4)
+
+
+def test_response_cache_is_bounded():
+    cache = ResponseCache(max_entries=2)
+    for key in range(5):
+        cache.get(key, 1, dict)
+    assert cache.stats()["entries"] <= 2
+
+
+def test_bytes_response_body_is_sent_as_is():
+    body = dumps(EXPECTED)
+    response = JSONBytesResponse(body)
+    assert response.body == body
+    assert response.media_type == "application/json"
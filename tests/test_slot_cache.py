@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+
+import pytz
+
+from jarvis.availability import AvailabilityGrid
+from jarvis.slot_cache import SlotCache
+
+TZ = pytz.timezone("America/Mexico_City")
+START = TZ.localize(datetime(2030, 10, 21, 9, 0))
+
+
+class FakeCalendar:
+    def __init__(self):
+        self.busy = []
+        self.builds = 0
+        self.listeners = []
+        self.during_build = None
+
+    def add_change_listener(self, listener):
+        self.listeners.append(listener)
+
+    def build_availability_grid(self, days_ahead):
+        self.builds += 1
+        if self.during_build:
+            self.during_build()
+        return AvailabilityGrid(START, START + timedelta(hours=9), list(self.busy), False)
+
+
+def times(slots):
+    return [s["time"] for s in slots]
+
+
+def test_invalidate_keeps_serving_previous_grid():
+    calendar = FakeCalendar()
+    cache = SlotCache(calendar, durations=(60,))
+    assert cache.refresh()
+
+    calendar.listeners[0]("create", "evt")
+    assert cache.refresh_needed.is_set()
+    assert cache.get_slots(60, limit=2) == cache.get_slots(60, limit=2) is not None
+    assert cache.is_free(START, 60) is True
+    assert calendar.builds == 1
+
+
+def test_mark_busy_hides_slot_until_refresh():
+    calendar = FakeCalendar()
+    cache = SlotCache(calendar, durations=(60,))
+    cache.refresh()
+    assert "09:00" in times(cache.get_slots(60))
+
+    cache.mark_busy(START, START + timedelta(hours=1))
+    assert "09:00" not in times(cache.get_slots(60))
+    assert cache.is_free(START, 60) is False
+
+    calendar.busy.append((START, START + timedelta(hours=1)))
+    assert cache.refresh()
+    assert "09:00" not in times(cache.get_slots(60))
+    assert not cache.refresh_needed.is_set()
+
+
+def test_refresh_racing_a_change_is_not_published():
+    calendar = FakeCalendar()
+    cache = SlotCache(calendar, durations=(60,))
+    cache.refresh()
+
+    calendar.during_build = lambda: cache.mark_busy(START, START + timedelta(hours=1))
+    assert not cache.refresh()
+    # Se sigue sirviendo la rejilla marcada y queda pendiente otro refresco
+    assert cache.is_free(START, 60) is False
+    assert cache.refresh_needed.is_set()
+
+
+def test_get_slots_skips_reserved_blocks():
+    calendar = FakeCalendar()
+    cache = SlotCache(calendar, durations=(60,))
+    cache.refresh()
+    reserved = (START + timedelta(minutes=30), START + timedelta(minutes=90))
+
+    def is_reserved(start, end):
+        return start < reserved[1] and reserved[0] < end
+
+    slots = cache.get_slots(60, limit=2, exclude=is_reserved)
+    assert [s["datetime"] for s in slots] == [
+        (START + timedelta(minutes=m)).isoformat() for m in (90, 120)
+    ]
+
+
+def test_get_slots_skips_past_starts():
+    now = datetime.now(TZ).replace(second=0, microsecond=0)
+    calendar = FakeCalendar()
+    calendar.build_availability_grid = lambda days_ahead: AvailabilityGrid(
+        now - timedelta(hours=2), now + timedelta(hours=2), [], False
+    )
+    cache = SlotCache(calendar, durations=(30,))
+    cache.refresh()
+
+    slots = cache.get_slots(30)
+    assert slots
+    assert all(datetime.fromisoformat(s["datetime"]) >= now for s in slots)
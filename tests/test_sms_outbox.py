@@ -0,0 +1,27 @@
+import pytest
+
+from sms_outbox import SmsOutbox
+
+
+@pytest.mark.parametrize("status, settled", [
+    (200, True), (201, True), (409, True), (400, True), (422, True),
+    (500, False), (502, False), (503, False), (429, False), (408, False),
+])
+def test_is_settled(status, settled):
+    assert SmsOutbox.is_settled(status) is settled
+
+
+def test_flush_acks_only_settled(tmp_path):
+    outbox = SmsOutbox(str(tmp_path))
+    for i in range(4):
+        outbox.enqueue({"phone_number": "+52155", "message_text": f"m{i}", "message_id": f"id{i}"})
+
+    results = [
+        {"message_id": "id0", "status": 200},
+        {"message_id": "id1", "status": 500},
+        {"message_id": "id2", "status": 409},
+        {"message_id": "id3", "status": 503},
+    ]
+    outbox.ack(SmsOutbox.settled_ids(results))
+
+    assert [m["message_id"] for m in outbox.peek()] == ["id1", "id3"]
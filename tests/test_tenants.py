@@ -0,0 +1,107 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from jarvis.partitions import Partition
+from jarvis.tenants import DEFAULT_TENANT, Tenant, TenantSettings, load_tenant_settings
+
+
+def make_tenant(**kwargs):
+    settings = TenantSettings(tenant_id="t1", owner_name="Ana", owner_phone="+5255", **kwargs)
+    return Tenant(settings, None)
+
+
+def test_process_analysis_counts_against_tenant_limit():
+    tenant = make_tenant(max_concurrency=1)
+    partition = Partition(0)
+    partition.executor = object()
+    active, peak = [0], [0]
+
+    async def call(func, *args):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.01)
+        active[0] -= 1
+        return {"message": args[0]}
+
+    partition.call = call
+
+    async def scenario():
+        return await asyncio.gather(*(tenant.analyze(partition, f"m{i}") for i in range(3)))
+
+    results = asyncio.run(scenario())
+    assert [r["message"] for r in results] == ["m0", "m1", "m2"]
+    assert peak[0] == 1
+    assert tenant.waiting == 0
+
+
+def test_tenant_does_not_start_partition_processes(monkeypatch):
+    monkeypatch.setenv("PARTITION_PROCESSES", "true")
+    tenant = make_tenant()
+    assert tenant.partitions.mode == "process"
+    assert all(p.executor is None for p in tenant.partitions._partitions)
+
+
+
+def test_without_tenants_file_a_single_default_tenant(monkeypatch):
+    monkeypatch.delenv("TENANTS_FILE", raising=False)
+    monkeypatch.setenv("OWNER_NAME", "Ana")
+    monkeypatch.setenv("GOOGLE_CALENDAR_CREDENTIALS", "{no es json")
+    [settings] = load_tenant_settings()
+    assert (settings.tenant_id, settings.owner_name) == (DEFAULT_TENANT, "Ana")
+    assert settings.calendar_credentials is None
+
+
+def test_tenants_file_is_validated(monkeypatch, tmp_path):
+    path = tmp_path / "tenants.json"
+    monkeypatch.setenv("TENANTS_FILE", str(path))
+
+    path.write_text(json.dumps([
+        {"tenant_id": "clinica", "owner_name": "Ana", "max_concurrency": 2},
+        {"tenant_id": "taller", "owner_name": "Luis", "api_key": "k"}
+    ]))
+    clinica, taller = load_tenant_settings()
+    assert (clinica.max_concurrency, taller.api_key) == (2, "k")
+
+    path.write_text(json.dumps([{"tenant_id": "../etc", "owner_name": "X"}]))
+    with pytest.raises(ValueError):
+        load_tenant_settings()
+
+    path.write_text(json.dumps([{"tenant_id": "a", "owner_name": "X"}] * 2))
+    with pytest.raises(ValueError):
+        load_tenant_settings()
+
+
+def test_data_files_keep_default_names():
+    default = TenantSettings(tenant_id=DEFAULT_TENANT, owner_name="Ana", owner_phone="+5255")
+    other = TenantSettings(tenant_id="t1", owner_name="Ana", owner_phone="+5255")
+    assert default.data_file("jarvis_clients.db") == "jarvis_clients.db"
+    assert other.data_file("jarvis_clients.db") == "jarvis_clients_t1.db"
+
+
+def test_busy_tenant_does_not_exceed_its_limit():
+    tenant = make_tenant(max_concurrency=2)
+    other = make_tenant(max_concurrency=2)
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def work():
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.01)
+        with lock:
+            active[0] -= 1
+
+    async def scenario():
+        await asyncio.gather(*(tenant.run(work) for _ in range(6)))
+
+    asyncio.run(scenario())
+    assert peak[0] == 2
+    assert tenant.waiting == 0
+    # Estado aislado por propietario
+    tenant.mark_conversation_active("5550001")
+    assert not other.is_conversation_active("5550001")
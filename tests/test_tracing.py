@@ -0,0 +1,95 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from jarvis import tracing
+from jarvis.profiler import SamplingProfiler
+from jarvis.tracing import SpanExporter, current_request_id, span
+
+
+@pytest.fixture
+def exported(monkeypatch):
+    records = []
+    monkeypatch.setattr(tracing.exporter, "export", records.append)
+    return records
+
+
+def test_nested_spans_link_to_parent_and_request(exported):
+    token = current_request_id.set("req-1")
+    try:
+        with span("outer") as attributes:
+            attributes["tenant"] = "t1"
+            with span("inner"):
+                pass
+    finally:
+        current_request_id.reset(token)
+
+    inner, outer = exported
+    assert inner["parent_id"] == outer["span_id"]
+    assert outer["parent_id"] is None
+    assert {inner["request_id"], outer["request_id"]} == {"req-1"}
+    assert outer["attributes"] == {"tenant": "t1"}
+
+
+def test_span_records_error_and_reraises(exported):
+    with pytest.raises(ValueError):
+        with span("calendar.create_event"):
+            raise ValueError("sin red")
+    assert "sin red" in exported[0]["error"]
+
+
+def test_request_id_follows_work_into_threads(exported):
+    def worker():
+        with span("worker"):
+            pass
+
+    async def scenario():
+        current_request_id.set("req-2")
+        with span("request"):
+            await asyncio.to_thread(worker)
+
+    asyncio.run(scenario())
+    worker_span, request_span = exported
+    assert worker_span["request_id"] == "req-2"
+    assert worker_span["parent_id"] == request_span["span_id"]
+    assert worker_span["thread"] != request_span["thread"]
+
+
+def test_exporter_writes_json_lines_and_bounds_buffer(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    exporter = SpanExporter.__new__(SpanExporter)
+    exporter.__dict__.update(
+        file_path=str(path), collector_url=None, batch_size=100, flush_interval=60,
+        max_buffer=3, _buffer=[], _lock=threading.Lock(), _wakeup=threading.Event()
+    )
+    for n in range(5):
+        exporter.export({"n": n})
+    exporter.flush()
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert lines == [{"n": 2}, {"n": 3}, {"n": 4}]
+
+
+def test_profiler_samples_other_threads():
+    stop = threading.Event()
+
+    def busy_worker():
+        while not stop.is_set():
+            sum(range(1000))
+
+    thread = threading.Thread(target=busy_worker, name="busy")
+    thread.start()
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    time.sleep(0.05)
+    folded = profiler.stop()
+    stop.set()
+    thread.join()
+
+    assert profiler.sample_count > 0
+    busy = [line for line in folded.splitlines() if line.startswith("busy;")]
+    assert busy and all("busy_worker" in line for line in busy)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in folded.splitlines())
@@ -0,0 +1,89 @@
+import os
+import time
+
+from jarvis.transcripts import (
+    DIRECTION_IN, DIRECTION_OUT, INDEX_ENTRY, TranscriptStore, phone_key
+)
+
+
+def texts(store, phone, n=100):
+    return [m["text"] for m in store.last(phone, n)]
+
+
+def test_last_returns_recent_messages_in_order(tmp_path):
+    store = TranscriptStore(str(tmp_path))
+    for i in range(5):
+        store.append("555", DIRECTION_IN, f"m{i}", message_type="general_query")
+    store.append("777", DIRECTION_OUT, "otro")
+
+    assert texts(store, "555", 3) == ["m2", "m3", "m4"]
+    assert store.last("555", 1)[0]["message_type"] == "general_query"
+    assert store.count("555") == 5 and store.count("999") == 0
+
+
+def test_index_is_rebuilt_after_restart_across_segments(tmp_path):
+    store = TranscriptStore(str(tmp_path), segment_max_bytes=200)
+    for i in range(20):
+        store.append("555", DIRECTION_IN, f"mensaje {i}")
+    store.close()
+    assert store.stats()["segments"] > 1
+
+    reopened = TranscriptStore(str(tmp_path), segment_max_bytes=200)
+    assert texts(reopened, "555") == [f"mensaje {i}" for i in range(20)]
+
+
+def test_torn_write_is_truncated_on_recovery(tmp_path):
+    store = TranscriptStore(str(tmp_path))
+    store.append("555", DIRECTION_IN, "completo")
+    store.close()
+
+    # Corte a media escritura: registro sin entrada de índice y entrada sin registro
+    log = tmp_path / "segment-00000000.log"
+    idx = tmp_path / "segment-00000000.idx"
+    size = log.stat().st_size
+    with open(log, "ab") as f:
+        f.write(b"\x40\x00\x00\x00{\"phone\":\"555\",\"te")
+    with open(idx, "ab") as f:
+        f.write(INDEX_ENTRY.pack(phone_key("555"), size + 1000, 10, time.time(), 0))
+
+    reopened = TranscriptStore(str(tmp_path))
+    assert texts(reopened, "555") == ["completo"]
+    assert log.stat().st_size == size
+
+    reopened.append("555", DIRECTION_OUT, "después")
+    reopened.close()
+    assert texts(TranscriptStore(str(tmp_path)), "555") == ["completo", "después"]
+
+
+def test_delete_survives_restart_and_compaction(tmp_path):
+    store = TranscriptStore(str(tmp_path), segment_max_bytes=200)
+    for i in range(10):
+        for _ in range(3):
+            store.append("555", DIRECTION_IN, f"borrar {i}")
+        store.append("777", DIRECTION_IN, f"guardar {i}")
+    store.delete_phone("555")
+    store.append("777", DIRECTION_IN, "último")
+    assert store.last("555") == []
+
+    bytes_before = store.stats()["bytes"]
+    assert store.compact() > 0
+    assert store.stats()["bytes"] < bytes_before
+    assert texts(store, "777")[-1] == "último"
+    store.close()
+
+    reopened = TranscriptStore(str(tmp_path), segment_max_bytes=200)
+    assert reopened.last("555") == []
+    assert texts(reopened, "777") == [f"guardar {i}" for i in range(10)] + ["último"]
+
+
+def test_retention_drops_expired_closed_segments(tmp_path):
+    store = TranscriptStore(str(tmp_path), segment_max_bytes=200, retention_days=1)
+    old = time.time() - 2 * 86400
+    for i in range(6):
+        store.append("555", DIRECTION_IN, f"viejo {i}", timestamp=old)
+    store._rotate()
+    store.append("555", DIRECTION_IN, "nuevo")
+
+    assert store.apply_retention() > 0
+    assert texts(store, "555") == ["nuevo"]
+    assert not any(name.endswith(".tmp") for name in os.listdir(tmp_path))
@@ -0,0 +1,25 @@
+import pytest
+
+from jarvis.utils import extract_time_from_message
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("a las 5", "17:00"),
+    ("5pm", "17:00"),
+    ("a las 10 y media", "10:30"),
+    ("a las 15 horas", "15:00"),
+    ("nos vemos 15 hrs", "15:00"),
+    ("en 2 horas a las 5", "17:00"),
+])
+def test_absolute_times(message, expected):
+    assert extract_time_from_message(message) == expected
+
+
+@pytest.mark.parametrize("message", [
+    "en 2 horas",
+    "te veo dentro de 3 hrs",
+    "hace 2 horas le marqué",
+    "tengo 2 preguntas",
+])
+def test_relative_or_bare_numbers_are_not_times(message):
+    assert extract_time_from_message(message) is None
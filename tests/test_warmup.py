@@ -0,0 +1,74 @@
+import pytest
+
+from jarvis.inference import InferenceBackend
+from jarvis.warmup import ModelWarmer
+
+
+class ScriptedBackend(InferenceBackend):
+    supports_warmup = True
+
+    def __init__(self, results):
+        super().__init__("hf", "test-model")
+        self.results = list(results)
+
+    def _warm(self):
+        return self.results.pop(0)
+
+
+def warmer(backend, **kwargs):
+    kwargs.setdefault("interval_seconds", 300)
+    kwargs.setdefault("min_interval_seconds", 60)
+    kwargs.setdefault("max_interval_seconds", 1800)
+    return ModelWarmer([backend], **kwargs)
+
+
+def test_warm_ping_grows_interval_up_to_max():
+    backend = ScriptedBackend([False] * 20)
+    w = warmer(backend)
+    w._ping(backend, idle=300)
+    assert w.intervals["hf"] == pytest.approx(375)
+    for _ in range(19):
+        w._ping(backend, idle=300)
+    assert w.intervals["hf"] == 1800
+
+
+def test_cold_ping_halves_below_observed_idle():
+    backend = ScriptedBackend([True])
+    w = warmer(backend)
+    w._ping(backend, idle=240)
+    assert w.intervals["hf"] == pytest.approx(120)
+    assert w.cold_after_idle["hf"] == 240
+
+
+def test_cold_ping_respects_min_interval():
+    backend = ScriptedBackend([True])
+    w = warmer(backend)
+    w._ping(backend, idle=90)
+    assert w.intervals["hf"] == 60
+
+
+def test_growth_capped_below_cold_idle():
+    backend = ScriptedBackend([True] + [False] * 10)
+    w = warmer(backend)
+    w._ping(backend, idle=400)
+    for _ in range(10):
+        w._ping(backend, idle=150)
+    assert w.intervals["hf"] == pytest.approx(0.8 * 400)
+
+
+def test_failed_or_unknown_idle_ping_keeps_interval():
+    backend = ScriptedBackend([None, True])
+    w = warmer(backend)
+    w._ping(backend, idle=500)
+    assert w.intervals["hf"] == 300
+    # Frío al arrancar (sin inactividad conocida): no hay nada que aprender
+    w._ping(backend)
+    assert w.intervals["hf"] == 300
+    assert w.cold_after_idle["hf"] is None
+
+
+def test_backends_without_warmup_are_ignored():
+    class Plain(InferenceBackend):
+        pass
+
+    assert ModelWarmer([Plain("stub", "stub")]).backends == []